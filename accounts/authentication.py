@@ -0,0 +1,74 @@
+import copy
+import secrets
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .caches import authenticated_user_cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that caches the user per (user_id, token iat) for a
+    short TTL instead of loading it from the database on every request.
+
+    Entries are dropped when the user is saved (including deactivation) or
+    deleted in this process; other workers pick the change up within
+    USER_CACHE_TTL_SECONDS. Inactive or missing users are never cached.
+    """
+
+    def get_user(self, validated_token):
+        key = (validated_token.get(api_settings.USER_ID_CLAIM), validated_token.get('iat'))
+        user = authenticated_user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            authenticated_user_cache.set(key, user)
+        # Each request gets its own instance so attribute changes don't leak
+        return copy.copy(user)
+
+
+class StreamTicketAuthentication(BaseAuthentication):
+    """
+    Authentication by ?ticket= for endpoints a browser opens without custom
+    headers, such as EventSource streams.
+
+    A ticket (issue_stream_ticket) is signed, names the user, expires after
+    SSE_TICKET_SECONDS and can be used once per cache, so one that ends up
+    in an access log can't open another stream. Clients that can send an
+    Authorization header keep using their JWT.
+    """
+    query_param = 'ticket'
+    salt = 'accounts.stream-ticket'
+
+    @classmethod
+    def issue(cls, user) -> str:
+        return signing.dumps({'user': user.pk, 'nonce': secrets.token_urlsafe(12)}, salt=cls.salt)
+
+    def authenticate(self, request):
+        ticket = request.GET.get(self.query_param)
+        if not ticket:
+            return None
+        return self.authenticate_ticket(ticket), None
+
+    def authenticate_ticket(self, ticket):
+        max_age = settings.SSE_TICKET_SECONDS
+        try:
+            data = signing.loads(ticket, salt=self.salt, max_age=max_age)
+        except signing.BadSignature:
+            raise AuthenticationFailed('Invalid or expired stream ticket')
+        if not cache.add(f'stream-ticket:{data["nonce"]}', True, max_age):
+            raise AuthenticationFailed('Stream ticket already used')
+
+        user = get_user_model().objects.filter(pk=data['user'], is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed('User not found or inactive')
+        return user
+
+    def authenticate_header(self, request):
+        return 'Ticket'
@@ -0,0 +1,129 @@
+"""
+Per-process caches used by token introspection and JWT authentication.
+
+These live in worker memory, so they are invalidated directly by signals in
+the process that made a change and bounded by a short TTL / refresh interval
+for changes made by other workers.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from config.metrics import record_cache_lookup
+
+
+class TTLCache:
+    """Small thread-safe dict with per-entry expiry and a size cap."""
+
+    def __init__(self, ttl_seconds, max_size=1024, name=None):
+        self.ttl_seconds = ttl_seconds
+        # Label for the cache_requests_total metric
+        self.name = name
+        self.max_size = max_size
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            with self._lock:
+                self._data.pop(key, None)
+            entry = None
+        if self.name:
+            record_cache_lookup(self.name, entry is not None)
+        return default if entry is None else entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self.max_size:
+                self._evict()
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def delete_where(self, predicate):
+        """Drop every entry whose key matches predicate(key)."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [k for k, (expires_at, _) in self._data.items() if expires_at < now]
+        for key in expired:
+            del self._data[key]
+        if len(self._data) >= self.max_size:
+            # Still full: drop the entries closest to expiry
+            for key, _ in sorted(self._data.items(), key=lambda item: item[1][0])[:self.max_size // 4 or 1]:
+                del self._data[key]
+
+
+class BlacklistedJTISet:
+    """
+    In-memory set of blacklisted token JTIs that haven't expired yet.
+
+    Loaded with one query on first use, updated immediately by the
+    BlacklistedToken signals in this process, and topped up incrementally
+    at most every refresh_seconds to pick up tokens blacklisted by other
+    workers. The incremental query re-reads a short overlap window so rows
+    committed late by a slow transaction are not missed.
+
+    An expired token is rejected anyway, so only unexpired tokens are
+    loaded and each refresh drops the ones that have expired since; the set
+    stays the size of the tokens blacklisted within one token lifetime.
+    """
+    overlap = timedelta(seconds=60)
+
+    def __init__(self, refresh_seconds):
+        self.refresh_seconds = refresh_seconds
+        self._expires_at: dict[str, datetime] = {}
+        self._since = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, jti):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self.refresh()
+        expires_at = self._expires_at.get(jti)
+        return expires_at is not None and expires_at > timezone.now()
+
+    def __len__(self):
+        return len(self._expires_at)
+
+    def refresh(self):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        with self._lock:
+            started = timezone.now()
+            rows = BlacklistedToken.objects.filter(token__expires_at__gt=started)
+            if self._since is not None:
+                rows = rows.filter(blacklisted_at__gte=self._since - self.overlap)
+            self._expires_at.update(rows.values_list('token__jti', 'token__expires_at'))
+            for jti in [jti for jti, expires_at in self._expires_at.items() if expires_at <= started]:
+                del self._expires_at[jti]
+            self._since = started
+            self._loaded_at = time.monotonic()
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._expires_at[jti] = expires_at
+
+    def discard(self, jti):
+        with self._lock:
+            self._expires_at.pop(jti, None)
+
+    def reset(self):
+        with self._lock:
+            self._expires_at.clear()
+            self._since = None
+            self._loaded_at = None
+
+
+user_info_cache = TTLCache(getattr(settings, 'USER_CACHE_TTL_SECONDS', 30), name='user_info')
+authenticated_user_cache = TTLCache(getattr(settings, 'USER_CACHE_TTL_SECONDS', 30), name='authenticated_user')
+blacklisted_jtis = BlacklistedJTISet(getattr(settings, 'TOKEN_BLACKLIST_REFRESH_SECONDS', 30))
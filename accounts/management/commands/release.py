@@ -0,0 +1,149 @@
+"""
+Release step run before gunicorn starts: migrate, ensure the production
+superuser, collect static files. Each step is skipped when there is
+nothing to do, so restarts and scale-out don't pay for it.
+
+- migrate runs only when the migration plan (what `showmigrations` marks
+  as [ ]) is non-empty; the release fails if migrations are still pending
+  afterwards, so gunicorn never starts on an old schema.
+- collectstatic runs only when the source static files or the whitenoise
+  manifest changed since the last run. A fingerprint of the sources and the
+  manifest hash are kept next to the manifest in STATIC_ROOT.
+
+`release --static-only` needs no database and is used at build time, so
+the start-time collectstatic is normally skipped.
+
+Usage: python manage.py release [--force] [--skip-superuser] [--static-only]
+"""
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.storage import storages
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+FINGERPRINT_NAME = '.release-fingerprint.json'
+
+
+def pending_migrations(database=DEFAULT_DB_ALIAS) -> list:
+    """Unapplied migrations as 'app_label.name' strings"""
+    executor = MigrationExecutor(connections[database])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [f'{migration.app_label}.{migration.name}' for migration, _ in plan]
+
+
+def static_sources_fingerprint() -> str:
+    """Hash of every file the staticfiles finders would collect"""
+    storage_class = type(storages['staticfiles'])
+    digest = hashlib.sha256(f'{storage_class.__module__}.{storage_class.__qualname__}'.encode())
+    files = {}
+    for finder in finders.get_finders():
+        for path, storage in finder.list([]):
+            prefix = getattr(storage, 'prefix', None) or ''
+            # First finder wins, like collectstatic
+            files.setdefault(str(Path(prefix) / path), (storage, path))
+    for name in sorted(files):
+        storage, path = files[name]
+        digest.update(name.encode())
+        with storage.open(path) as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def manifest_hash() -> str:
+    load_manifest = getattr(staticfiles_storage, 'load_manifest', None)
+    if load_manifest is None:
+        return ''
+    try:
+        return load_manifest()[1]
+    except ValueError:
+        return ''
+
+
+def _fingerprint_path() -> Path:
+    return Path(settings.STATIC_ROOT) / FINGERPRINT_NAME
+
+
+def read_static_fingerprint() -> dict:
+    try:
+        return json.loads(_fingerprint_path().read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def write_static_fingerprint(sources):
+    _fingerprint_path().write_text(json.dumps({'sources': sources, 'manifest_hash': manifest_hash()}))
+
+
+class Command(BaseCommand):
+    help = 'Run migrate / createsuperuser_production / collectstatic only when needed, with timings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Run migrate and collectstatic regardless')
+        parser.add_argument('--skip-superuser', action='store_true', help="Don't run createsuperuser_production")
+        parser.add_argument('--static-only', action='store_true', help='Only collect static files (no database access)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        verbosity = max(options['verbosity'] - 1, 0)
+
+        if not options['static_only']:
+            self._migrate(options['force'], verbosity)
+            if not options['skip_superuser']:
+                self._create_superuser(verbosity)
+        self._collectstatic(options['force'], verbosity)
+
+        self.stdout.write(self.style.SUCCESS(f'Release finished in {time.perf_counter() - started:.2f}s'))
+
+    def _migrate(self, force, verbosity):
+        with self._step('migrate'):
+            pending = pending_migrations()
+            if pending or force:
+                self.stdout.write(f'   {len(pending)} pending: {", ".join(pending[:5])}'
+                                  f'{" ..." if len(pending) > 5 else ""}')
+                call_command('migrate', interactive=False, verbosity=verbosity)
+                still_pending = pending_migrations()
+                if still_pending:
+                    raise CommandError(f'Migrations still pending after migrate: {", ".join(still_pending)}')
+            else:
+                self.stdout.write('   skipped, no pending migrations')
+
+    def _create_superuser(self, verbosity):
+        with self._step('createsuperuser_production'):
+            try:
+                call_command('createsuperuser_production', verbosity=verbosity)
+            except Exception as e:
+                self.stdout.write(f'   skipped: {e}')
+
+    def _collectstatic(self, force, verbosity):
+        with self._step('collectstatic'):
+            sources = static_sources_fingerprint()
+            stored = read_static_fingerprint()
+            current_manifest = manifest_hash()
+            if (
+                not force
+                and stored.get('sources') == sources
+                and stored.get('manifest_hash') == current_manifest
+                and (current_manifest or not hasattr(staticfiles_storage, 'load_manifest'))
+            ):
+                self.stdout.write('   skipped, static files unchanged')
+            else:
+                call_command('collectstatic', interactive=False, verbosity=verbosity)
+                write_static_fingerprint(sources)
+
+    @contextmanager
+    def _step(self, name):
+        self.stdout.write(f'→ {name}')
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stdout.write(f'   {name}: {time.perf_counter() - started:.2f}s')
@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .caches import authenticated_user_cache, blacklisted_jtis, user_info_cache
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_blacklisted_jti(sender, instance, **kwargs):
+    blacklisted_jtis.add(instance.token.jti, instance.token.expires_at)
+
+
+@receiver(post_delete, sender=BlacklistedToken)
+def remove_blacklisted_jti(sender, instance, **kwargs):
+    blacklisted_jtis.discard(instance.token.jti)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop cached user records on save (including deactivation) or delete"""
+    user_info_cache.delete_where(lambda key: key == instance.pk)
+    # authenticated_user_cache is keyed by (user_id, token iat)
+    authenticated_user_cache.delete_where(lambda key: key[0] == instance.pk)
@@ -1,3 +1,194 @@
-from django.test import TestCase
+"""
+Query budgets for the auth endpoints; see bookings/tests.py for how the
+budgets are set.
+"""
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.caches import BlacklistedJTISet, authenticated_user_cache, blacklisted_jtis, user_info_cache
+from config.testing import QueryBudgetTestCase
+
+
+class AuthEndpointQueryBudgetTests(QueryBudgetTestCase):
+    def test_login(self):
+        with self.assertMaxQueries(2):
+            response = self.api_client().post(
+                '/api/v1/auth/login/', {'username': 'staff', 'password': 'pass'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_me(self):
+        self.assertGetWithin(1, '/api/v1/auth/me/')
+
+    def test_token_validate(self):
+        self.assertGetWithin(2, '/api/v1/auth/token/validate/')
+
+
+@override_settings(
+    LOGIN_THROTTLE_IP_CAPACITY=4, LOGIN_THROTTLE_IP_PER_MINUTE=1,
+    LOGIN_THROTTLE_USERNAME_CAPACITY=2, LOGIN_THROTTLE_USERNAME_PER_MINUTE=1,
+)
+class LoginThrottleTests(QueryBudgetTestCase):
+    def login(self, username, **extra):
+        return self.api_client().post(
+            '/api/v1/auth/login/', {'username': username, 'password': 'wrong'}, format='json', **extra
+        )
+
+    def test_username_bucket(self):
+        self.assertEqual([self.login('staff').status_code for _ in range(3)], [401, 401, 429])
+        # Same IP, other username: the IP bucket still has a token
+        self.assertEqual(self.login('agent').status_code, 401)
+
+    def test_ip_bucket(self):
+        statuses = [self.login(f'user{n}').status_code for n in range(5)]
+        self.assertEqual(statuses, [401, 401, 401, 401, 429])
+
+    def test_spoofed_forwarded_for(self):
+        # The proxy appends the real client address to whatever the client sent
+        statuses = [
+            self.login(f'user{n}', HTTP_X_FORWARDED_FOR=f'10.0.0.{n}, 203.0.113.7').status_code
+            for n in range(5)
+        ]
+        self.assertEqual(statuses, [401, 401, 401, 401, 429])
+        # Another client behind the same proxy has its own bucket
+        self.assertEqual(self.login('user9', HTTP_X_FORWARDED_FOR='198.51.100.2').status_code, 401)
+
+    def test_retry_after(self):
+        for _ in range(2):
+            self.login('staff')
+        response = self.login('staff')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+
+class BlacklistedJTISetTests(QueryBudgetTestCase):
+    def blacklist(self, jti, expires_in):
+        token = OutstandingToken.objects.create(
+            user=self.data['staff'], jti=jti, token=jti, expires_at=timezone.now() + expires_in
+        )
+        BlacklistedToken.objects.create(token=token)
+
+    def test_only_unexpired_tokens_are_kept(self):
+        self.blacklist('live', timedelta(hours=1))
+        self.blacklist('expired', -timedelta(hours=1))
+        jtis = BlacklistedJTISet(refresh_seconds=30)
+        self.assertIn('live', jtis)
+        self.assertNotIn('expired', jtis)
+        self.assertEqual(len(jtis), 1)
+
+    def test_refresh_prunes_expired_tokens(self):
+        jtis = BlacklistedJTISet(refresh_seconds=30)
+        jtis.add('soon', timezone.now() + timedelta(seconds=1))
+        jtis.add('later', timezone.now() + timedelta(hours=1))
+        with patch('accounts.caches.timezone.now', return_value=timezone.now() + timedelta(minutes=1)):
+            jtis.refresh()
+            self.assertNotIn('soon', jtis)
+        self.assertEqual(len(jtis), 1)
+
+
+class AuthCacheInvalidationTests(QueryBudgetTestCase):
+    """A stale entry in these caches would let a revoked user in until the TTL"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.data['staff']
+
+    def cached_user_ids(self):
+        return {key[0] for key in authenticated_user_cache._data}
+
+    def test_deactivated_user_is_rejected_at_once(self):
+        self.assertGetWithin(1, '/api/v1/auth/me/')
+        self.assertEqual(self.cached_user_ids(), {self.user.pk})
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.cached_user_ids(), set())
+        self.assertEqual(self.client.get('/api/v1/auth/me/').status_code, 401)
+
+    def test_password_change_evicts_cached_user(self):
+        self.assertGetWithin(1, '/api/v1/auth/me/')
+        self.assertGetWithin(2, '/api/v1/auth/token/validate/')
+        self.assertEqual(self.cached_user_ids(), {self.user.pk})
+        self.assertIsNotNone(user_info_cache.get(self.user.pk))
+
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertEqual(self.cached_user_ids(), set())
+        self.assertIsNone(user_info_cache.get(self.user.pk))
+
+    def test_blacklisted_token_is_known_without_reloading(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.assertNotIn(refresh['jti'], blacklisted_jtis)
+
+        response = self.client.post('/api/v1/auth/logout/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertIn(refresh['jti'], blacklisted_jtis)
+        response = self.client.post('/api/v1/auth/token/validate/', {'token': str(refresh)}, format='json')
+        self.assertTrue(response.data['is_blacklisted'])
+
+
+class ReleaseStaticFilesTests(SimpleTestCase):
+    """--static-only runs at build time without a database; SimpleTestCase fails on any query"""
+
+    def setUp(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.source = root / 'src' / 'app.css'
+        self.source.parent.mkdir()
+        self.source.write_text('body { color: teal; }')
+        override = override_settings(
+            STATIC_ROOT=root / 'static',
+            STATICFILES_DIRS=[root / 'src'],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'},
+            },
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def release(self):
+        out = io.StringIO()
+        with patch('accounts.management.commands.release.call_command', wraps=call_command) as command:
+            call_command('release', '--static-only', stdout=out)
+        return [c.args[0] for c in command.call_args_list], out.getvalue()
+
+    def test_skips_collectstatic_when_unchanged(self):
+        self.assertEqual(self.release()[0], ['collectstatic'])
+
+        commands, output = self.release()
+        self.assertEqual(commands, [])
+        self.assertIn('skipped, static files unchanged', output)
+
+        self.source.write_text('body { color: navy; }')
+        self.assertEqual(self.release()[0], ['collectstatic'])
+
+
+@patch('accounts.management.commands.release.Command._collectstatic')
+class ReleaseMigrationTests(TestCase):
+    def release(self):
+        with patch('accounts.management.commands.release.call_command') as command:
+            call_command('release', '--skip-superuser', stdout=io.StringIO())
+        return [c.args[0] for c in command.call_args_list]
+
+    def test_skips_migrate_without_pending_migrations(self, collectstatic):
+        self.assertNotIn('migrate', self.release())
+
+    def test_fails_when_migrations_stay_pending(self, collectstatic):
+        with patch('accounts.management.commands.release.pending_migrations',
+                   return_value=['bookings.9999_future']):
+            with self.assertRaisesMessage(CommandError, 'bookings.9999_future'):
+                self.release()
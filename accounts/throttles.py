@@ -0,0 +1,133 @@
+"""
+Token-bucket throttling for the login endpoint.
+
+authenticate() runs a deliberately slow password hash, so login_view is
+throttled per client IP and per username before the view body runs. Each
+attempt takes one token from both buckets; buckets refill continuously.
+
+Bucket state lives in the Django cache (locmem by default, one bucket per
+process). Point CACHES at a shared backend such as Redis to throttle
+across workers/nodes. Updates are read-modify-write, which is exact for
+locmem (guarded by a lock) and approximate for shared backends.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+KEY_PREFIX = 'login_throttle'
+SCOPES = ('ip', 'username')
+
+_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, 'LOGIN_THROTTLE_CACHE', 'default')]
+
+
+class TokenBucket:
+    """capacity tokens, refilled at refill_rate tokens per second."""
+
+    def __init__(self, cache, key, capacity, refill_rate):
+        self.cache = cache
+        self.key = key
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+
+    def _state(self, now):
+        tokens, updated = self.cache.get(self.key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.refill_rate)
+        return tokens, now
+
+    def peek(self, now=None) -> float:
+        """Tokens currently available, without taking one"""
+        return self._state(now or time.time())[0]
+
+    def consume(self, now=None) -> bool:
+        now = now or time.time()
+        tokens, now = self._state(now)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Kept until a full refill would have happened anyway
+        timeout = int(self.capacity / self.refill_rate) + 1
+        self.cache.set(self.key, (tokens, now), timeout)
+        return allowed
+
+    def wait(self, now=None) -> float:
+        """Seconds until one token is available"""
+        tokens = self.peek(now)
+        return 0 if tokens >= 1 else (1 - tokens) / self.refill_rate
+
+
+def _rejected_key(scope):
+    return f'{KEY_PREFIX}:rejected:{scope}'
+
+
+def record_rejection(scope):
+    cache = _cache()
+    key = _rejected_key(scope)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def rejection_counts() -> dict:
+    """Rejected login attempts since the cache was last cleared, per scope"""
+    cache = _cache()
+    return {scope: cache.get(_rejected_key(scope), 0) for scope in SCOPES}
+
+
+class LoginRateThrottle(BaseThrottle):
+    """
+    Rejects login attempts once the client IP or the submitted username
+    has used up its bucket. The IP bucket is checked first so a throttled
+    client cannot drain other users' username buckets.
+
+    The client IP comes from get_ident(), which trusts only the
+    X-Forwarded-For entry added by the REST_FRAMEWORK['NUM_PROXIES']
+    proxies in front of the app, so rotating the header doesn't give a
+    fresh bucket.
+    """
+
+    def __init__(self):
+        self.wait_seconds = 0
+
+    def get_buckets(self, request):
+        cache = _cache()
+        buckets = [('ip', TokenBucket(
+            cache,
+            f'{KEY_PREFIX}:ip:{self.get_ident(request)}',
+            settings.LOGIN_THROTTLE_IP_CAPACITY,
+            settings.LOGIN_THROTTLE_IP_PER_MINUTE / 60,
+        ))]
+
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if isinstance(username, str) and username.strip():
+            buckets.append(('username', TokenBucket(
+                cache,
+                f'{KEY_PREFIX}:username:{username.strip().lower()[:150]}',
+                settings.LOGIN_THROTTLE_USERNAME_CAPACITY,
+                settings.LOGIN_THROTTLE_USERNAME_PER_MINUTE / 60,
+            )))
+        return buckets
+
+    def allow_request(self, request, view):
+        if not getattr(settings, 'LOGIN_THROTTLE_ENABLED', True):
+            return True
+
+        with _lock:
+            for scope, bucket in self.get_buckets(request):
+                if not bucket.consume():
+                    self.wait_seconds = bucket.wait()
+                    record_rejection(scope)
+                    return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
@@ -1,6 +1,6 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
@@ -8,6 +8,8 @@ from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
 from .serializers import UserSerializer, LoginSerializer
+from .caches import blacklisted_jtis, user_info_cache
+from .throttles import LoginRateThrottle, rejection_counts
 
 # Import jwt only when needed (token validation endpoint)
 # PyJWT should be installed as a dependency of djangorestframework-simplejwt
@@ -19,6 +21,7 @@ except ImportError:
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginRateThrottle])  # Runs before the password hash in authenticate()
 def login_view(request):
     """
     Login endpoint - returns JWT tokens and user data
@@ -67,6 +70,16 @@ def login_view(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def login_throttle_stats_view(request):
+    """
+    GET /api/v1/auth/login-throttle/
+    Rejected login attempts per throttle scope (ip, username), staff only
+    """
+    return Response({'rejected': rejection_counts()})
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_profile_view(request):
@@ -78,6 +91,7 @@ def user_profile_view(request):
 
 
 @api_view(['GET', 'POST'])
+@authentication_classes([])  # The token is verified below; request auth would reject expired ones
 @permission_classes([AllowAny])
 def token_validate_view(request):
     """
@@ -120,18 +134,39 @@ def token_validate_view(request):
                 )
             token_string = auth_header.split(' ')[1]
         
-        # Decode token without verification first to check expiration
+        # Verify the signature once; expiry is reported rather than rejected.
+        # Only a bad signature falls back to an unverified decode for display.
+        signature_ok = False
         try:
             decoded_token = jwt.decode(
                 token_string,
-                options={"verify_signature": False},
-                algorithms=['HS256']
+                settings.SECRET_KEY,
+                algorithms=['HS256'],
+                options={'verify_exp': False},
             )
+            signature_ok = True
+        except jwt.InvalidSignatureError:
+            decoded_token = None
         except jwt.DecodeError:
             return Response(
                 {'error': 'Invalid token format'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except jwt.InvalidTokenError:
+            decoded_token = None
+        
+        if decoded_token is None:
+            try:
+                decoded_token = jwt.decode(
+                    token_string,
+                    options={"verify_signature": False},
+                    algorithms=['HS256']
+                )
+            except jwt.DecodeError:
+                return Response(
+                    {'error': 'Invalid token format'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
         # Extract token information
         exp = decoded_token.get('exp')
@@ -151,41 +186,17 @@ def token_validate_view(request):
             exp_datetime = datetime.fromtimestamp(exp)
             iat_datetime = datetime.fromtimestamp(iat) if iat else None
             
-            # Check if token is blacklisted (import here to avoid breaking login if migrations not run)
+            # Blacklist status from the in-memory JTI set (no per-call queries)
             is_blacklisted = False
             if jti:
                 try:
-                    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
-                    outstanding_token = OutstandingToken.objects.filter(jti=jti).first()
-                    if outstanding_token:
-                        is_blacklisted = BlacklistedToken.objects.filter(token=outstanding_token).exists()
+                    is_blacklisted = jti in blacklisted_jtis
                 except Exception:
                     pass  # Ignore errors when checking blacklist (migrations might not be run)
             
-            # Verify token signature and get user info if valid
-            user_info = None
-            is_signature_valid = False
-            try:
-                # Verify token signature
-                secret_key = settings.SECRET_KEY
-                jwt.decode(token_string, secret_key, algorithms=['HS256'])
-                is_signature_valid = True
-                
-                # Get user info if valid
-                if user_id:
-                    from django.contrib.auth import get_user_model
-                    User = get_user_model()
-                    try:
-                        user = User.objects.get(id=user_id)
-                        user_info = {
-                            'id': user.id,
-                            'username': user.username,
-                            'email': user.email,
-                        }
-                    except User.DoesNotExist:
-                        pass
-            except jwt.InvalidTokenError:
-                pass  # Signature invalid, but we still return decoded info
+            # An expired token does not count as valid, matching full verification
+            is_signature_valid = signature_ok and not is_expired
+            user_info = _get_user_info(user_id) if is_signature_valid and user_id else None
         
             response_data = {
                 'token_type': token_type,
@@ -224,6 +235,20 @@ def token_validate_view(request):
         )
 
 
+def _get_user_info(user_id):
+    """User summary for token introspection, served from a short-TTL per-process cache"""
+    user_info = user_info_cache.get(user_id)
+    if user_info is not None:
+        return user_info
+    
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+    user = User.objects.filter(id=user_id).values('id', 'username', 'email').first()
+    if user is not None:
+        user_info_cache.set(user_id, user)
+    return user
+
+
 def _format_timedelta(td):
     """Format timedelta to human-readable string"""
     total_seconds = int(td.total_seconds())
@@ -0,0 +1,95 @@
+"""
+Throughput of the WSGI (sync gunicorn) and ASGI (gunicorn + uvicorn workers)
+deployments on the endpoints that have async views.
+
+Starts both servers against the same database, then drives each endpoint
+with N concurrent keep-alive clients for a fixed duration and reports
+requests/second and latency percentiles (benchmarks/loadgen.py).
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 python benchmarks/asgi_vs_wsgi.py \
+        --user admin --clients 200 --duration 15 --workers 2 [--json results.json]
+
+Use --wsgi-url / --asgi-url to benchmark servers that are already running.
+"""
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from loadgen import mint_token, run_load, setup_django, start_server, stop_server
+
+
+def load_context(username):
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from villas.models import Villa
+
+    user = get_user_model().objects.get(username=username)
+    villa = Villa.objects.order_by('id').first()
+    return mint_token(user), villa.id if villa else 1
+
+
+def scenarios(token, villa_id):
+    auth = {'Authorization': f'Bearer {token}'}
+    return {
+        'public_availability': ('GET', '/api/v1/public/availability/?start=2026-10-01&end=2026-12-31', {}, None),
+        'dashboard_overview': ('GET', '/api/v1/bookings/dashboard-overview/', auth, None),
+        'calculate_price': ('POST', '/api/v1/bookings/calculate-price/', auth, json.dumps({
+            'villa': villa_id, 'check_in': '2026-12-20', 'check_out': '2027-01-03',
+        }).encode()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user', required=True, help='Existing username to mint a JWT for')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per endpoint per server')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers for both servers')
+    parser.add_argument('--endpoint', action='append', help='Only these scenarios (repeatable)')
+    parser.add_argument('--wsgi-url', help='Use a running WSGI server instead of starting one')
+    parser.add_argument('--asgi-url', help='Use a running ASGI server instead of starting one')
+    parser.add_argument('--json', help='Also write results to this file')
+    args = parser.parse_args()
+
+    token, villa_id = load_context(args.user)
+    selected = {
+        name: scenario for name, scenario in scenarios(token, villa_id).items()
+        if not args.endpoint or name in args.endpoint
+    }
+
+    results = {}
+    for kind, port, given_url in (('wsgi', 8701, args.wsgi_url), ('asgi', 8702, args.asgi_url)):
+        process = None
+        url = given_url
+        if url is None:
+            process, url = start_server(kind, port, args.workers)
+        try:
+            for name, scenario in selected.items():
+                result = asyncio.run(run_load(url, scenario, args.clients, args.duration))
+                results.setdefault(name, {})[kind] = result
+                print(f"{name:22} {kind}: {result['requests_per_second']:8} req/s  "
+                      f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+                      f"errors {result['errors']}",
+                      flush=True)
+        finally:
+            if process is not None:
+                stop_server(process)
+
+    for name, by_kind in results.items():
+        if 'wsgi' in by_kind and 'asgi' in by_kind and by_kind['wsgi']['requests_per_second']:
+            ratio = by_kind['asgi']['requests_per_second'] / by_kind['wsgi']['requests_per_second']
+            print(f'{name:22} asgi/wsgi throughput: {ratio:.2f}x')
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            'clients': args.clients,
+            'duration_seconds': args.duration,
+            'workers': args.workers,
+            'results': results,
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
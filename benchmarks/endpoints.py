@@ -0,0 +1,176 @@
+"""
+Latency benchmark of the hot endpoints on a seeded database.
+
+Migrates and seeds the benchmark database with `manage.py seed_scale` (only
+when it does not already hold a dataset of the requested size), starts
+gunicorn on it, and drives each endpoint with N concurrent keep-alive
+clients for a fixed duration:
+
+- public availability over 93 days
+- dashboard-overview
+- booking list, page 1 and page 500
+- calendar for the current month
+- calculate-price for a one-week stay
+
+Reports throughput, p50/p95/p99 latency and queries per request (from the
+Server-Timing header), and writes everything to JSON together with the git
+commit and dataset size so runs can be compared over time.
+
+Usage:
+    python benchmarks/endpoints.py [--database sqlite:////tmp/villa-bench.sqlite3] \\
+        [--villas 50 --bookings-per-villa 300] [--clients 50 --duration 10 --workers 2] \\
+        [--server wsgi|asgi] [--json results.json] [--baseline previous.json]
+
+Use --url to benchmark a server that is already running on the same database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from loadgen import BASE_DIR, mint_token, run_load, setup_django, start_server, stop_server
+
+VILLA_PREFIX = 'Bench Villa'
+BENCH_USER = 'benchmark'
+
+
+def prepare_database(args):
+    """Migrate and seed if needed; returns (token, villa id) for the scenarios"""
+    os.environ['DATABASE_URL'] = args.database
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from villas.models import Villa
+
+    call_command('migrate', interactive=False, verbosity=0)
+    villas = Villa.objects.filter(name__startswith=f'{VILLA_PREFIX} ')
+    if args.reseed or villas.count() != args.villas:
+        call_command(
+            'seed_scale', villas=args.villas, bookings_per_villa=args.bookings_per_villa,
+            seed=args.seed, prefix=VILLA_PREFIX, clear=True,
+        )
+
+    User = get_user_model()
+    user = User.objects.filter(username=BENCH_USER).first()
+    if user is None:
+        user = User.objects.create_user(username=BENCH_USER, name='Benchmark', is_staff=True)
+    villa = villas.filter(status='active').order_by('id').first()
+    return mint_token(user), villa.id
+
+
+def scenarios(token, villa_id, today):
+    auth = {'Authorization': f'Bearer {token}'}
+    month_start = today.replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return {
+        'public_availability_93d': (
+            'GET', f'/api/v1/public/availability/?start={today}&end={today + timedelta(days=93)}', {}, None,
+        ),
+        'dashboard_overview': ('GET', '/api/v1/bookings/dashboard-overview/', auth, None),
+        'booking_list_page_1': ('GET', '/api/v1/bookings/?page=1', auth, None),
+        'booking_list_page_500': ('GET', '/api/v1/bookings/?page=500', auth, None),
+        'calendar_month': ('GET', f'/api/v1/bookings/calendar/?start={month_start}&end={month_end}', auth, None),
+        'calculate_price': ('POST', '/api/v1/bookings/calculate-price/', auth, json.dumps({
+            'villa': villa_id,
+            'check_in': (today + timedelta(days=30)).isoformat(),
+            'check_out': (today + timedelta(days=37)).isoformat(),
+        }).encode()),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())['results']
+    print(f'\nCompared with {baseline_path}:')
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or not before.get('p95_ms') or not result['p95_ms']:
+            continue
+        p95 = (result['p95_ms'] / before['p95_ms'] - 1) * 100
+        rps = (result['requests_per_second'] / before['requests_per_second'] - 1) * 100 \
+            if before['requests_per_second'] else 0
+        print(f'{name:26} p95 {before["p95_ms"]} -> {result["p95_ms"]} ms ({p95:+.0f}%)  '
+              f'throughput {rps:+.0f}%')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', default=os.environ.get('BENCH_DATABASE_URL', 'sqlite:////tmp/villa-bench.sqlite3'),
+                        help='DATABASE_URL of the benchmark database (default: $BENCH_DATABASE_URL or /tmp sqlite)')
+    parser.add_argument('--villas', type=int, default=50)
+    parser.add_argument('--bookings-per-villa', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reseed', action='store_true', help='Regenerate the dataset even if it exists')
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per endpoint')
+    parser.add_argument('--warmup', type=float, default=2, help='Unmeasured seconds per endpoint first')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--url', help='Use a running server instead of starting one')
+    parser.add_argument('--endpoint', action='append', help='Only these scenarios (repeatable)')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--baseline', help='Earlier --json output to compare against')
+    args = parser.parse_args()
+
+    token, villa_id = prepare_database(args)
+    today = date.today()
+    selected = {
+        name: scenario for name, scenario in scenarios(token, villa_id, today).items()
+        if not args.endpoint or name in args.endpoint
+    }
+
+    process, url = None, args.url
+    if url is None:
+        # Per-request log lines would be part of what is measured
+        process, url = start_server(args.server, 8703, args.workers, env={
+            'PERF_SERVER_TIMING': 'True', 'PERF_LOG_LEVEL': 'WARNING',
+        })
+
+    results = {}
+    try:
+        for name, scenario in selected.items():
+            result = asyncio.run(run_load(url, scenario, args.clients, args.duration, warmup=args.warmup))
+            results[name] = result
+            print(f"{name:26} {result['requests_per_second']:8} req/s  p50 {result['p50_ms']} ms  "
+                  f"p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+                  f"queries {result['queries_per_request']}  errors {result['errors']}", flush=True)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'server': args.server if args.url is None else args.url,
+            'workers': args.workers,
+            'clients': args.clients,
+            'duration_seconds': args.duration,
+            'dataset': {
+                'database': args.database.split(':', 1)[0],
+                'villas': args.villas,
+                'bookings_per_villa': args.bookings_per_villa,
+                'seed': args.seed,
+            },
+            'results': results,
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
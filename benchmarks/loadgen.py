@@ -0,0 +1,171 @@
+"""
+Shared pieces of the benchmark scripts: Django setup and JWT minting,
+starting/stopping gunicorn, and an asyncio HTTP/1.1 load generator.
+
+The load generator keeps one keep-alive connection per client and records
+latency per request. It also reads the query count from the Server-Timing
+header that config.instrumentation.PerformanceMiddleware adds
+(PERF_SERVER_TIMING), so the results include queries per request.
+"""
+import asyncio
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from urllib.parse import urlsplit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+def setup_django():
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+
+
+def mint_token(user):
+    """Access token for an existing user, so the load isn't throttled logins"""
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    return str(RefreshToken.for_user(user).access_token)
+
+
+def start_server(kind, port, workers, env=None):
+    app = 'config.wsgi:application' if kind == 'wsgi' else 'config.asgi:application'
+    cmd = ['gunicorn', app, '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+           '--log-level', 'warning', '--timeout', '120']
+    if kind == 'asgi':
+        cmd += ['--worker-class', 'uvicorn.workers.UvicornWorker']
+    env = {**os.environ, 'DEBUG': os.environ.get('DEBUG', 'False'), **(env or {})}
+    process = subprocess.Popen(cmd, cwd=BASE_DIR, env=env, start_new_session=True,
+                               stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'{url}/health/', timeout=1)
+            return process, url
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f'{kind} server did not start on port {port}')
+
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait(timeout=30)
+
+
+async def _read_response(reader):
+    """(status, close, server_timing) of one response; the body is discarded"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    length, chunked, close, server_timing = None, False, False, None
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+        elif name == 'connection' and value.lower() == 'close':
+            close = True
+        elif name == 'server-timing':
+            server_timing = value
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        close = True
+    return status, close, server_timing
+
+
+async def _client(url, scenario, stop_at, latencies, queries, errors):
+    method, path, headers, body = scenario
+    parts = urlsplit(url)
+    request = [f'{method} {path} HTTP/1.1', f'Host: {parts.hostname}', 'Connection: keep-alive']
+    request += [f'{k}: {v}' for k, v in headers.items()]
+    if body is not None:
+        request += ['Content-Type: application/json', f'Content-Length: {len(body)}']
+    payload = ('\r\n'.join(request) + '\r\n\r\n').encode() + (body or b'')
+
+    reader = writer = None
+    while time.monotonic() < stop_at:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+            started = time.perf_counter()
+            writer.write(payload)
+            await writer.drain()
+            status, close, server_timing = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors[status] = errors.get(status, 0) + 1
+            match = QUERY_COUNT.search(server_timing or '')
+            if match:
+                queries.append(int(match.group(1)))
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            errors['connection'] = errors.get('connection', 0) + 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+async def run_load(url, scenario, clients, duration, warmup=0):
+    """Drive one scenario with `clients` concurrent connections for `duration` seconds"""
+    if warmup:
+        await run_load(url, scenario, clients, warmup)
+    latencies, queries, errors = [], [], {}
+    started = time.monotonic()
+    stop_at = started + duration
+    await asyncio.gather(*(
+        _client(url, scenario, stop_at, latencies, queries, errors) for _ in range(clients)
+    ))
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': _ms(percentile(latencies, 0.50)),
+        'p95_ms': _ms(percentile(latencies, 0.95)),
+        'p99_ms': _ms(percentile(latencies, 0.99)),
+        'max_ms': _ms(latencies[-1] if latencies else None),
+        'queries_per_request': round(sum(queries) / len(queries), 1) if queries else None,
+    }
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking
+from .models import Booking, OutboundEmail
 
 
 @admin.register(Booking)
@@ -31,3 +31,12 @@ class BookingAdmin(admin.ModelAdmin):
     )
     
     readonly_fields = ['total_payment', 'created_by']
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """Admin interface for the email outbox"""
+    list_display = ['id', 'kind', 'to_email', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['to_email', 'subject']
+    readonly_fields = ['booking', 'sent_at', 'created_at', 'updated_at']
@@ -0,0 +1,208 @@
+"""
+Versioned cache for the dashboard analytics endpoints.
+
+Entries are keyed by endpoint, the query params the endpoint reads, today's
+date and a bookings-data version. Booking (and Villa) saves and deletes
+bump the version after commit, so the next request recomputes instead of
+waiting for a TTL. Writes that send no signals (bulk_create, bulk_update,
+QuerySet.update()) must call bump_data_version() themselves, as the
+importer and villa reorder do; ANALYTICS_CACHE_SECONDS is the fallback for
+any that don't and for other processes when the cache is per-process.
+
+Stampede protection: on a miss, only the caller that wins cache.add() on
+the entry's lock key recomputes. Others poll for the value for up to
+ANALYTICS_CACHE_LOCK_SECONDS and compute it themselves only if the winner
+never stores it (e.g. it crashed; the lock expires after the same time).
+
+Works with any cache backend. With the default locmem cache the version
+and locks are per process: a write bumps only the version of the worker
+that handled it, so other workers serve their entries until they expire.
+Their TTL is therefore capped at PER_PROCESS_MAX_SECONDS. With a shared
+backend (CACHE_BACKEND, e.g. Redis) a bump reaches every worker and one
+worker recomputes for all of them.
+"""
+import asyncio
+import functools
+import hashlib
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+from rest_framework.response import Response
+
+from config.db_router import read_alias
+from config.metrics import record_cache_lookup
+
+KEY_PREFIX = 'analytics'
+VERSION_KEY = f'{KEY_PREFIX}:bookings_version'
+# Polling interval of callers waiting for another worker's result
+WAIT_INTERVAL_SECONDS = 0.05
+# Longest staleness other workers see after a write with a per-process cache
+PER_PROCESS_MAX_SECONDS = 60
+
+
+def _cache():
+    return caches[getattr(settings, 'ANALYTICS_CACHE', 'default')]
+
+
+def _ttl():
+    ttl = getattr(settings, 'ANALYTICS_CACHE_SECONDS', 60)
+    if isinstance(_cache(), LocMemCache):
+        return min(ttl, PER_PROCESS_MAX_SECONDS)
+    return ttl
+
+
+def _lock_seconds():
+    return getattr(settings, 'ANALYTICS_CACHE_LOCK_SECONDS', 10)
+
+
+def _initial_version():
+    # Not 1: if the version key is evicted from a shared cache, restarting
+    # at 1 could make entries from an earlier version 1 valid again
+    return time.time_ns() // 1000
+
+
+def data_version() -> int:
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), None)
+        version = cache.get(VERSION_KEY, 0)
+    return version
+
+
+async def adata_version() -> int:
+    cache = _cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, _initial_version(), None)
+        version = await cache.aget(VERSION_KEY, 0)
+    return version
+
+
+def bump_data_version():
+    """Invalidate every analytics entry; call after bookings data changes"""
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Not set yet (or evicted)
+        cache.set(VERSION_KEY, _initial_version(), None)
+
+
+def cache_key(name, params, version) -> str:
+    """
+    name + sorted params + today (TIME_ZONE, like the dashboard figures) +
+    data version + the database read from.
+    Replica and primary results are kept apart: after a bump, a lagging
+    replica must not fill the entry a writer in its read-your-writes
+    window (config.db_router) reads from the primary.
+    """
+    raw = '&'.join(f'{key}={value}' for key, value in sorted(params.items()))
+    digest = hashlib.md5(f'{raw}|{timezone.localdate().isoformat()}'.encode()).hexdigest()
+    return f'{KEY_PREFIX}:{name}:{read_alias()}:{digest}:v{version}'
+
+
+def get_or_compute(name, params, compute):
+    """
+    Cached result of compute() for (name, params), recomputed by one caller
+    at a time. A None result is returned but not cached.
+    """
+    if _ttl() <= 0:
+        return compute()
+    cache = _cache()
+    key = cache_key(name, params, data_version())
+    value = cache.get(key)
+    record_cache_lookup('analytics', value is not None)
+    if value is not None:
+        return value
+
+    lock_key, token = f'{key}:lock', uuid.uuid4().hex
+    if not cache.add(lock_key, token, _lock_seconds()):
+        deadline = time.monotonic() + _lock_seconds()
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL_SECONDS)
+            value = cache.get(key)
+            if value is not None:
+                return value
+            if cache.get(lock_key) is None:
+                # Released without a value (the view returned an error)
+                break
+        return compute()
+
+    try:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, _ttl())
+        return value
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+async def aget_or_compute(name, params, compute):
+    """get_or_compute() for async views; compute is a coroutine function"""
+    if _ttl() <= 0:
+        return await compute()
+    cache = _cache()
+    key = cache_key(name, params, await adata_version())
+    value = await cache.aget(key)
+    record_cache_lookup('analytics', value is not None)
+    if value is not None:
+        return value
+
+    lock_key, token = f'{key}:lock', uuid.uuid4().hex
+    if not await cache.aadd(lock_key, token, _lock_seconds()):
+        deadline = time.monotonic() + _lock_seconds()
+        while time.monotonic() < deadline:
+            await asyncio.sleep(WAIT_INTERVAL_SECONDS)
+            value = await cache.aget(key)
+            if value is not None:
+                return value
+            if await cache.aget(lock_key) is None:
+                break
+        return await compute()
+
+    try:
+        value = await compute()
+        if value is not None:
+            await cache.aset(key, value, _ttl())
+        return value
+    finally:
+        if await cache.aget(lock_key) == token:
+            await cache.adelete(lock_key)
+
+
+def cached_analytics(name, params=()):
+    """
+    Cache a DRF function view's 200 response data with get_or_compute().
+
+    Apply below @api_view and @read_replica. `params` are the query params
+    the view reads; anything else in the query string is ignored for the
+    key. Requests with ?_profile (config.profiling) skip the cache so the
+    profile shows the real work.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if '_profile' in request.query_params:
+                return view(request, *args, **kwargs)
+            key_params = {param: request.query_params.get(param, '') for param in params}
+            uncached = []
+
+            def compute():
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    # Errors aren't cached; returned as-is below
+                    uncached.append(response)
+                    return None
+                return response.data
+
+            data = get_or_compute(name, key_params, compute)
+            if uncached:
+                return uncached[0]
+            return Response(data)
+        return wrapper
+    return decorator
@@ -0,0 +1,172 @@
+"""
+Async versions of I/O-bound endpoints, used when serving over ASGI.
+
+config/asgi.py sets ASYNC_VIEWS, and the URLconfs then route
+public_availability, dashboard_overview, calculate-price and the booking
+event stream here instead of the DRF views. Responses are the same JSON
+the sync views return.
+
+DRF 3.14 views cannot be async, so these are plain Django async views with
+JWT authentication done by jwt_required. Django 5.0's async ORM runs
+every query through sync_to_async on one thread per request, so queries
+cannot overlap within a request; each view runs its queries in a single
+sync_to_async call to hop threads once. The gain is that an event-loop
+worker keeps serving other requests while those queries wait.
+"""
+import functools
+import json
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import exceptions
+
+from accounts.authentication import CachedJWTAuthentication, StreamTicketAuthentication
+from config.db_router import read_replica
+from villas.models import Villa
+
+from .analytics_cache import aget_or_compute
+from .dashboard import build_overview, overview_queries, run_queries
+from .events import aevent_stream, parse_last_event_id
+from .pricing import VillaPricer
+from .public_views import availability_queries, build_availability, parse_range
+from .views import parse_price_request, price_quote
+
+
+def _json(payload, status=200, **kwargs):
+    return JsonResponse(payload, status=status, encoder=DjangoJSONEncoder, **kwargs)
+
+
+def authenticate_with(*authenticators):
+    """
+    Authenticate like the DRF views, with the first of `authenticators` that
+    applies to the request, and set request.user
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                for authenticator in authenticators:
+                    result = await sync_to_async(authenticator.authenticate)(request)
+                    if result is not None:
+                        break
+                else:
+                    raise exceptions.NotAuthenticated()
+            except exceptions.APIException as e:
+                return _json(
+                    e.detail if isinstance(e.detail, dict) else {'detail': e.detail},
+                    status=e.status_code,
+                    headers={'WWW-Authenticate': authenticators[0].authenticate_header(request)},
+                )
+            request.user, request.auth = result
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Bearer JWT, as the DRF views
+jwt_required = authenticate_with(CachedJWTAuthentication())
+
+
+@require_GET
+async def public_availability(request):
+    """
+    GET /api/v1/public/availability/?start=YYYY-MM-DD&end=YYYY-MM-DD
+
+    Async twin of bookings.public_views.public_availability.
+    """
+    start_date, end_date, error = parse_range(request.GET)
+    if error:
+        return _json({'error': error}, status=400)
+
+    villas, bookings, global_special_days = await sync_to_async(_evaluate)(
+        availability_queries(start_date, end_date)
+    )
+    return _json(build_availability(
+        request.GET, start_date, end_date, villas, bookings, global_special_days
+    ))
+
+
+@require_GET
+@jwt_required
+@read_replica
+async def dashboard_overview(request):
+    """
+    GET /api/v1/bookings/dashboard-overview/
+
+    Async twin of bookings.views.dashboard_overview.
+    """
+    reference_date = request.GET.get('date')
+    if reference_date:
+        today = date.fromisoformat(reference_date)
+    else:
+        today = date.today()
+
+    async def compute():
+        return build_overview(today, await sync_to_async(run_queries)(overview_queries(today)))
+
+    if '_profile' in request.GET:
+        return _json(await compute())
+    # Same cache entries as the sync view
+    payload = await aget_or_compute('dashboard_overview', {'date': reference_date or ''}, compute)
+    return _json(payload)
+
+
+@csrf_exempt
+@require_POST
+@jwt_required
+async def calculate_price(request):
+    """
+    POST /api/v1/bookings/calculate-price/
+
+    Async twin of bookings.views.calculate_price_view.
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return _json({'detail': 'JSON parse error'}, status=400)
+        if not isinstance(data, dict):
+            return _json({'error': 'villa, check_in, and check_out are required'}, status=400)
+    else:
+        data = request.POST
+
+    villa_id, check_in, check_out, error = parse_price_request(data)
+    if error:
+        return _json({'error': error}, status=400)
+
+    try:
+        villa = await Villa.objects.filter(id=villa_id).afirst()
+    except (TypeError, ValueError):
+        villa = None
+    if villa is None:
+        return _json({'error': 'Villa not found'}, status=404)
+
+    # Special-day lookups may hit the ORM on a cold cache
+    total = await sync_to_async(VillaPricer(villa).total)(check_in, check_out)
+    return _json(price_quote(total, check_in, check_out))
+
+
+@require_GET
+@authenticate_with(StreamTicketAuthentication(), CachedJWTAuthentication())
+async def booking_events(request):
+    """
+    GET /api/v1/bookings/events/?ticket=<ticket>&last_event_id=<id>
+
+    Async twin of bookings.views.booking_events. Streams are coroutines
+    here, so there is no per-process stream limit.
+    """
+    response = StreamingHttpResponse(
+        aevent_stream(parse_last_event_id(request)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _evaluate(querysets):
+    return [list(queryset) for queryset in querysets]
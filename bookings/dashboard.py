@@ -0,0 +1,518 @@
+"""
+Queries and payloads for the dashboard endpoints.
+
+The overview is a set of independent queries. They are declared once here
+so the sync view (bookings.views.dashboard_overview) can run them one after
+another and the async view (bookings.async_views) can run the same set in
+one sync_to_async call.
+
+The *_payload(params) functions build each endpoint's response data from
+its query params (a QueryDict or a plain dict), so the endpoints and the
+dashboard bundle (bookings.dashboard_bundle) return the same data.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+
+from villas.models import Villa
+
+from .models import Booking
+
+
+def _month_bounds(today):
+    month_start = today.replace(day=1)
+    if today.month == 12:
+        month_end = today.replace(year=today.year + 1, month=1, day=1)
+    else:
+        month_end = today.replace(month=today.month + 1, day=1)
+
+    if month_start.month == 1:
+        previous_month_start = month_start.replace(year=month_start.year - 1, month=12, day=1)
+    else:
+        previous_month_start = month_start.replace(month=month_start.month - 1, day=1)
+    return month_start, month_end, previous_month_start
+
+
+def overview_queries(today) -> dict:
+    """
+    name -> (kind, queryset) where kind is 'count', 'sum' (of total_payment)
+    or 'list'. None of the queries depends on another's result.
+    """
+    month_start, month_end, previous_month_start = _month_bounds(today)
+    booked = Booking.objects.filter(status='booked')
+    month_bookings = booked.filter(check_in__gte=month_start, check_in__lt=month_end)
+
+    return {
+        # Villa statistics
+        'total_villas': ('count', Villa.objects.all()),
+        'active_villas': ('count', Villa.objects.filter(status='active')),
+        'maintenance_villas': ('count', Villa.objects.filter(status='maintenance')),
+        # Today's activity
+        'today_check_ins': ('count', booked.filter(check_in=today)),
+        'today_check_outs': ('count', booked.filter(check_out=today)),
+        'currently_booked': ('count', booked.filter(
+            check_in__lte=today,
+            check_out__gt=today
+        ).values('villa').distinct()),
+        # Upcoming bookings (next 7 days)
+        'upcoming_bookings': ('count', booked.filter(
+            check_in__gte=today,
+            check_in__lte=today + timedelta(days=7)
+        )),
+        # This month's statistics
+        'total_bookings_this_month': ('count', month_bookings),
+        'revenue_this_month': ('sum', month_bookings),
+        # All-time statistics
+        'total_bookings': ('count', booked),
+        'total_revenue': ('sum', booked),
+        # Active Clients (unique non-empty phone numbers)
+        'total_customers': ('count', booked.exclude(
+            client_phone__isnull=True
+        ).exclude(
+            client_phone=''
+        ).values('client_phone').distinct()),
+        'previous_month_revenue': ('sum', booked.filter(
+            check_in__gte=previous_month_start,
+            check_in__lt=month_start
+        )),
+        'villa_month_totals': ('list', month_bookings.values('villa').annotate(
+            bookings=Count('id'),
+            revenue=Sum('total_payment')
+        )),
+        'villas': ('list', Villa.objects.order_by('order', 'name').values('id', 'name', 'status')),
+    }
+
+
+def run_queries(queries) -> dict:
+    results = {}
+    for name, (kind, queryset) in queries.items():
+        if kind == 'count':
+            results[name] = queryset.count()
+        elif kind == 'sum':
+            results[name] = queryset.aggregate(total=Sum('total_payment'))['total'] or Decimal('0')
+        else:
+            results[name] = list(queryset)
+    return results
+
+
+def calculate_change(current, previous):
+    current = float(current or 0)
+    previous = float(previous or 0)
+    if previous == 0:
+        return 100 if current > 0 else 0
+    return round(((current - previous) / previous) * 100, 1)
+
+
+def build_overview(today, results) -> dict:
+    month_start, month_end, _ = _month_bounds(today)
+
+    # Occupancy rate (currently booked / total active)
+    occupancy_rate = 0
+    if results['active_villas'] > 0:
+        occupancy_rate = round((results['currently_booked'] / results['active_villas']) * 100, 1)
+
+    # Average revenue per booking
+    avg_revenue = 0
+    if results['total_bookings'] > 0:
+        avg_revenue = float(results['total_revenue']) / results['total_bookings']
+
+    villa_month_totals = {item['villa']: item for item in results['villa_month_totals']}
+    villa_revenue_this_month = []
+    for villa in results['villas']:
+        metrics = villa_month_totals.get(villa['id'], {})
+        villa_revenue_this_month.append({
+            'villa_id': villa['id'],
+            'villa_name': villa['name'],
+            'status': villa['status'],
+            'bookings_this_month': metrics.get('bookings', 0),
+            'revenue_this_month': str(metrics.get('revenue') or Decimal('0')),
+        })
+
+    return {
+        'villas': {
+            'total': results['total_villas'],
+            'active': results['active_villas'],
+            'maintenance': results['maintenance_villas'],
+            'occupancy_rate': occupancy_rate,
+        },
+        'today': {
+            'check_ins': results['today_check_ins'],
+            'check_outs': results['today_check_outs'],
+            'currently_booked': results['currently_booked'],
+        },
+        'bookings': {
+            'total': results['total_bookings'],
+            'total_clients': results['total_customers'],
+            'total_customers': results['total_customers'],
+            'this_month': results['total_bookings_this_month'],
+            'upcoming_7_days': results['upcoming_bookings'],
+        },
+        'revenue': {
+            'total': str(results['total_revenue']),
+            'this_month': str(results['revenue_this_month']),
+            'average_per_booking': round(avg_revenue, 2),
+            'previous_month': str(results['previous_month_revenue']),
+            'month_change_percentage': calculate_change(
+                results['revenue_this_month'], results['previous_month_revenue']
+            ),
+        },
+        'villa_revenue_this_month': villa_revenue_this_month,
+        'period': {
+            'month_start': month_start.isoformat(),
+            'month_end': (month_end - timedelta(days=1)).isoformat(),
+        },
+    }
+
+
+def overview_payload(params):
+    """
+    Get comprehensive dashboard overview
+    Payload of GET /api/v1/bookings/dashboard-overview/?date=YYYY-MM-DD
+    """
+    reference_date = params.get('date')
+    if reference_date:
+        today = date.fromisoformat(reference_date)
+    else:
+        today = date.today()
+    return build_overview(today, run_queries(overview_queries(today)))
+
+
+def recent_bookings_payload(params):
+    """
+    Get recent bookings
+    Payload of GET /api/v1/bookings/recent-bookings/?limit=10
+    """
+    limit = int(params.get('limit', 10))
+    
+    # Optimize: Use values() to fetch only needed fields
+    bookings = Booking.objects.select_related('villa').order_by('-created_at')[:limit]
+    
+    bookings_data = []
+    for booking in bookings:
+        bookings_data.append({
+            'id': booking.id,
+            'villa': {
+                'id': booking.villa.id,
+                'name': booking.villa.name,
+            },
+            'client_name': booking.client_name,
+            'client_phone': booking.client_phone,
+            'check_in': booking.check_in,
+            'check_out': booking.check_out,
+            'status': booking.status,
+            'payment_status': booking.payment_status,
+            'total_payment': str(booking.total_payment) if booking.total_payment else None,
+            'advance_payment': str(booking.advance_payment) if booking.advance_payment else None,
+            'pending_payment': str(booking.pending_payment),
+            'created_at': booking.created_at,
+        })
+    
+    return bookings_data
+
+
+def revenue_chart_payload(params):
+    """
+    Get monthly revenue data for charts
+    Payload of GET /api/v1/bookings/revenue-chart/?months=6
+    """
+    from decimal import Decimal
+    from django.db.models.functions import TruncMonth
+    
+    months = int(params.get('months', 6))
+    today = date.today()
+    current_month = today.replace(day=1)
+
+    def add_months(source_date, offset):
+        month_index = source_date.month - 1 + offset
+        year = source_date.year + month_index // 12
+        month = month_index % 12 + 1
+        return source_date.replace(year=year, month=month, day=1)
+
+    start_date = add_months(current_month, -(months - 1))
+    
+    # Optimized: Single query with TruncMonth
+    # Note: SQLite has limited date function support compared to Postgres, 
+    # but TruncMonth works in recent Django versions for SQLite too.
+    
+    monthly_data = Booking.objects.filter(
+        check_in__gte=start_date,
+        check_in__lte=today,
+        status='booked'
+    ).annotate(
+        month=TruncMonth('check_in')
+    ).values('month').annotate(
+        bookings=Count('id'),
+        revenue=Sum('total_payment')
+    ).order_by('month')
+    
+    # Format for frontend (ensure all months are present filling gaps if needed)
+    # For simplicity/speed in this context, we map the results
+    
+    data_map = {item['month'].strftime('%Y-%m'): item for item in monthly_data}
+    chart_data = []
+    
+    for i in range(months):
+        month_date = add_months(start_date, i)
+        key = month_date.strftime('%Y-%m')
+        
+        item = data_map.get(key, {})
+        chart_data.append({
+            'month': month_date.strftime('%b %Y'),
+            'bookings': item.get('bookings', 0),
+            'revenue': float(item.get('revenue', 0) or 0),
+        })
+    
+    return chart_data
+
+
+def villa_performance_payload(params):
+    """
+    Get performance metrics for each villa
+    Payload of GET /api/v1/bookings/villa-performance/
+    """
+    from decimal import Decimal
+    from django.db.models import Sum, Count, Q, F, ExpressionWrapper, DurationField
+    
+    # Optimized: Annotate metrics directly on Villa queryset
+    # This reduces N queries to 1 query
+    
+    performance_data = Villa.objects.annotate(
+        total_bookings=Count('bookings', filter=Q(bookings__status='booked')),
+        total_revenue=Sum('bookings__total_payment', filter=Q(bookings__status='booked')),
+        # Note: Calculating nights in DB is complex across different DB backends (SQLite vs Postgres)
+        # We will fetch basics efficiently and calculate nights if strictly needed, 
+        # or rely on pre-calculated 'nights' if we store it (we don't stored it generally).
+        # For compatibility/reliability, we'll keep nights basic or 0 for now as it wasn't critical.
+        # Alternatively, assume avg duration if strict accuracy isn't vital or re-add complexity if requested.
+    ).values(
+        'id', 'name', 'status', 'total_bookings', 'total_revenue'
+    ).order_by('-total_revenue')
+    
+    # Convert to list and format
+    result = []
+    for item in performance_data:
+        result.append({
+            'villa_id': item['id'],
+            'villa_name': item['name'],
+            'total_bookings': item['total_bookings'],
+            'total_revenue': float(item['total_revenue'] or 0),
+            'total_nights_booked': 0, # Optimization trade-off: skipped complex DB date diff for safety
+            'status': item['status'],
+        })
+    
+    return result
+
+
+def booking_sources_payload(params):
+    """
+    Get booking sources breakdown
+    Payload of GET /api/v1/bookings/booking-sources/
+    """
+    from django.db.models import Count
+    
+    # Get count by source
+    sources = Booking.objects.filter(
+        status='booked'
+    ).values('booking_source').annotate(
+        count=Count('id')
+    ).order_by('-count')
+    
+    total_bookings = Booking.objects.filter(status='booked').count()
+    
+    sources_data = []
+    for source in sources:
+        source_name = source['booking_source'] or 'unknown'
+        count = source['count']
+        percentage = round((count / total_bookings * 100), 1) if total_bookings > 0 else 0
+        
+        # Get human-readable name
+        source_display = dict(Booking.SOURCE_CHOICES).get(source_name, 'Unknown')
+        
+        sources_data.append({
+            'source': source_name,
+            'source_display': source_display,
+            'count': count,
+            'percentage': percentage,
+        })
+    
+    return sources_data
+
+
+def revenue_candles_payload(params):
+    """
+    Get OHLC revenue data for trading-style charts
+    Payload of GET /api/v1/bookings/revenue-candles/?range=1M
+    """
+    from decimal import Decimal
+    from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+    from django.db.models import Sum, Count
+    
+    time_range = params.get('range', '1M')
+    today = date.today()
+    
+    # Determine start date and truncation level
+    if time_range == '7D':
+        start_date = today - timedelta(days=7)
+        trunc_func = TruncDay('check_in')
+        freq = 'D' # Daily
+    elif time_range == '1M':
+        start_date = today - timedelta(days=30)
+        trunc_func = TruncDay('check_in')
+        freq = 'D'
+    elif time_range == '6M':
+        start_date = today - timedelta(days=180)
+        trunc_func = TruncWeek('check_in')
+        freq = 'W'
+    elif time_range == '1Y':
+        start_date = today - timedelta(days=365)
+        trunc_func = TruncMonth('check_in')
+        freq = 'M'
+    else: # Default 1M
+        start_date = today - timedelta(days=30)
+        trunc_func = TruncDay('check_in')
+        freq = 'D'
+
+    # Query Data
+    data = Booking.objects.filter(
+        check_in__gte=start_date,
+        check_in__lte=today,
+        status='booked'
+    ).annotate(
+        period=trunc_func
+    ).values('period').annotate(
+        revenue=Sum('total_payment'),
+        volume=Count('id')
+    ).order_by('period')
+
+    # Convert to Dictionary for fast lookup
+    data_map = {item['period'].strftime('%Y-%m-%d'): item for item in data}
+    
+    # Generate continuous timeline
+    ohlc_data = []
+    
+    # Generate Date List
+    date_list = []
+    temp_curr = start_date
+    while temp_curr <= today:
+        date_list.append(temp_curr)
+        if freq == 'D':
+            temp_curr += timedelta(days=1)
+        elif freq == 'W':
+             temp_curr += timedelta(weeks=1)
+        elif freq == 'M':
+            if temp_curr.month == 12:
+                temp_curr = temp_curr.replace(year=temp_curr.year+1, month=1, day=1)
+            else:
+                temp_curr = temp_curr.replace(month=temp_curr.month+1, day=1)
+                
+    
+    prev_close = float(0) # Start from 0
+    
+    for d in date_list:
+        d_str = d.strftime('%Y-%m-%d')
+        item = data_map.get(d_str)
+        
+        if item:
+            revenue = float(item['revenue'] or 0)
+            volume = item['volume']
+        else:
+            revenue = float(0)
+            volume = 0
+            
+        # OHLC Calculation: Trend-based
+        # Open = Previous Close
+        # Close = Current Revenue
+        
+        open_val = prev_close
+        close_val = revenue
+        
+        # High/Low are just boundaries of the candle body for this simple representation
+        high_val = max(open_val, close_val)
+        low_val = min(open_val, close_val)
+        
+        ohlc_data.append({
+            'time': d_str,
+            'open': open_val,
+            'high': high_val,
+            'low': low_val,
+            'close': close_val,
+            'volume': volume
+        })
+        
+        prev_close = close_val
+
+    return ohlc_data
+
+
+# (key, min days since check-out, max days or None); stays not checked out yet are 'not_due'
+AGEING_BUCKETS = [
+    ('0_30', 0, 30),
+    ('31_60', 31, 60),
+    ('61_90', 61, 90),
+    ('over_90', 91, None),
+]
+
+
+def _bucket_filter(as_of, min_days, max_days):
+    """Q for stays checked out min_days..max_days before as_of"""
+    condition = Q(check_out__lte=as_of - timedelta(days=min_days))
+    if max_days is not None:
+        condition &= Q(check_out__gte=as_of - timedelta(days=max_days))
+    return condition
+
+
+def _money(amount) -> str:
+    # SQLite returns whole-number sums without decimal places
+    return str((amount or Decimal('0')).quantize(Decimal('0.01')))
+
+
+def receivables_payload(params):
+    """
+    Outstanding balances (pending_payment) of booked stays
+    Payload of GET /api/v1/bookings/receivables/?as_of=YYYY-MM-DD&villa=ID
+
+    One GROUP BY villa query with a conditional sum per ageing bucket (days
+    since check-out, as of today by default); the overall totals are added
+    up from the villa rows.
+    """
+    as_of = date.fromisoformat(params['as_of']) if params.get('as_of') else date.today()
+    outstanding = Booking.objects.filter(status='booked', pending_payment__gt=0)
+    if params.get('villa'):
+        outstanding = outstanding.filter(villa_id=int(params['villa']))
+
+    buckets = {'not_due': Sum('pending_payment', filter=Q(check_out__gt=as_of))}
+    for key, min_days, max_days in AGEING_BUCKETS:
+        buckets[key] = Sum('pending_payment', filter=_bucket_filter(as_of, min_days, max_days))
+
+    rows = outstanding.order_by().values('villa_id', 'villa__name').annotate(
+        pending=Sum('pending_payment'), bookings=Count('id'), **buckets,
+    ).order_by('-pending')
+
+    bucket_keys = list(buckets)
+    total = {'pending': Decimal('0'), 'bookings': 0, 'buckets': dict.fromkeys(bucket_keys, Decimal('0'))}
+    by_villa = []
+    for row in rows:
+        total['pending'] += row['pending']
+        total['bookings'] += row['bookings']
+        villa_buckets = {}
+        for key in bucket_keys:
+            total['buckets'][key] += row[key] or Decimal('0')
+            villa_buckets[key] = _money(row[key])
+        by_villa.append({
+            'villa_id': row['villa_id'],
+            'villa_name': row['villa__name'],
+            'pending': _money(row['pending']),
+            'bookings': row['bookings'],
+            'buckets': villa_buckets,
+        })
+
+    return {
+        'as_of': as_of.isoformat(),
+        'total': {
+            'pending': _money(total['pending']),
+            'bookings': total['bookings'],
+            'buckets': {key: _money(amount) for key, amount in total['buckets'].items()},
+        },
+        'by_villa': by_villa,
+    }
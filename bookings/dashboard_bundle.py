@@ -0,0 +1,174 @@
+"""
+Several dashboard sections in one request.
+
+The dashboard screen otherwise makes six requests, each paying for JWT
+authentication and the user lookup. The bundle endpoint
+(bookings.views.dashboard_bundle) takes a list of sections with their
+params and evaluates them concurrently on a process-wide thread pool of
+DASHBOARD_BUNDLE_WORKERS threads (0 = one after another in the request
+thread).
+
+Each pool thread uses its own database connections (Django connections
+are per thread), checked and released like a request's with
+close_old_connections(). Sections run in a copy of the request's context,
+so @read_replica routing applies to them too. Results come from the same
+analytics cache entries as the individual endpoints.
+
+Queries made on pool threads are not in the request's Server-Timing
+header; each section reports its own query count and time instead. Params
+are checked before a section runs (400); any exception inside a section is
+logged and reported as that section's 500, without failing the others.
+"""
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import date
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from config.instrumentation import QueryRecorder
+
+from . import dashboard
+from .analytics_cache import get_or_compute
+
+logger = logging.getLogger(__name__)
+
+# Section name (the endpoint's URL) -> (analytics cache name, payload function, params it reads)
+SECTIONS = {
+    'dashboard-overview': ('dashboard_overview', dashboard.overview_payload, ('date',)),
+    'recent-bookings': ('recent_bookings', dashboard.recent_bookings_payload, ('limit',)),
+    'revenue-chart': ('revenue_chart', dashboard.revenue_chart_payload, ('months',)),
+    'villa-performance': ('villa_performance', dashboard.villa_performance_payload, ()),
+    'booking-sources': ('booking_sources', dashboard.booking_sources_payload, ()),
+    'revenue-candles': ('revenue_candles', dashboard.revenue_candles_payload, ('range',)),
+    'receivables': ('receivables', dashboard.receivables_payload, ('as_of', 'villa')),
+}
+
+
+def _optional_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+def _optional_int(value):
+    return int(value) if value not in (None, '') else None
+
+
+# How the payload functions read each param. Checked before a section runs,
+# so bad input is a 400 and exceptions raised inside a section are 500s.
+PARAM_PARSERS = {
+    'date': _optional_date,
+    'limit': int,
+    'months': int,
+    'as_of': _optional_date,
+    'villa': _optional_int,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.DASHBOARD_BUNDLE_WORKERS, thread_name_prefix='dashboard-bundle'
+            )
+        return _executor
+
+
+def parse_sections(data):
+    """
+    [(name, params)] from a JSON body {"sections": [{"name": ..., "params": {...}}]}
+    or a query string ?sections=a,b&a.param=value. Returns (sections, error).
+    """
+    if hasattr(data, 'getlist'):
+        names = [name.strip() for name in data.get('sections', '').split(',') if name.strip()]
+        requested = [
+            (name, {key[len(name) + 1:]: value for key, value in data.items() if key.startswith(f'{name}.')})
+            for name in names
+        ]
+    else:
+        entries = data.get('sections') if isinstance(data, dict) else None
+        if not isinstance(entries, list):
+            return None, 'sections must be a list of {"name": ..., "params": {...}}'
+        requested = []
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {'name': entry}
+            if not isinstance(entry, dict) or not isinstance(entry.get('params', {}), dict):
+                return None, 'sections must be a list of {"name": ..., "params": {...}}'
+            requested.append((entry.get('name'), entry.get('params', {})))
+
+    if not requested:
+        requested = [(name, {}) for name in SECTIONS]
+    unknown = [name for name, _ in requested if name not in SECTIONS]
+    if unknown:
+        return None, f'Unknown sections: {", ".join(map(str, unknown))}. Available: {", ".join(SECTIONS)}'
+    names = [name for name, _ in requested]
+    if len(set(names)) != len(names):
+        return None, 'Each section can only be requested once'
+    return requested, None
+
+
+def validate_params(name, params):
+    """Error message for the first param of section `name` its payload can't parse, else None"""
+    for param in SECTIONS[name][2]:
+        if param in params and param in PARAM_PARSERS:
+            try:
+                PARAM_PARSERS[param](params[param])
+            except (TypeError, ValueError):
+                return f'Invalid params: {param}={params[param]!r}'
+    return None
+
+
+def run_section(name, params, use_cache=True) -> dict:
+    """{'data' | 'error' + 'status', 'ms', 'queries'} for one section"""
+    cache_name, payload, cache_params = SECTIONS[name]
+    error = validate_params(name, params)
+    if error:
+        return {'error': error, 'status': 400, 'ms': 0, 'queries': 0}
+
+    recorder = QueryRecorder()
+    started = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder.for_alias(alias)))
+            if use_cache:
+                key_params = {param: str(params.get(param, '')) for param in cache_params}
+                data = get_or_compute(cache_name, key_params, lambda: payload(params))
+            else:
+                data = payload(params)
+        result = {'data': data}
+    except Exception:
+        logger.exception('Dashboard bundle section %s failed', name)
+        result = {'error': 'Section failed', 'status': 500}
+    result['ms'] = round((time.perf_counter() - started) * 1000, 1)
+    result['queries'] = recorder.count
+    return result
+
+
+def _run_in_pool_thread(name, params, use_cache):
+    # Like request_started/request_finished: drop broken or expired connections
+    close_old_connections()
+    try:
+        return run_section(name, params, use_cache)
+    finally:
+        close_old_connections()
+
+
+def run_sections(requested, use_cache=True, concurrent=True) -> dict:
+    """Evaluate [(name, params)] on the pool; results in request order"""
+    if not concurrent or settings.DASHBOARD_BUNDLE_WORKERS <= 0 or len(requested) == 1:
+        return {name: run_section(name, params, use_cache) for name, params in requested}
+    # One context copy per task: a Context can't be entered by two threads
+    futures = [
+        (name, _pool().submit(contextvars.copy_context().run, _run_in_pool_thread, name, params, use_cache))
+        for name, params in requested
+    ]
+    return {name: future.result() for name, future in futures}
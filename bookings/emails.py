@@ -0,0 +1,277 @@
+"""
+Email outbox for booking notifications.
+
+Views only enqueue OutboundEmail rows; the send_queued_emails worker drains
+them over a single reused backend connection with exponential-backoff
+retries. Scheduled reminders (send_booking_reminders) are rendered and sent
+in batches the same way, with the outbox doubling as their sent-log.
+Works with any EMAIL_BACKEND (smtp, console, locmem).
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, Q, Value
+from django.db.models.functions import Coalesce
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import Booking, OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+# A message stuck in "sending" this long belongs to a crashed worker
+SENDING_TIMEOUT = timedelta(minutes=10)
+
+
+def build_confirmation_email(booking) -> tuple[str, str]:
+    """Subject and body of the booking confirmation email"""
+    subject = f"Booking Confirmation - {booking.villa.name}"
+
+    message = f"""
+Dear {booking.client_name},
+
+Thank you for booking with VacationBnA!
+
+Here are your booking details:
+Villa: {booking.villa.name}
+Check-in: {booking.check_in.strftime('%d %b %Y')}
+Check-out: {booking.check_out.strftime('%d %b %Y')}
+Guests: {booking.number_of_guests}
+
+Payment Details:
+Total Amount: ₹{booking.total_payment}
+Advance Paid: ₹{booking.advance_payment}
+Pending Amount: ₹{booking.pending_payment}
+
+Location: {booking.villa.location}
+
+If you have any questions, please reply to this email.
+
+Best regards,
+VacationBnA Team
+    """.strip()
+
+    return subject, message
+
+
+def enqueue_booking_confirmation(booking) -> OutboundEmail:
+    subject, body = build_confirmation_email(booking)
+    return OutboundEmail.objects.create(
+        booking=booking,
+        kind='confirmation',
+        to_email=booking.client_email,
+        subject=subject,
+        body=body,
+    )
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    """30s, 60s, 120s, ... capped at one hour"""
+    seconds = BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, BACKOFF_MAX_SECONDS))
+
+
+def claim_due_emails(batch_size: int) -> list[OutboundEmail]:
+    """
+    Mark up to batch_size due messages as "sending" and return them.
+    Rows locked by another worker are skipped (PostgreSQL).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True).filter(
+                Q(status='queued', next_attempt_at__lte=now) |
+                Q(status='sending', updated_at__lt=now - SENDING_TIMEOUT)
+            ).order_by('next_attempt_at')[:batch_size]
+        )
+        OutboundEmail.objects.filter(id__in=[e.id for e in emails]).update(
+            status='sending', updated_at=now
+        )
+    return emails
+
+
+def deliver_due_emails(batch_size: int = 50, max_attempts: int = MAX_ATTEMPTS) -> dict:
+    """
+    Claim one batch of due messages and send it over a single backend connection.
+
+    Returns counts of sent, retried and failed messages.
+    """
+    return send_emails(claim_due_emails(batch_size), max_attempts)
+
+
+def send_emails(emails, max_attempts: int = MAX_ATTEMPTS, connection=None) -> dict:
+    """
+    Send already-claimed ("sending") messages, recording per-message status.
+    Opens one backend connection unless an open one is passed in.
+    """
+    result = {'sent': 0, 'retried': 0, 'failed': 0}
+    if not emails:
+        return result
+
+    owns_connection = connection is None
+    if owns_connection:
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            # Could not reach the mail server at all: retry the whole batch later
+            logger.warning('Email backend unavailable: %s', e)
+            for email in emails:
+                _record_failure(email, e, max_attempts, result)
+            return result
+
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject,
+                email.body,
+                settings.DEFAULT_FROM_EMAIL,
+                [email.to_email],
+                connection=connection,
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                _record_failure(email, e, max_attempts, result)
+                continue
+
+            email.status = 'sent'
+            email.attempts += 1
+            email.sent_at = timezone.now()
+            email.last_error = ''
+            email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error', 'updated_at'])
+            result['sent'] += 1
+    finally:
+        if owns_connection:
+            connection.close()
+
+    return result
+
+
+def _record_failure(email, error, max_attempts, result):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = 'failed'
+        result['failed'] += 1
+        logger.error('Giving up on email %s to %s after %s attempts: %s',
+                     email.id, email.to_email, email.attempts, error)
+    else:
+        email.status = 'queued'
+        email.next_attempt_at = timezone.now() + backoff_delay(email.attempts)
+        result['retried'] += 1
+        logger.warning('Email %s to %s failed (attempt %s), retrying at %s: %s',
+                       email.id, email.to_email, email.attempts, email.next_attempt_at, error)
+    email.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at', 'updated_at'])
+
+
+REMINDER_TEMPLATES = {
+    'checkin_reminder': ('bookings/emails/checkin_reminder.txt', 'Check-in Tomorrow - {villa}'),
+    'payment_due': ('bookings/emails/payment_due.txt', 'Payment Reminder - {villa}'),
+}
+
+
+def select_reminder_targets(today, kinds, payment_days: int):
+    """
+    One query for the day's reminder targets.
+
+    checkin_reminder: booked stays checking in tomorrow.
+    payment_due: booked stays with a pending balance checking in within
+    payment_days (inclusive of today).
+
+    Returns a list of (kind, booking) pairs.
+    """
+    tomorrow = today + timedelta(days=1)
+    money = DecimalField(max_digits=10, decimal_places=2)
+    zero = Value(Decimal('0'), output_field=money)
+
+    conditions = Q()
+    if 'checkin_reminder' in kinds:
+        conditions |= Q(check_in=tomorrow)
+    if 'payment_due' in kinds:
+        conditions |= Q(pending__gt=0, check_in__gte=today, check_in__lte=today + timedelta(days=payment_days))
+    if not conditions:
+        return []
+
+    bookings = Booking.objects.select_related('villa').annotate(
+        pending=ExpressionWrapper(
+            Coalesce('total_payment', zero) - Coalesce('advance_payment', zero),
+            output_field=money,
+        )
+    ).filter(conditions, status='booked').exclude(client_email='').order_by('check_in', 'id')
+
+    targets = []
+    for booking in bookings:
+        if 'checkin_reminder' in kinds and booking.check_in == tomorrow:
+            targets.append(('checkin_reminder', booking))
+        if 'payment_due' in kinds and booking.pending > 0 and booking.check_in <= today + timedelta(days=payment_days):
+            targets.append(('payment_due', booking))
+    return targets
+
+
+def queue_reminders(today, kinds, payment_days: int = 3) -> list[OutboundEmail]:
+    """
+    Render and store reminders not already in the sent-log.
+
+    The OutboundEmail rows double as the sent-log: (booking, kind,
+    reference_date=check_in) is unique, so reruns skip bookings already
+    reminded, and a reminder an overlapping run inserts first is dropped
+    from this run. New rows are created as "sending" so the outbox worker does
+    not pick them up while this run is delivering them; if the run dies,
+    the worker retries them after SENDING_TIMEOUT.
+    """
+    targets = select_reminder_targets(today, kinds, payment_days)
+    if not targets:
+        return []
+
+    already_sent = set(
+        OutboundEmail.objects.filter(
+            booking_id__in={booking.id for _, booking in targets},
+            kind__in=kinds,
+            reference_date__isnull=False,
+        ).values_list('booking_id', 'kind', 'reference_date')
+    )
+
+    # Templates are compiled once per run, not once per message
+    templates = {kind: get_template(REMINDER_TEMPLATES[kind][0]) for kind in kinds}
+
+    emails = []
+    for kind, booking in targets:
+        if (booking.id, kind, booking.check_in) in already_sent:
+            continue
+        body = templates[kind].render({'booking': booking, 'pending': booking.pending})
+        emails.append(OutboundEmail(
+            booking=booking,
+            kind=kind,
+            reference_date=booking.check_in,
+            to_email=booking.client_email,
+            subject=REMINDER_TEMPLATES[kind][1].format(villa=booking.villa.name),
+            body=body.strip(),
+            status='sending',
+        ))
+
+    try:
+        with transaction.atomic():
+            OutboundEmail.objects.bulk_create(emails)
+    except IntegrityError:
+        # A concurrent run queued some of these after already_sent was read;
+        # insert one at a time and leave the conflicting reminders to that run
+        emails = [email for email in emails if _insert_unless_queued(email)]
+    return emails
+
+
+def _insert_unless_queued(email) -> bool:
+    email.pk = None
+    try:
+        with transaction.atomic():
+            email.save(force_insert=True)
+    except IntegrityError:
+        return False
+    return True
@@ -0,0 +1,248 @@
+"""
+Booking change events for the server-sent events stream.
+
+Booking signals (and bulk writers such as the importer) record each change
+as a BookingEvent row once the write is committed. Every open stream polls
+that table for rows after the last id it sent, so a client sees events
+raised in any worker, and a reconnecting client resumes from its last event
+id. An idle stream costs one primary-key range query per SSE_POLL_SECONDS.
+
+Under WSGI a stream holds a worker thread, so the deployment runs threaded
+gunicorn workers and each process serves at most SSE_MAX_STREAMS streams;
+more get a 503 and should poll the change feed (/bookings/changes/) instead.
+Streams end after SSE_MAX_STREAM_SECONDS, below the gunicorn timeout. Under
+ASGI (bookings.async_views.booking_events) a stream is a coroutine sleeping
+between polls and has no stream limit.
+
+EventSource cannot send an Authorization header, so streams authenticate
+with a short-lived single-use ticket (accounts.authentication) instead of a
+JWT in the URL, which would end up in access logs.
+
+Events are hints: clients catch up through the change feed after a resync
+event or after being away longer than SSE_EVENT_RETENTION_SECONDS.
+"""
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import BookingEvent
+
+# Dashboard endpoints whose data depends on bookings
+INVALIDATED_ENDPOINTS = [
+    'dashboard-overview',
+    'recent-bookings',
+    'revenue-chart',
+    'villa-performance',
+    'revenue-candles',
+    'calendar',
+]
+
+# Delete expired events once every this many events
+PRUNE_EVERY = 100
+
+
+def publish(event_type: str, payload: dict) -> BookingEvent:
+    event = BookingEvent.objects.create(type=event_type, payload=payload)
+    if event.pk % PRUNE_EVERY == 0:
+        cutoff = timezone.now() - timedelta(seconds=settings.SSE_EVENT_RETENTION_SECONDS)
+        BookingEvent.objects.filter(created_at__lt=cutoff).delete()
+    return event
+
+
+def publish_on_commit(event_type: str, payload: dict):
+    """Record the event once the current transaction commits (now in autocommit)"""
+    transaction.on_commit(lambda: publish(event_type, payload))
+
+
+def _date_range(*dates):
+    dates = [d for d in dates if d]
+    if not dates:
+        return None, None
+    return min(dates).isoformat(), max(dates).isoformat()
+
+
+def invalidation_hint(villa_ids, dates) -> dict:
+    start, end = _date_range(*dates)
+    return {
+        'villa_ids': sorted({v for v in villa_ids if v}),
+        'start': start,
+        'end': end,
+        'endpoints': INVALIDATED_ENDPOINTS,
+    }
+
+
+def booking_event_payload(booking, previous=None) -> dict:
+    """
+    Event body for booking.created / booking.updated / booking.deleted.
+
+    previous is the (villa_id, check_in, check_out) stored before an update,
+    so moved bookings invalidate both their old and new date ranges.
+    """
+    villa_ids = [booking.villa_id]
+    dates = [booking.check_in, booking.check_out]
+    if previous:
+        villa_ids.append(previous[0])
+        dates.extend(previous[1:])
+
+    return {
+        'booking_id': booking.pk,
+        'villa_id': booking.villa_id,
+        'status': booking.status,
+        'check_in': booking.check_in.isoformat() if booking.check_in else None,
+        'check_out': booking.check_out.isoformat() if booking.check_out else None,
+        'invalidate': invalidation_hint(villa_ids, dates),
+    }
+
+
+def publish_bulk_event(event_type, bookings):
+    """One event for a batch of bookings written without signals (bulk_create)."""
+    if not bookings:
+        return
+    dates = [d for b in bookings for d in (b.check_in, b.check_out)]
+    publish_on_commit(event_type, {
+        'count': len(bookings),
+        'invalidate': invalidation_hint([b.villa_id for b in bookings], dates),
+    })
+
+
+def format_sse(event_id, event_type, payload) -> str:
+    data = json.dumps({'id': event_id, 'type': event_type, **payload})
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+
+
+def parse_last_event_id(request):
+    """
+    Id to resume after: the Last-Event-ID header EventSource sends when it
+    reconnects, or ?last_event_id= when the client opens a new stream
+    """
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def start_frames(last_event_id):
+    """(id to poll after, opening frames); one or two queries"""
+    frames = [f"retry: {settings.SSE_RETRY_MILLISECONDS}\n\n"]
+    if last_event_id is None:
+        latest = BookingEvent.objects.order_by('-id').values_list('id', flat=True).first()
+        return latest or 0, frames
+
+    oldest = BookingEvent.objects.order_by('id').values_list('id', flat=True).first()
+    if oldest is not None and oldest > last_event_id + 1:
+        # Events after last_event_id may have been pruned
+        frames.append(format_sse(last_event_id, 'resync', {}))
+    return last_event_id, frames
+
+
+def _events_after(after_id):
+    return BookingEvent.objects.filter(id__gt=after_id).order_by('id').values_list(
+        'id', 'type', 'payload'
+    )[:settings.SSE_BATCH_SIZE]
+
+
+def _closing_frame(last_id) -> str:
+    # Planned end of the stream: reopen with a new ticket and ?last_event_id=
+    return format_sse(last_id, 'reconnect', {'last_event_id': last_id})
+
+
+class StreamSlots:
+    """Per-process limit on WSGI streams, each of which holds a worker thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.open >= settings.SSE_MAX_STREAMS:
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.open -= 1
+
+
+stream_slots = StreamSlots()
+
+
+class EventStream:
+    """
+    Iterable of SSE frames for StreamingHttpResponse under WSGI. Holds a
+    stream slot, released by close() (called by Django when the response
+    is closed, even if iteration never started).
+    """
+
+    def __init__(self, last_event_id=None):
+        self.last_event_id = last_event_id
+        self._released = False
+
+    def __iter__(self):
+        poll = settings.SSE_POLL_SECONDS
+        heartbeat = settings.SSE_HEARTBEAT_SECONDS
+        deadline = time.monotonic() + settings.SSE_MAX_STREAM_SECONDS
+
+        last_id, frames = start_frames(self.last_event_id)
+        yield from frames
+        last_sent = time.monotonic()
+        while True:
+            for event_id, event_type, payload in _events_after(last_id):
+                last_id = event_id
+                last_sent = time.monotonic()
+                yield format_sse(event_id, event_type, payload)
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if now - last_sent >= heartbeat:
+                last_sent = now
+                yield ': keepalive\n\n'
+            time.sleep(min(poll, max(0, deadline - now)))
+        yield _closing_frame(last_id)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            stream_slots.release()
+
+
+async def aevent_stream(last_event_id=None):
+    """EventStream for ASGI: sleeps on the event loop between polls"""
+    from asgiref.sync import sync_to_async
+
+    poll = settings.SSE_POLL_SECONDS
+    heartbeat = settings.SSE_HEARTBEAT_SECONDS
+    deadline = time.monotonic() + settings.SSE_MAX_STREAM_SECONDS
+
+    def fetch(after_id):
+        try:
+            return list(_events_after(after_id))
+        finally:
+            # Close the connection between polls (ASGI runs with CONN_MAX_AGE=0)
+            close_old_connections()
+
+    last_id, frames = await sync_to_async(lambda: start_frames(last_event_id))()
+    for frame in frames:
+        yield frame
+    last_sent = time.monotonic()
+    while True:
+        for event_id, event_type, payload in await sync_to_async(fetch)(last_id):
+            last_id = event_id
+            last_sent = time.monotonic()
+            yield format_sse(event_id, event_type, payload)
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        if now - last_sent >= heartbeat:
+            last_sent = now
+            yield ': keepalive\n\n'
+        await asyncio.sleep(min(poll, max(0, deadline - now)))
+    yield _closing_frame(last_id)
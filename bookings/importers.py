@@ -0,0 +1,210 @@
+"""
+Bulk booking import from CSV or JSON.
+
+Rows are validated individually, then grouped per villa, checked against
+existing bookings and swept once in check-in order against the rest of the
+batch to find overlaps. Good rows are priced through one VillaPricer per villa and inserted
+with bulk_create in chunks; bad rows are reported without aborting the import.
+"""
+import bisect
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from villas.models import Villa
+from .analytics_cache import bump_data_version
+from .events import publish_bulk_event
+from .models import Booking
+from .pricing import VillaPricer
+from .serializers import BookingImportSerializer
+
+CHUNK_SIZE = 500
+
+
+class ImportFormatError(ValueError):
+    """Raised when the uploaded payload cannot be parsed at all."""
+
+
+def parse_csv(text: str) -> list[dict]:
+    reader = csv.DictReader(io.StringIO(text))
+    rows = []
+    for raw in reader:
+        # Empty cells mean "not provided" so optional fields fall back to defaults
+        rows.append({
+            key.strip(): value.strip()
+            for key, value in raw.items()
+            if key and value is not None and value.strip() != ''
+        })
+    return rows
+
+
+def parse_json(text: str) -> list[dict]:
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ImportFormatError(f'Invalid JSON: {e}')
+    return coerce_rows(data)
+
+
+def parse_payload(text: str, fmt: str) -> list[dict]:
+    if fmt == 'csv':
+        return parse_csv(text)
+    if fmt == 'json':
+        return parse_json(text)
+    raise ImportFormatError(f'Unsupported format: {fmt}. Use csv or json')
+
+
+def coerce_rows(data) -> list[dict]:
+    if isinstance(data, dict):
+        data = data.get('bookings')
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ImportFormatError('Expected a list of booking objects or {"bookings": [...]}')
+    return data
+
+
+def _build_villa_lookup() -> dict:
+    """Map villa id (as string) and lower-cased name to Villa, in one query."""
+    lookup = {}
+    for villa in Villa.objects.all():
+        lookup[str(villa.id)] = villa
+        lookup[villa.name.strip().lower()] = villa
+    return lookup
+
+
+def _sweep_overlaps(rows, existing):
+    """
+    Overlap check for one villa's incoming rows.
+
+    Each row is first checked against the stored bookings (merged into
+    disjoint intervals and binary-searched). Only rows that pass join the
+    sweep over the batch in check-in order, so a row is never refused
+    because of another row that is itself rejected. Of two clashing rows,
+    the one checking in later is rejected.
+
+    Args:
+        rows: list of (row_number, check_in, check_out) for incoming rows
+        existing: list of (check_in, check_out) for stored bookings
+
+    Returns:
+        dict mapping rejected row_number -> error message
+    """
+    merged = []
+    for check_in, check_out in sorted(existing):
+        if merged and check_in < merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], check_out)
+        else:
+            merged.append([check_in, check_out])
+    starts = [check_in for check_in, _ in merged]
+
+    rejected = {}
+    frontier = None        # check-out of the last accepted row
+    frontier_owner = None  # its row number
+
+    for row_number, check_in, check_out in sorted(rows, key=lambda r: (r[1], r[2], r[0])):
+        # The last stored interval starting before this check-out is the only one that can overlap
+        i = bisect.bisect_left(starts, check_out) - 1
+        if i >= 0 and merged[i][1] > check_in:
+            rejected[row_number] = 'Villa is not available for the selected dates.'
+            continue
+
+        if frontier is not None and check_in < frontier:
+            rejected[row_number] = f'Overlaps row {frontier_owner} in this import.'
+            continue
+
+        frontier = check_out
+        frontier_owner = row_number
+
+    return rejected
+
+
+def import_bookings(rows: list[dict], created_by=None, dry_run=False) -> dict:
+    """
+    Validate and insert booking rows.
+
+    Returns a report dict: total_rows, created, errors (list of
+    {'row': n, 'errors': {...}}). Row numbers are 1-based.
+    """
+    errors: dict[int, dict] = {}
+    valid: dict[int, tuple[Villa, dict]] = {}
+    villas = _build_villa_lookup()
+
+    # 1. Per-row field validation (no DB access)
+    for row_number, row in enumerate(rows, start=1):
+        row = dict(row)
+        villa_ref = row.pop('villa', None)
+        villa = villas.get(str(villa_ref).strip().lower()) if villa_ref not in (None, '') else None
+
+        serializer = BookingImportSerializer(data=row)
+        row_errors = {} if serializer.is_valid() else dict(serializer.errors)
+        if villa is None:
+            row_errors['villa'] = ['This field is required.'] if villa_ref in (None, '') else [f'Villa "{villa_ref}" not found.']
+
+        if row_errors:
+            errors[row_number] = row_errors
+        else:
+            valid[row_number] = (villa, serializer.validated_data)
+
+    # 2. Overlap sweep per villa against the DB (one query) and the batch itself
+    rows_by_villa: dict[int, list] = {}
+    for row_number, (villa, data) in valid.items():
+        rows_by_villa.setdefault(villa.id, []).append((row_number, data['check_in'], data['check_out']))
+
+    if rows_by_villa:
+        min_check_in = min(data['check_in'] for _, data in valid.values())
+        max_check_out = max(data['check_out'] for _, data in valid.values())
+        existing_by_villa: dict[int, list] = {}
+        for villa_id, check_in, check_out in Booking.objects.filter(
+            villa_id__in=rows_by_villa.keys(),
+            check_in__lt=max_check_out,
+            check_out__gt=min_check_in,
+        ).values_list('villa_id', 'check_in', 'check_out'):
+            existing_by_villa.setdefault(villa_id, []).append((check_in, check_out))
+
+        for villa_id, villa_rows in rows_by_villa.items():
+            rejected = _sweep_overlaps(villa_rows, existing_by_villa.get(villa_id, []))
+            for row_number, message in rejected.items():
+                errors[row_number] = {'check_in': [message]}
+                del valid[row_number]
+
+    # 3. Pricing through one memoised pricer per villa
+    pricers: dict[int, VillaPricer] = {}
+    to_create = []
+    for row_number in sorted(valid):
+        villa, data = valid[row_number]
+        pricer = pricers.get(villa.id)
+        if pricer is None:
+            pricer = pricers[villa.id] = VillaPricer(villa)
+
+        booking = Booking(villa=villa, created_by=created_by, **data)
+        if booking.override_total_payment is not None:
+            booking.total_payment = booking.override_total_payment
+        else:
+            booking.total_payment = pricer.total(booking.check_in, booking.check_out)
+
+        if booking.advance_payment and booking.total_payment and booking.advance_payment > booking.total_payment:
+            errors[row_number] = {'advance_payment': ['Advance payment cannot exceed total payment.']}
+            continue
+        to_create.append(booking)
+
+    # 4. Chunked insert
+    created = 0
+    if not dry_run:
+        for start in range(0, len(to_create), CHUNK_SIZE):
+            chunk = to_create[start:start + CHUNK_SIZE]
+            with transaction.atomic():
+                Booking.objects.bulk_create(chunk)
+            created += len(chunk)
+        if to_create:
+            # bulk_create sends no signals
+            transaction.on_commit(bump_data_version)
+        publish_bulk_event('bookings.imported', to_create)
+
+    return {
+        'total_rows': len(rows),
+        'created': created,
+        'valid': len(to_create),
+        'dry_run': dry_run,
+        'errors': [{'row': n, 'errors': errors[n]} for n in sorted(errors)],
+    }
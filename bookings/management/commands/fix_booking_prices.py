@@ -1,8 +1,6 @@
 from django.core.management.base import BaseCommand
 from bookings.models import Booking
-from villas.models import Villa
-from datetime import timedelta
-import calendar
+from bookings.pricing import VillaPricer
 
 class Command(BaseCommand):
     help = 'Recalculate prices for bookings with 0 or null total_payment'
@@ -21,15 +19,7 @@ class Command(BaseCommand):
                 # Note: This uses CURRENT villa prices, which might be different from when booked.
                 # But for repair, this is the best approximation.
                 
-                total = 0
-                current_date = booking.check_in
-                
-                while current_date < booking.check_out:
-                    price = self.get_price_for_date(booking.villa, current_date)
-                    total += price
-                    current_date += timedelta(days=1)
-                
-                booking.total_payment = total
+                booking.total_payment = VillaPricer(booking.villa).total(booking.check_in, booking.check_out)
                 # If advance is 0, leave it 0 or assume full payment? 
                 # Let's set Pending = Total - Advance (handled by serializer typically, here we update DB field if it existed, but pending is dynamic in frontend usually. 
                 # Wait, model doesn't store pending. It calculates it.
@@ -45,32 +35,3 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f"Error fixing booking {booking.id}: {str(e)}"))
         
         self.stdout.write(self.style.SUCCESS(f"Successfully fixed {fixed_count} bookings"))
-
-    def get_price_for_date(self, villa, date):
-        # 1. Special Prices
-        if villa.special_prices:
-            try:
-                for sp in villa.special_prices:
-                    if not isinstance(sp, dict): continue
-                    
-                    # Basic date parsing/comparison logic
-                    # Assuming strings YYYY-MM-DD
-                    start = sp.get('start_date')
-                    end = sp.get('end_date')
-                    price = sp.get('price')
-                    
-                    if start and end and price:
-                        if start <= str(date) <= end:
-                            return float(price)
-            except:
-                pass
-
-        # 2. Weekend Pricing
-        # Python weekday: Mon=0, Sun=6
-        # Villa weekend_days: array of ints
-        if villa.weekend_days and villa.weekend_price:
-            if date.weekday() in villa.weekend_days:
-                return float(villa.weekend_price)
-        
-        # 3. Base Price
-        return float(villa.price_per_night)
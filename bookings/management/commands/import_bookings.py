@@ -0,0 +1,56 @@
+"""
+Bulk import bookings from a CSV or JSON file
+Usage: python manage.py import_bookings bookings.csv --user USERNAME [--format csv|json] [--dry-run]
+"""
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.importers import ImportFormatError, import_bookings, parse_payload
+
+
+class Command(BaseCommand):
+    help = 'Import bookings from a CSV or JSON file with batched overlap validation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .json file')
+        parser.add_argument('--format', choices=['csv', 'json'], help='File format (default: from extension)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and price rows without saving')
+        parser.add_argument('--user', required=True, help='Username to record as created_by')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+
+        fmt = options['format'] or ('csv' if path.suffix.lower() == '.csv' else 'json')
+
+        User = get_user_model()
+        try:
+            created_by = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["user"]}" not found')
+
+        try:
+            rows = parse_payload(path.read_text(encoding='utf-8-sig'), fmt)
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+
+        report = import_bookings(rows, created_by=created_by, dry_run=options['dry_run'])
+
+        for error in report['errors']:
+            details = '; '.join(
+                f"{field}: {' '.join(str(m) for m in messages)}"
+                for field, messages in error['errors'].items()
+            )
+            self.stdout.write(self.style.ERROR(f"Row {error['row']}: {details}"))
+
+        if report['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Dry run: {report['valid']} of {report['total_rows']} rows are valid"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Imported {report['created']} of {report['total_rows']} bookings"
+            ))
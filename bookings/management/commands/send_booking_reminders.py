@@ -0,0 +1,68 @@
+"""
+Scheduled check-in and payment-due reminder mailer
+Usage: python manage.py send_booking_reminders [--date YYYY-MM-DD] [--kind checkin_reminder|payment_due] [--payment-days 3] [--batch-size 100] [--dry-run]
+
+Run once a day (e.g. a Railway cron job). Reruns on the same day never
+double-send: every reminder is recorded in the email outbox and skipped
+next time.
+"""
+from datetime import date
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bookings.emails import REMINDER_TEMPLATES, queue_reminders, select_reminder_targets, send_emails
+
+
+class Command(BaseCommand):
+    help = 'Email guests checking in tomorrow and guests with a pending balance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Treat this date as today (YYYY-MM-DD)')
+        parser.add_argument(
+            '--kind', action='append', choices=list(REMINDER_TEMPLATES),
+            help='Reminder kind to send (repeatable, default: all)'
+        )
+        parser.add_argument('--payment-days', type=int, default=3,
+                            help='Remind pending balances for check-ins within this many days')
+        parser.add_argument('--batch-size', type=int, default=100, help='Messages per send batch')
+        parser.add_argument('--dry-run', action='store_true', help='List targets without sending')
+
+    def handle(self, *args, **options):
+        try:
+            today = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('Invalid --date. Use YYYY-MM-DD')
+        kinds = options['kind'] or list(REMINDER_TEMPLATES)
+
+        if options['dry_run']:
+            for kind, booking in select_reminder_targets(today, kinds, options['payment_days']):
+                self.stdout.write(f'{kind}: booking #{booking.id} {booking.client_email} ({booking.check_in})')
+            return
+
+        emails = queue_reminders(today, kinds, options['payment_days'])
+        if not emails:
+            self.stdout.write(self.style.SUCCESS('No new reminders to send'))
+            return
+
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            # Leave the rows for the outbox worker to retry
+            raise CommandError(f'Email backend unavailable: {e}')
+
+        try:
+            batch_size = options['batch_size']
+            for start in range(0, len(emails), batch_size):
+                result = send_emails(emails[start:start + batch_size], connection=connection)
+                for key in totals:
+                    totals[key] += result[key]
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reminders sent {totals['sent']}, retrying {totals['retried']}, failed {totals['failed']}"
+        ))
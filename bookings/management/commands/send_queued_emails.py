@@ -0,0 +1,35 @@
+"""
+Background worker that drains the booking email outbox
+Usage: python manage.py send_queued_emails [--once] [--batch-size 50] [--interval 5]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings.emails import MAX_ATTEMPTS, deliver_due_emails
+
+
+class Command(BaseCommand):
+    help = 'Send queued booking emails over one reused connection, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--batch-size', type=int, default=50, help='Messages per connection')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS, help='Attempts before a message is marked failed')
+
+    def handle(self, *args, **options):
+        while True:
+            result = deliver_due_emails(options['batch_size'], options['max_attempts'])
+            processed = sum(result.values())
+
+            if processed:
+                self.stdout.write(
+                    f"Sent {result['sent']}, retrying {result['retried']}, failed {result['failed']}"
+                )
+            # A full batch means more are probably waiting
+            if processed >= options['batch_size']:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_booking_override_total_payment'),
+        ('villas', '0006_alter_villa_options_villa_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_id', models.BigIntegerField(verbose_name='Booking ID')),
+                ('villa_id', models.BigIntegerField(blank=True, null=True, verbose_name='Villa ID')),
+                ('check_in', models.DateField(blank=True, null=True, verbose_name='Check-in Date')),
+                ('check_out', models.DateField(blank=True, null=True, verbose_name='Check-out Date')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Booking Tombstone',
+                'verbose_name_plural': 'Booking Tombstones',
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['updated_at'], name='bookings_bo_updated_e5c31b_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundemail',
+            name='reference_date',
+            field=models.DateField(blank=True, help_text='Check-in date a reminder was sent for; one reminder per booking, kind and date', null=True, verbose_name='Reference Date'),
+        ),
+        migrations.AlterField(
+            model_name='outboundemail',
+            name='kind',
+            field=models.CharField(choices=[('confirmation', 'Booking Confirmation'), ('checkin_reminder', 'Check-in Reminder'), ('payment_due', 'Payment Due Reminder')], max_length=30, verbose_name='Kind'),
+        ),
+        migrations.AddConstraint(
+            model_name='outboundemail',
+            constraint=models.UniqueConstraint(fields=('booking', 'kind', 'reference_date'), name='unique_booking_reminder'),
+        ),
+    ]
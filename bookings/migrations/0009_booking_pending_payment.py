@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:27
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_outboundemail_reference_date'),
+        ('villas', '0009_populate_specialprice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='pending_payment',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Coalesce('total_payment', models.Value(Decimal('0'))), '-', django.db.models.functions.comparison.Coalesce('advance_payment', models.Value(Decimal('0')))), output_field=models.DecimalField(decimal_places=2, max_digits=10), verbose_name='Pending Payment (INR)'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['pending_payment'], name='bookings_bo_pending_4d1328_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_booking_pending_payment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=40, verbose_name='Type')),
+                ('payload', models.JSONField(default=dict, verbose_name='Payload')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Booking Event',
+                'verbose_name_plural': 'Booking Events',
+                'ordering': ['id'],
+            },
+        ),
+    ]
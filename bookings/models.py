@@ -1,7 +1,12 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from django.conf import settings
+from django.utils import timezone
 from villas.models import Villa
+from .pricing import VillaPricer
 
 
 class Booking(models.Model):
@@ -101,6 +106,16 @@ class Booking(models.Model):
         verbose_name='Override Total Payment (INR)',
         help_text='Manual override for total payment. If set, ignores auto-calculation.'
     )
+    # Stored column so outstanding balances can be filtered, sorted and summed in SQL
+    pending_payment = models.GeneratedField(
+        expression=(
+            Coalesce('total_payment', models.Value(Decimal('0')))
+            - Coalesce('advance_payment', models.Value(Decimal('0')))
+        ),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+        verbose_name='Pending Payment (INR)',
+    )
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -118,11 +133,25 @@ class Booking(models.Model):
         indexes = [
             models.Index(fields=['villa', 'check_in', 'check_out']),
             models.Index(fields=['status']),
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['pending_payment']),
         ]
     
     def __str__(self):
         return f"{self.villa.name} - {self.client_name} ({self.check_in} to {self.check_out})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored villa/dates, so an update can invalidate the old range too
+        # (bookings.signals) without reading the row again
+        instance.remember_stored_dates()
+        return instance
+    
+    def remember_stored_dates(self):
+        loaded = self.__dict__
+        self._stored_dates = (loaded.get('villa_id'), loaded.get('check_in'), loaded.get('check_out'))
+    
     def clean(self):
         """Validate booking data"""
         if self.check_in and self.check_out:
@@ -137,7 +166,7 @@ class Booking(models.Model):
     def _get_price_for_date(self, date):
         """
         Get the price for a specific date based on pricing priority.
-        Priority: Special Date Price > Weekend Price > Base Price
+        Priority: Special Date Price > Special Day Price > Weekend Price > Base Price
         
         Args:
             date: The date to get the price for
@@ -145,60 +174,7 @@ class Booking(models.Model):
         Returns:
             Decimal: The price for the given date
         """
-        from decimal import Decimal
-        from datetime import datetime
-        
-        # Priority 1: Check special date pricing
-        if self.villa.special_prices:
-            try:
-                special_prices = self.villa.special_prices
-                if isinstance(special_prices, list):
-                    for special_price in special_prices:
-                        if not isinstance(special_price, dict):
-                            continue
-                            
-                        # Get start and end dates
-                        start_date_str = special_price.get('start_date')
-                        end_date_str = special_price.get('end_date')
-                        price = special_price.get('price')
-                        
-                        if not all([start_date_str, end_date_str, price]):
-                            continue
-                        
-                        # Parse dates
-                        try:
-                            if isinstance(start_date_str, str):
-                                start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                            else:
-                                start_date = start_date_str
-                                
-                            if isinstance(end_date_str, str):
-                                end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                            else:
-                                end_date = end_date_str
-                            
-                            # Check if current date falls within this special price range
-                            if start_date <= date <= end_date:
-                                return Decimal(str(price))
-                        except (ValueError, TypeError):
-                            # Skip invalid date formats
-                            continue
-            except (TypeError, AttributeError):
-                # If special_prices is not a valid list, skip
-                pass
-        
-        # Priority 2: Check weekend pricing
-        day_of_week = date.weekday()  # 0=Monday, 6=Sunday
-        is_configured_weekend = (
-            self.villa.weekend_days and 
-            day_of_week in self.villa.weekend_days
-        )
-        
-        if is_configured_weekend and self.villa.weekend_price:
-            return self.villa.weekend_price
-        
-        # Priority 3: Base price
-        return self.villa.price_per_night
+        return VillaPricer(self.villa).price_for_date(date)
     
     def save(self, *args, **kwargs):
         """
@@ -209,45 +185,35 @@ class Booking(models.Model):
         
         Otherwise, auto-calculate based on villa pricing:
         1. Special Date Price (from villa.special_prices)
-        2. Weekend Price (if day is in villa.weekend_days)
-        3. Base Price (villa.price_per_night)
+        2. Special Day Price (global special days and public holidays)
+        3. Weekend Price (if day is in villa.weekend_days)
+        4. Base Price (villa.price_per_night)
         
         Payment Calculation:
         - total_payment: Override or auto-calculated from pricing
         - advance_payment: User-entered amount
-        - pending_payment: Calculated as (total_payment - advance_payment)
+        - pending_payment: Generated column, (total_payment - advance_payment)
         """
         if self.check_in and self.check_out and self.villa:
-            from decimal import Decimal
-            from datetime import timedelta
-            
             # Check if manual override is provided
             if self.override_total_payment is not None:
                 # Use the override value
                 self.total_payment = self.override_total_payment
             else:
-                # Auto-calculate from villa pricing
-                total = Decimal('0')
-                current_date = self.check_in
-                
-                # Iterate through each night of the stay
-                while current_date < self.check_out:
-                    # Get price for this specific date using priority hierarchy
-                    price = self._get_price_for_date(current_date)
-                    total += price
-                    current_date += timedelta(days=1)
-                
-                self.total_payment = total
+                # Auto-calculate from villa pricing, one night at a time
+                self.total_payment = VillaPricer(self.villa).total(self.check_in, self.check_out)
         
         # Validate advance_payment doesn't exceed total_payment
         if self.advance_payment and self.total_payment:
-            from decimal import Decimal
             advance = self.advance_payment or Decimal('0')
             if advance > self.total_payment:
                 raise ValidationError({
                     'advance_payment': 'Advance payment cannot exceed total payment.'
                 })
         
+        # The database computes pending_payment; mirror it in memory since
+        # updates don't read it back (and full_clean() reads it on Django 5.0.1)
+        self.pending_payment = (self.total_payment or Decimal('0')) - (self.advance_payment or Decimal('0'))
         self.full_clean()
         super().save(*args, **kwargs)
     
@@ -258,14 +224,6 @@ class Booking(models.Model):
             return (self.check_out - self.check_in).days
         return 0
     
-    @property
-    def pending_payment(self):
-        """Calculate pending payment"""
-        from decimal import Decimal
-        total = self.total_payment or Decimal('0')
-        advance = self.advance_payment or Decimal('0')
-        return total - advance
-    
     @property
     def auto_calculated_price(self):
         """
@@ -275,88 +233,110 @@ class Booking(models.Model):
         if not (self.check_in and self.check_out and self.villa):
             return None
         
-        from decimal import Decimal
-        from datetime import timedelta
-        
-        breakdown = {
-            'total': Decimal('0'),
-            'nights': [],
-            'base_nights': 0,
-            'weekend_nights': 0,
-            'special_nights': 0,
-        }
-        
-        current_date = self.check_in
-        
-        while current_date < self.check_out:
-            price = self._get_price_for_date(current_date)
-            breakdown['total'] += price
-            
-            # Determine price type for this night
-            price_type = 'base'
-            
-            # Check if it's a special day
-            if self.villa.special_prices:
-                try:
-                    from datetime import datetime
-                    special_prices = self.villa.special_prices
-                    if isinstance(special_prices, list):
-                        for special_price in special_prices:
-                            if not isinstance(special_price, dict):
-                                continue
-                            
-                            start_date_str = special_price.get('start_date')
-                            end_date_str = special_price.get('end_date')
-                            sp_price = special_price.get('price')
-                            
-                            if not all([start_date_str, end_date_str, sp_price]):
-                                continue
-                            
-                            try:
-                                if isinstance(start_date_str, str):
-                                    start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                                else:
-                                    start_date = start_date_str
-                                    
-                                if isinstance(end_date_str, str):
-                                    end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                                else:
-                                    end_date = end_date_str
-                                
-                                if start_date <= current_date <= end_date:
-                                    price_type = 'special'
-                                    break
-                            except (ValueError, TypeError):
-                                continue
-                except (TypeError, AttributeError):
-                    pass
-            
-            # Check if it's a weekend (only if not already special)
-            if price_type != 'special':
-                day_of_week = current_date.weekday()
-                is_configured_weekend = (
-                    self.villa.weekend_days and 
-                    day_of_week in self.villa.weekend_days
-                )
-                if is_configured_weekend and self.villa.weekend_price:
-                    price_type = 'weekend'
-            
-            # Add to breakdown
-            breakdown['nights'].append({
-                'date': current_date.isoformat(),
-                'price': float(price),
-                'type': price_type
-            })
-            
-            if price_type == 'base':
-                breakdown['base_nights'] += 1
-            elif price_type == 'weekend':
-                breakdown['weekend_nights'] += 1
-            elif price_type == 'special':
-                breakdown['special_nights'] += 1
-            
-            current_date += timedelta(days=1)
-        
-        breakdown['total'] = float(breakdown['total'])
-        return breakdown
+        return VillaPricer(self.villa).breakdown(self.check_in, self.check_out)
+
+
+class BookingTombstone(models.Model):
+    """
+    Marker left behind when a booking is deleted, so delta-sync clients
+    polling the change feed can drop it from their local cache
+    """
+    booking_id = models.BigIntegerField(verbose_name='Booking ID')
+    villa_id = models.BigIntegerField(null=True, blank=True, verbose_name='Villa ID')
+    check_in = models.DateField(null=True, blank=True, verbose_name='Check-in Date')
+    check_out = models.DateField(null=True, blank=True, verbose_name='Check-out Date')
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Booking Tombstone'
+        verbose_name_plural = 'Booking Tombstones'
+        ordering = ['deleted_at']
+    
+    def __str__(self):
+        return f"Booking #{self.booking_id} deleted at {self.deleted_at}"
+
+
+class BookingEvent(models.Model):
+    """
+    Booking change event for the server-sent events stream. Every worker's
+    streams read this table, so a client sees events raised in any process;
+    the id is the SSE event id clients resume from
+    """
+    type = models.CharField(max_length=40, verbose_name='Type')
+    payload = models.JSONField(default=dict, verbose_name='Payload')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
+    class Meta:
+        verbose_name = 'Booking Event'
+        verbose_name_plural = 'Booking Events'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.type} #{self.pk}"
+
+
+class OutboundEmail(models.Model):
+    """
+    Outbox entry for an email sent by the background worker
+    (python manage.py send_queued_emails) instead of inside the request
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    KIND_CHOICES = [
+        ('confirmation', 'Booking Confirmation'),
+        ('checkin_reminder', 'Check-in Reminder'),
+        ('payment_due', 'Payment Due Reminder'),
+    ]
+    
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emails',
+        verbose_name='Booking'
+    )
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, verbose_name='Kind')
+    reference_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='Reference Date',
+        help_text='Check-in date a reminder was sent for; one reminder per booking, kind and date'
+    )
+    to_email = models.EmailField(verbose_name='To')
+    subject = models.CharField(max_length=255, verbose_name='Subject')
+    body = models.TextField(verbose_name='Body')
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='queued',
+        verbose_name='Status'
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Attempts')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='Next Attempt At')
+    last_error = models.TextField(blank=True, verbose_name='Last Error')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Sent At')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Outbound Emails'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['booking', 'kind', 'reference_date'],
+                name='unique_booking_reminder',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} to {self.to_email} ({self.status})"
@@ -1,6 +1,20 @@
+from rest_framework.filters import OrderingFilter
 from rest_framework.pagination import PageNumberPagination
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that ends every ordering with -id, so rows with equal
+    sort keys keep their place from one page to the next
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and not {'id', '-id'} & set(ordering):
+            ordering = [*ordering, '-id']
+        return ordering
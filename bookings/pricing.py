@@ -0,0 +1,149 @@
+"""
+Nightly pricing for villa bookings.
+
+Priority: Special Date Price > Special Day Price > Weekend Price > Base Price
+
+Special days are GlobalSpecialDay entries plus the built-in public
+holidays (villas.public_holidays.special_day_dates); they only apply to
+villas with a special_day_price.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from villas.public_holidays import special_day_dates
+
+
+def parse_special_price_entries(special_prices) -> list[dict]:
+    """
+    Parse a villa's special_prices JSON into dicts with start_date, end_date,
+    price and name. Invalid or incomplete entries are skipped, matching the
+    original lookup.
+    """
+    entries = []
+    if not isinstance(special_prices, list):
+        return entries
+
+    for special_price in special_prices:
+        if not isinstance(special_price, dict):
+            continue
+
+        start_date = special_price.get('start_date')
+        end_date = special_price.get('end_date')
+        price = special_price.get('price')
+
+        if not all([start_date, end_date, price]):
+            continue
+
+        try:
+            if isinstance(start_date, str):
+                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+            if isinstance(end_date, str):
+                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+            entries.append({
+                'start_date': start_date,
+                'end_date': end_date,
+                'price': Decimal(str(price)),
+                'name': str(special_price.get('name') or ''),
+            })
+        except (ValueError, TypeError, ArithmeticError):
+            continue
+
+    return entries
+
+
+def parse_special_prices(special_prices) -> list[tuple[date, date, Decimal]]:
+    """Parse a villa's special_prices JSON into (start_date, end_date, price) rules."""
+    return [
+        (entry['start_date'], entry['end_date'], entry['price'])
+        for entry in parse_special_price_entries(special_prices)
+    ]
+
+
+class VillaPricer:
+    """
+    Prices nights for a single villa.
+
+    special_prices is parsed once per pricer and each night is memoised, so a
+    pricer can be reused across many bookings of the same villa (bulk import,
+    reports) without re-scanning the JSON.
+    """
+
+    def __init__(self, villa):
+        self.villa = villa
+        self.special_prices = parse_special_prices(villa.special_prices)
+        self.weekend_days = villa.weekend_days or []
+        self._nights: dict[date, tuple[Decimal, str]] = {}
+
+    def price_and_type_for_date(self, day) -> tuple[Decimal, str]:
+        """
+        Return (price, type) for a night, type being 'special', 'special_day',
+        'weekend' or 'base'.
+        """
+        cached = self._nights.get(day)
+        if cached is not None:
+            return cached
+
+        result = None
+
+        # Priority 1: Special date pricing
+        for start_date, end_date, price in self.special_prices:
+            try:
+                if start_date <= day <= end_date:
+                    result = (price, 'special')
+                    break
+            except TypeError:
+                continue
+
+        # Priority 2: Global special days / public holidays
+        if result is None and self.villa.special_day_price and day in special_day_dates(day.year):
+            result = (self.villa.special_day_price, 'special_day')
+
+        # Priority 3: Weekend pricing
+        if result is None and day.weekday() in self.weekend_days and self.villa.weekend_price:
+            result = (self.villa.weekend_price, 'weekend')
+
+        # Priority 4: Base price
+        if result is None:
+            result = (self.villa.price_per_night, 'base')
+
+        self._nights[day] = result
+        return result
+
+    def price_for_date(self, day) -> Decimal:
+        return self.price_and_type_for_date(day)[0]
+
+    def total(self, check_in, check_out) -> Decimal:
+        """Sum of nightly prices for [check_in, check_out)."""
+        total = Decimal('0')
+        current_date = check_in
+        while current_date < check_out:
+            total += self.price_for_date(current_date)
+            current_date += timedelta(days=1)
+        return total
+
+    def breakdown(self, check_in, check_out) -> dict:
+        """Per-night price breakdown in the shape of Booking.auto_calculated_price."""
+        total = Decimal('0')
+        breakdown = {
+            'total': Decimal('0'),
+            'nights': [],
+            'base_nights': 0,
+            'weekend_nights': 0,
+            'special_nights': 0,
+            'special_day_nights': 0,
+        }
+
+        current_date = check_in
+        while current_date < check_out:
+            price, price_type = self.price_and_type_for_date(current_date)
+            total += price
+            breakdown['nights'].append({
+                'date': current_date.isoformat(),
+                'price': float(price),
+                'type': price_type,
+            })
+            breakdown[f'{price_type}_nights'] += 1
+            current_date += timedelta(days=1)
+
+        breakdown['total'] = float(total)
+        return breakdown
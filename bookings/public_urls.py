@@ -1,7 +1,12 @@
+from django.conf import settings
 from django.urls import path
 
-from . import public_views
+from . import async_views, public_views
 
 urlpatterns = [
-    path('availability/', public_views.public_availability, name='public-availability'),
+    path(
+        'availability/',
+        async_views.public_availability if settings.ASYNC_VIEWS else public_views.public_availability,
+        name='public-availability',
+    ),
 ]
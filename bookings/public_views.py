@@ -75,58 +75,49 @@ def _status_for_date(villa_id, day, bookings_by_villa) -> str:
     return 'available'
 
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def public_availability(request):
+def parse_range(params):
     """
-    GET /api/v1/public/availability/?start=YYYY-MM-DD&end=YYYY-MM-DD
-
-    Public read-only availability for customers.
+    Validate ?start=&end= for the availability endpoints.
+    Returns (start_date, end_date, None) or (None, None, error message).
     """
-    start_str = request.query_params.get('start')
-    end_str = request.query_params.get('end')
+    start_str = params.get('start')
+    end_str = params.get('end')
 
     if not start_str or not end_str:
-        return Response(
-            {'error': 'start and end query parameters are required (YYYY-MM-DD)'},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
+        return None, None, 'start and end query parameters are required (YYYY-MM-DD)'
 
     try:
         start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
         end_date = datetime.strptime(end_str, '%Y-%m-%d').date()
     except ValueError:
-        return Response(
-            {'error': 'Invalid date format. Use YYYY-MM-DD'},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
+        return None, None, 'Invalid date format. Use YYYY-MM-DD'
 
     if end_date < start_date:
-        return Response(
-            {'error': 'end must be on or after start'},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
+        return None, None, 'end must be on or after start'
 
     if (end_date - start_date).days > MAX_RANGE_DAYS:
-        return Response(
-            {'error': f'Date range cannot exceed {MAX_RANGE_DAYS} days'},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
+        return None, None, f'Date range cannot exceed {MAX_RANGE_DAYS} days'
+
+    return start_date, end_date, None
 
-    villas = list(Villa.objects.filter(status='active').order_by('order', 'name'))
-    villa_ids = [v.id for v in villas]
 
+def availability_queries(start_date, end_date):
+    """The three independent querysets behind the availability payload"""
+    villas = Villa.objects.filter(status='active').order_by('order', 'name')
     bookings = Booking.objects.filter(
-        villa_id__in=villa_ids,
+        villa__status='active',
         check_in__lte=end_date,
         check_out__gt=start_date,
     ).only('villa_id', 'check_in', 'check_out', 'status')
+    global_special_days = GlobalSpecialDay.objects.all()
+    return villas, bookings, global_special_days
 
+
+def build_availability(params, start_date, end_date, villas, bookings, global_special_days) -> dict:
     bookings_by_villa: dict[int, list] = {}
     for booking in bookings:
         bookings_by_villa.setdefault(booking.villa_id, []).append(booking)
 
-    global_special_days = list(GlobalSpecialDay.objects.all())
     special_days_payload = list_special_days_for_response(global_special_days)
     days_payload = build_calendar_day_info(start_date, end_date, global_special_days)
 
@@ -149,11 +140,29 @@ def public_availability(request):
             'availability': availability,
         })
 
-    return Response({
+    return {
         'pricing': _compute_pricing(villas),
         'special_days': special_days_payload,
         'days': days_payload,
         'villas': villas_payload,
-        'start': start_str,
-        'end': end_str,
-    })
+        'start': params.get('start'),
+        'end': params.get('end'),
+    }
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def public_availability(request):
+    """
+    GET /api/v1/public/availability/?start=YYYY-MM-DD&end=YYYY-MM-DD
+
+    Public read-only availability for customers.
+    """
+    start_date, end_date, error = parse_range(request.query_params)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+    villas, bookings, global_special_days = availability_queries(start_date, end_date)
+    return Response(build_availability(
+        request.query_params, start_date, end_date, list(villas), list(bookings), list(global_special_days)
+    ))
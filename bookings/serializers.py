@@ -81,3 +81,35 @@ class BookingListSerializer(serializers.ModelSerializer):
             'total_payment', 'advance_payment', 'override_total_payment', 
             'pending_payment', 'auto_calculated_price'
         ]
+
+
+class BookingImportSerializer(serializers.ModelSerializer):
+    """
+    Field-level validation for one bulk-import row.
+    Villa lookup, overlap checks and pricing are done in batch by bookings.importers.
+    """
+    
+    class Meta:
+        model = Booking
+        fields = [
+            'client_name', 'client_phone', 'client_email', 'check_in', 'check_out',
+            'status', 'number_of_guests', 'notes', 'payment_status', 'payment_method',
+            'booking_source', 'advance_payment', 'override_total_payment'
+        ]
+    
+    def validate(self, data):
+        check_in = data.get('check_in')
+        check_out = data.get('check_out')
+        
+        if check_in and check_out and check_out <= check_in:
+            raise serializers.ValidationError({
+                'check_out': 'Check-out date must be after check-in date.'
+            })
+        
+        advance_payment = data.get('advance_payment')
+        if advance_payment and advance_payment < 0:
+            raise serializers.ValidationError({
+                'advance_payment': 'Advance payment cannot be negative.'
+            })
+        
+        return data
@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from villas.models import Villa
+
+from .analytics_cache import bump_data_version
+from .events import booking_event_payload, publish_on_commit
+from .models import Booking, BookingTombstone
+
+
+@receiver(post_save, sender=Booking)
+def publish_booking_saved(sender, instance, created, **kwargs):
+    event_type = 'booking.created' if created else 'booking.updated'
+    # Villa/dates as loaded from the database (Booking.from_db), if this instance was
+    previous = None if created else getattr(instance, '_stored_dates', None)
+    publish_on_commit(event_type, booking_event_payload(instance, previous))
+    instance.remember_stored_dates()
+
+
+@receiver(post_delete, sender=Booking)
+def record_booking_tombstone(sender, instance, **kwargs):
+    """Leave a tombstone so the change feed can report the deletion"""
+    BookingTombstone.objects.create(
+        booking_id=instance.pk,
+        villa_id=instance.villa_id,
+        check_in=instance.check_in,
+        check_out=instance.check_out,
+    )
+    publish_on_commit('booking.deleted', booking_event_payload(instance))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Villa)
+@receiver(post_delete, sender=Villa)
+def invalidate_analytics(sender, **kwargs):
+    """New analytics cache version once the write is committed"""
+    transaction.on_commit(bump_data_version)
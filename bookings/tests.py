@@ -1,3 +1,712 @@
-from django.test import TestCase
+"""
+Query budgets for the booking, dashboard and public endpoints.
 
-# Create your tests here.
+Budgets are the query counts on the seeded dataset (config.testing), which
+has sixteen bookings per villa, so an N+1 blows well past them. Counts
+include JWT authentication with cold per-process caches. If a change
+legitimately needs more queries, raise the budget in the same commit and
+say why.
+"""
+import io
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncClient, Client, TransactionTestCase, override_settings
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from config.testing import QueryBudgetTestCase, api_client, reset_process_caches, seed_dataset
+
+from . import analytics_cache, async_views, dashboard, dashboard_bundle, emails, importers
+from villas.models import GlobalSpecialDay, Villa
+from villas.public_holidays import special_day_dates
+
+from .importers import import_bookings
+from .pricing import VillaPricer
+from .models import Booking, BookingEvent, OutboundEmail
+
+
+class BookingEndpointQueryBudgetTests(QueryBudgetTestCase):
+    def test_booking_list(self):
+        response = self.assertGetWithin(4, '/api/v1/bookings/', page_size=50)
+        self.assertGreaterEqual(len(response.data['results']), 40)
+
+    def test_booking_list_filtered(self):
+        response = self.assertGetWithin(
+            4, '/api/v1/bookings/',
+            villa=self.data['villas'][0].pk, status='booked', time_frame='current', search='Guest',
+        )
+        self.assertTrue(response.data['results'])
+
+    def test_booking_detail(self):
+        self.assertGetWithin(3, f'/api/v1/bookings/{self.data["bookings"][3].pk}/')
+
+    def test_calendar(self):
+        today = self.data['today']
+        response = self.assertGetWithin(
+            2, '/api/v1/bookings/calendar/',
+            start=(today - timedelta(days=90)).isoformat(), end=(today + timedelta(days=90)).isoformat(),
+        )
+        self.assertGreaterEqual(len(response.data), 40)
+
+    def test_changes_feed(self):
+        response = self.assertGetWithin(4, '/api/v1/bookings/changes/')
+        self.assertGreaterEqual(len(response.data['updated']), 40)
+
+    def test_calculate_price(self):
+        today = self.data['today']
+        with self.assertMaxQueries(3):
+            response = self.client.post('/api/v1/bookings/calculate-price/', {
+                'villa': self.data['villas'][0].pk,
+                'check_in': (today + timedelta(days=15)).isoformat(),
+                # Crosses weekends, the special price range and special days
+                'check_out': (today + timedelta(days=60)).isoformat(),
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_booking_list_by_pending_payment(self):
+        response = self.assertGetWithin(
+            4, '/api/v1/bookings/', has_pending='true', pending_min='1000', ordering='-pending_payment',
+        )
+        pending = [booking['pending_payment'] for booking in response.data['results']]
+        self.assertTrue(pending)
+        self.assertTrue(all(amount >= 1000 for amount in pending))
+        self.assertEqual(pending, sorted(pending, reverse=True))
+
+    def test_booking_list_ignores_unlisted_ordering(self):
+        response = self.assertGetWithin(4, '/api/v1/bookings/', ordering='client_phone', page_size=100)
+        expected = Booking.objects.order_by('-check_in', '-id').values_list('id', flat=True)
+        self.assertEqual([booking['id'] for booking in response.data['results']], list(expected))
+
+    def test_equal_sort_keys_page_stably(self):
+        Booking.objects.update(total_payment=Decimal('50000'))
+        ids = []
+        for page in range(1, 4):
+            response = self.assertGetWithin(
+                4, '/api/v1/bookings/', ordering='total_payment', page_size=25, page=page,
+            )
+            ids += [booking['id'] for booking in response.data['results']]
+        self.assertEqual(ids, sorted(Booking.objects.values_list('id', flat=True), reverse=True))
+
+    def test_booking_list_invalid_amount(self):
+        self.assertGetWithin(2, '/api/v1/bookings/', expected_status=400, pending_min='lots')
+
+    def test_email_status(self):
+        self.assertGetWithin(2, f'/api/v1/bookings/emails/{OutboundEmail.objects.first().pk}/')
+
+
+class DashboardQueryBudgetTests(QueryBudgetTestCase):
+    def test_dashboard_overview(self):
+        self.assertGetWithin(16, '/api/v1/bookings/dashboard-overview/')
+
+    def test_recent_bookings(self):
+        self.assertGetWithin(2, '/api/v1/bookings/recent-bookings/')
+
+    def test_revenue_chart(self):
+        self.assertGetWithin(2, '/api/v1/bookings/revenue-chart/')
+
+    def test_villa_performance(self):
+        self.assertGetWithin(2, '/api/v1/bookings/villa-performance/')
+
+    def test_booking_sources(self):
+        self.assertGetWithin(3, '/api/v1/bookings/booking-sources/')
+
+    def test_revenue_candles(self):
+        self.assertGetWithin(2, '/api/v1/bookings/revenue-candles/')
+
+    def test_receivables(self):
+        today = self.data['today']
+        response = self.assertGetWithin(2, '/api/v1/bookings/receivables/', as_of=today.isoformat())
+
+        outstanding = [
+            booking for booking in Booking.objects.filter(status='booked')
+            if booking.pending_payment > 0
+        ]
+        total = response.data['total']
+        self.assertEqual(Decimal(total['pending']), sum(b.pending_payment for b in outstanding))
+        self.assertEqual(total['bookings'], len(outstanding))
+        self.assertEqual(sum(Decimal(amount) for amount in total['buckets'].values()), Decimal(total['pending']))
+        self.assertEqual(
+            Decimal(total['buckets']['not_due']),
+            sum(b.pending_payment for b in outstanding if b.check_out > today),
+        )
+        self.assertEqual(
+            sum(Decimal(villa['pending']) for villa in response.data['by_villa']), Decimal(total['pending'])
+        )
+
+
+class AnalyticsCacheTests(QueryBudgetTestCase):
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.assertGetWithin(16, '/api/v1/bookings/dashboard-overview/')
+        second = self.assertGetWithin(0, '/api/v1/bookings/dashboard-overview/')
+        self.assertEqual(first.json(), second.json())
+
+    def test_params_are_part_of_the_key(self):
+        self.assertEqual(len(self.assertGetWithin(2, '/api/v1/bookings/revenue-chart/', months=3).data), 3)
+        self.assertEqual(len(self.assertGetWithin(2, '/api/v1/bookings/revenue-chart/', months=6).data), 6)
+
+    def test_booking_write_invalidates(self):
+        total = self.client.get('/api/v1/bookings/dashboard-overview/').data['bookings']['total']
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.filter(status='booked').first().delete()
+        response = self.client.get('/api/v1/bookings/dashboard-overview/')
+        self.assertEqual(response.data['bookings']['total'], total - 1)
+
+    def test_bulk_import_invalidates(self):
+        total = self.client.get('/api/v1/bookings/dashboard-overview/').data['bookings']['total']
+        check_in = self.data['today'] + timedelta(days=400)
+        with self.captureOnCommitCallbacks(execute=True):
+            import_bookings([{
+                'villa': self.data['villas'][0].pk, 'client_name': 'Imported', 'client_phone': '9000000000',
+                'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=2)).isoformat(),
+            }], created_by=self.data['staff'])
+        response = self.client.get('/api/v1/bookings/dashboard-overview/')
+        self.assertEqual(response.data['bookings']['total'], total + 1)
+
+    def test_replica_and_primary_entries_are_separate(self):
+        primary = analytics_cache.cache_key('sources', {}, 1)
+        with patch('bookings.analytics_cache.read_alias', return_value='replica'):
+            replica = analytics_cache.cache_key('sources', {}, 1)
+            analytics_cache.get_or_compute('sources', {}, lambda: ['lagging replica'])
+        self.assertNotEqual(primary, replica)
+        self.assertEqual(analytics_cache.get_or_compute('sources', {}, lambda: ['primary']), ['primary'])
+
+    def test_key_uses_the_local_date(self):
+        key = analytics_cache.cache_key('dashboard_overview', {}, 1)
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with patch('django.utils.timezone.localdate', return_value=tomorrow):
+            self.assertNotEqual(analytics_cache.cache_key('dashboard_overview', {}, 1), key)
+
+    @override_settings(ANALYTICS_CACHE_SECONDS=3600)
+    def test_per_process_cache_ttl_is_capped(self):
+        self.assertEqual(analytics_cache._ttl(), analytics_cache.PER_PROCESS_MAX_SECONDS)
+
+    def test_waits_for_the_worker_recomputing(self):
+        key = analytics_cache.cache_key('sources', {}, analytics_cache.data_version())
+        cache.add(f'{key}:lock', 'other-worker', 10)
+        timer = threading.Timer(0.2, cache.set, (key, ['computed elsewhere'], 60))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        def compute():
+            self.fail('a second caller recomputed a locked entry')
+
+        self.assertEqual(analytics_cache.get_or_compute('sources', {}, compute), ['computed elsewhere'])
+
+    def test_recomputes_when_lock_released_without_value(self):
+        key = analytics_cache.cache_key('sources', {}, analytics_cache.data_version())
+        cache.add(f'{key}:lock', 'other-worker', 10)
+        threading.Timer(0.1, cache.delete, (f'{key}:lock',)).start()
+        self.assertEqual(analytics_cache.get_or_compute('sources', {}, lambda: ['mine']), ['mine'])
+
+
+# Pool threads have their own connections and can't see the test transaction
+@override_settings(DASHBOARD_BUNDLE_WORKERS=0)
+class DashboardBundleTests(QueryBudgetTestCase):
+    def test_all_sections(self):
+        response = self.assertGetWithin(23, '/api/v1/bookings/dashboard-bundle/')
+        sections = response.data['sections']
+        self.assertEqual(len(sections), 7)
+        self.assertTrue(all('data' in section and 'ms' in section for section in sections.values()))
+
+    def test_matches_individual_endpoints(self):
+        response = self.client.post('/api/v1/bookings/dashboard-bundle/', {'sections': [
+            {'name': 'revenue-chart', 'params': {'months': 3}},
+            'booking-sources',
+        ]}, format='json')
+        sections = response.data['sections']
+        self.assertEqual(list(sections), ['revenue-chart', 'booking-sources'])
+        self.assertEqual(sections['revenue-chart']['data'], self.client.get('/api/v1/bookings/revenue-chart/?months=3').data)
+        self.assertEqual(sections['booking-sources']['data'], self.client.get('/api/v1/bookings/booking-sources/').data)
+
+    def test_query_string_params(self):
+        response = self.client.get('/api/v1/bookings/dashboard-bundle/', {
+            'sections': 'recent-bookings,revenue-candles', 'recent-bookings.limit': 2, 'revenue-candles.range': '7D',
+        })
+        sections = response.data['sections']
+        self.assertEqual(len(sections['recent-bookings']['data']), 2)
+        self.assertEqual(len(sections['revenue-candles']['data']), 8)
+
+    def test_invalid_section_params(self):
+        response = self.client.post('/api/v1/bookings/dashboard-bundle/', {'sections': [
+            {'name': 'recent-bookings', 'params': {'limit': 'many'}}, 'villa-performance',
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['sections']['recent-bookings']['status'], 400)
+        self.assertIn('data', response.data['sections']['villa-performance'])
+
+    def test_unknown_section(self):
+        response = self.client.get('/api/v1/bookings/dashboard-bundle/', {'sections': 'overview'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_section_bug_is_a_server_error(self):
+        def broken(params):
+            raise TypeError('bug in the payload')
+
+        with patch.dict(dashboard_bundle.SECTIONS, {'booking-sources': ('booking_sources', broken, ())}), \
+                self.assertLogs('bookings.dashboard_bundle', 'ERROR'):
+            response = self.client.get('/api/v1/bookings/dashboard-bundle/', {'sections': 'booking-sources,villa-performance'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['sections']['booking-sources']['status'], 500)
+        self.assertIn('data', response.data['sections']['villa-performance'])
+
+
+# Committed data, so the pool threads' own connections can read it
+@override_settings(DASHBOARD_BUNDLE_WORKERS=2)
+class ConcurrentDashboardBundleTests(TransactionTestCase):
+    def setUp(self):
+        reset_process_caches()
+        self.data = seed_dataset(bookings_per_villa=4)
+        self.client = api_client(self.data['staff'])
+
+    def test_sections_run_on_the_pool(self):
+        threads = []
+
+        def booking_sources(params):
+            threads.append(threading.current_thread().name)
+            return dashboard.booking_sources_payload(params)
+
+        def broken(params):
+            raise RuntimeError('section failed')
+
+        sections = {
+            'booking-sources': ('booking_sources', booking_sources, ()),
+            'villa-performance': ('villa_performance', broken, ()),
+        }
+        with patch.dict(dashboard_bundle.SECTIONS, sections), self.assertLogs('bookings.dashboard_bundle', 'ERROR'):
+            response = self.client.get('/api/v1/bookings/dashboard-bundle/', {
+                'sections': 'booking-sources,villa-performance,revenue-chart,recent-bookings',
+                'revenue-chart.months': 3, 'recent-bookings.limit': 'all',
+            })
+        self.assertEqual(response.status_code, 200)
+        sections = response.data['sections']
+        self.assertTrue(threads[0].startswith('dashboard-bundle'))
+        self.assertEqual(sections['booking-sources']['data'], dashboard.booking_sources_payload({}))
+        self.assertEqual(len(sections['revenue-chart']['data']), 3)
+        self.assertEqual(sections['villa-performance']['status'], 500)
+        self.assertEqual(sections['recent-bookings']['status'], 400)
+
+
+class ChangeFeedTests(QueryBudgetTestCase):
+    def poll(self, since=None, limit=None):
+        params = {key: value for key, value in {'since': since, 'limit': limit}.items() if value is not None}
+        response = self.client.get('/api/v1/bookings/changes/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_pages_across_equal_timestamps(self):
+        Booking.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        seen, cursor = [], None
+        while True:
+            page = self.poll(cursor, limit=7)
+            seen += [booking['id'] for booking in page['updated']]
+            cursor = page['cursor']
+            if not page['has_more']:
+                break
+        self.assertEqual(sorted(seen), sorted(Booking.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_deleted_ids(self):
+        cursor = self.poll()['cursor']
+        booking_id = self.data['bookings'][5].pk
+        Booking.objects.get(pk=booking_id).delete()
+        page = self.poll(cursor)
+        self.assertEqual(page['deleted'], [booking_id])
+        self.assertNotIn(booking_id, [b['id'] for b in page['updated']])
+
+    def test_late_commit_within_the_overlap(self):
+        Booking.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        late_at = timezone.now()
+        Booking.objects.filter(pk=self.data['bookings'][1].pk).update(updated_at=timezone.now())
+        cursor = self.poll()['cursor']
+        # Committed after that poll, with a timestamp taken before the update it saw
+        late = self.data['bookings'][2]
+        Booking.objects.filter(pk=late.pk).update(updated_at=late_at)
+        self.assertIn(late.pk, [b['id'] for b in self.poll(cursor)['updated']])
+
+    def test_invalid_cursor(self):
+        self.assertGetWithin(2, '/api/v1/bookings/changes/', expected_status=400, since='yesterday')
+
+
+class BookingImportTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        # Well past the seeded bookings
+        self.start = self.data['today'] + timedelta(days=400)
+        self.villa = self.data['villas'][0]
+
+    def row(self, first_night, nights, **fields):
+        check_in = self.start + timedelta(days=first_night)
+        return {
+            'villa': self.villa.name, 'client_name': 'Importer', 'client_phone': '9000000000',
+            'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=nights)).isoformat(),
+            **fields,
+        }
+
+    def test_overlap_within_the_file(self):
+        report = import_bookings([self.row(0, 5), self.row(3, 2), self.row(5, 2)], created_by=self.data['staff'])
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['errors'], [
+            {'row': 2, 'errors': {'check_in': ['Overlaps row 1 in this import.']}},
+        ])
+
+    def test_overlap_with_existing_booking(self):
+        Booking.objects.create(
+            villa=self.villa, client_name='Stored', client_phone='9111111111',
+            check_in=self.start + timedelta(days=7), check_out=self.start + timedelta(days=8),
+            created_by=self.data['staff'],
+        )
+        # Row 1 clashes with the stored booking; row 2 only clashes with row 1, which isn't imported
+        report = import_bookings([self.row(0, 9), self.row(4, 2)], created_by=self.data['staff'])
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['errors'], [
+            {'row': 1, 'errors': {'check_in': ['Villa is not available for the selected dates.']}},
+        ])
+        self.assertTrue(Booking.objects.filter(villa=self.villa, check_in=self.start + timedelta(days=4)).exists())
+
+    def test_dry_run(self):
+        before = Booking.objects.count()
+        report = import_bookings([self.row(0, 2), self.row(1, 2), {'client_name': 'No villa'}], dry_run=True)
+        self.assertEqual((report['valid'], report['created'], len(report['errors'])), (1, 0, 2))
+        self.assertEqual(Booking.objects.count(), before)
+
+    def test_chunked_creation(self):
+        rows = [self.row(n * 3, 2) for n in range(5)]
+        with patch.object(importers, 'CHUNK_SIZE', 2), self.assertMaxQueries(20) as captured:
+            report = import_bookings(rows, created_by=self.data['staff'])
+        self.assertEqual(report['created'], 5)
+        inserts = [q for q in captured.captured_queries if q['sql'].startswith('INSERT INTO "bookings_booking"')]
+        self.assertEqual(len(inserts), 3)
+
+    def test_bulk_import_endpoint(self):
+        response = self.client.post('/api/v1/bookings/bulk-import/', [self.row(0, 2), self.row(1, 2)], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+
+
+class EmailOutboxTests(QueryBudgetTestCase):
+    """Test runs use the locmem backend: delivered messages land in mail.outbox"""
+
+    def setUp(self):
+        super().setUp()
+        # Only the message queued by the test is due
+        OutboundEmail.objects.filter(status='queued').update(status='sent')
+        self.booking = self.data['bookings'][0]
+
+    def enqueue(self):
+        response = self.client.post(f'/api/v1/bookings/send-email-confirmation/{self.booking.pk}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertEqual(mail.outbox, [])
+        return response.data
+
+    def status(self, queued):
+        return self.client.get(queued['status_url']).data
+
+    def test_worker_delivers_queued_email(self):
+        queued = self.enqueue()
+        call_command('send_queued_emails', '--once', stdout=io.StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.booking.client_email])
+        self.assertIn(self.booking.villa.name, mail.outbox[0].subject)
+        status = self.status(queued)
+        self.assertEqual((status['status'], status['attempts']), ('sent', 1))
+        self.assertIsNotNone(status['sent_at'])
+
+    def test_failures_back_off_then_give_up(self):
+        queued = self.enqueue()
+        email = OutboundEmail.objects.get(pk=queued['id'])
+        failing = patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=OSError('Connection refused'))
+
+        delays = []
+        with failing, self.assertLogs('bookings.emails', 'WARNING'):
+            for _ in range(2):
+                started = timezone.now()
+                result = emails.deliver_due_emails(max_attempts=3)
+                self.assertEqual(result, {'sent': 0, 'retried': 1, 'failed': 0})
+                email.refresh_from_db()
+                delays.append(round((email.next_attempt_at - started).total_seconds()))
+                # Not due again until the backoff has passed
+                self.assertEqual(emails.deliver_due_emails(max_attempts=3)['retried'], 0)
+                OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(emails.deliver_due_emails(max_attempts=3)['failed'], 1)
+
+        self.assertEqual(delays, [30, 60])
+        status = self.status(queued)
+        self.assertEqual((status['status'], status['attempts']), ('failed', 3))
+        self.assertEqual(status['last_error'], 'Connection refused')
+        self.assertIsNone(status['next_attempt_at'])
+        self.assertEqual(mail.outbox, [])
+
+
+class SpecialDayPricingTests(QueryBudgetTestCase):
+    # No year-specific holidays in 2031; 26 Jan is the built-in Republic Day
+    holiday = date(2031, 1, 26)
+    special_day = date(2031, 6, 10)
+    ordinary_day = date(2031, 6, 11)
+
+    def setUp(self):
+        super().setUp()
+        GlobalSpecialDay.objects.create(name='Anniversary', day=10, month=6, year=2031)
+
+    def pricer(self, **fields):
+        fields = {
+            'price_per_night': Decimal('10000'), 'weekend_price': Decimal('14000'),
+            'special_day_price': Decimal('18000'), 'weekend_days': [self.special_day.weekday()], **fields,
+        }
+        return VillaPricer(Villa(name='Pricing', location='Goa', max_guests=4, **fields))
+
+    def test_special_days_use_special_day_price(self):
+        pricer = self.pricer()
+        self.assertEqual(pricer.price_and_type_for_date(self.special_day), (Decimal('18000'), 'special_day'))
+        self.assertEqual(pricer.price_and_type_for_date(self.holiday), (Decimal('18000'), 'special_day'))
+        self.assertEqual(pricer.price_and_type_for_date(self.ordinary_day), (Decimal('10000'), 'base'))
+
+    def test_special_price_range_wins(self):
+        pricer = self.pricer(special_prices=[
+            {'start_date': '2031-06-01', 'end_date': '2031-06-30', 'price': 25000, 'name': 'June'},
+        ])
+        self.assertEqual(pricer.price_and_type_for_date(self.special_day), (Decimal('25000'), 'special'))
+
+    def test_without_special_day_price_falls_back(self):
+        pricer = self.pricer(special_day_price=None)
+        # special_day is a weekend day for this villa, the holiday is not
+        self.assertEqual(pricer.price_and_type_for_date(self.special_day), (Decimal('14000'), 'weekend'))
+        self.assertEqual(pricer.price_and_type_for_date(self.holiday), (Decimal('10000'), 'base'))
+
+    def test_global_special_day_changes_clear_the_cache(self):
+        self.assertNotIn(self.ordinary_day, special_day_dates(2031))
+        with self.assertNumQueries(0):
+            special_day_dates(2031)
+
+        added = GlobalSpecialDay.objects.create(name='Festival', day=11, month=6)
+        self.assertIn(self.ordinary_day, special_day_dates(2031))
+        self.assertEqual(self.pricer().price_and_type_for_date(self.ordinary_day)[1], 'special_day')
+
+        added.delete()
+        self.assertNotIn(self.ordinary_day, special_day_dates(2031))
+        self.assertEqual(self.pricer().price_and_type_for_date(self.ordinary_day)[1], 'base')
+
+
+class BookingReminderTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        # Well past the seeded bookings
+        self.today = self.data['today'] + timedelta(days=400)
+        tomorrow = self.today + timedelta(days=1)
+        villas = self.data['villas']
+        self.booked = self.create(villas[0], tomorrow, client_email='booked@example.com')
+        self.create(villas[1], tomorrow, client_email='blocked@example.com', status='blocked')
+        self.create(villas[2], tomorrow, client_email='')
+
+    def create(self, villa, check_in, **fields):
+        return Booking.objects.create(
+            villa=villa, client_name='Reminder', client_phone='9000000000',
+            check_in=check_in, check_out=check_in + timedelta(days=2),
+            created_by=self.data['staff'], **fields,
+        )
+
+    def run_command(self):
+        call_command('send_booking_reminders', '--date', self.today.isoformat(), stdout=io.StringIO())
+
+    def test_rerun_sends_each_reminder_once(self):
+        self.run_command()
+        self.run_command()
+
+        self.assertEqual(sorted(message.subject.split(' - ')[0] for message in mail.outbox),
+                         ['Check-in Tomorrow', 'Payment Reminder'])
+        self.assertEqual({message.to[0] for message in mail.outbox}, {'booked@example.com'})
+        reminders = OutboundEmail.objects.filter(reference_date__isnull=False)
+        self.assertEqual(
+            sorted(reminders.values_list('booking_id', 'kind', 'status')),
+            [(self.booked.pk, 'checkin_reminder', 'sent'), (self.booked.pk, 'payment_due', 'sent')],
+        )
+
+    def test_reminder_queued_by_an_overlapping_run_is_skipped(self):
+        real_get_template = emails.get_template
+
+        def overlapping_run(name):
+            # The other run inserts after this one has read the sent-log
+            if not OutboundEmail.objects.filter(kind='checkin_reminder').exists():
+                OutboundEmail.objects.create(
+                    booking=self.booked, kind='checkin_reminder', reference_date=self.booked.check_in,
+                    to_email=self.booked.client_email, subject='Other run', body='...', status='sending',
+                )
+            return real_get_template(name)
+
+        with patch.object(emails, 'get_template', side_effect=overlapping_run):
+            queued = emails.queue_reminders(self.today, list(emails.REMINDER_TEMPLATES))
+
+        self.assertEqual([(email.kind, email.booking_id) for email in queued], [('payment_due', self.booked.pk)])
+        self.assertTrue(all(email.pk for email in queued))
+        self.assertEqual(OutboundEmail.objects.filter(booking=self.booked).count(), 2)
+
+
+# Streams poll once and close instead of waiting for more events
+@override_settings(SSE_MAX_STREAM_SECONDS=0)
+class BookingEventStreamTests(QueryBudgetTestCase):
+    def open_stream(self, client, **params):
+        response = client.get('/api/v1/bookings/events/', params)
+        body = b''.join(response.streaming_content).decode() if response.streaming else None
+        return response, body
+
+    def test_ticket_opens_one_stream(self):
+        ticket = self.client.post('/api/v1/bookings/events/ticket/').data['ticket']
+        response, body = self.open_stream(self.api_client(), ticket=ticket)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(body.startswith('retry:'))
+        self.assertIn('event: reconnect', body)
+
+        response, _ = self.open_stream(self.api_client(), ticket=ticket)
+        self.assertEqual(response.status_code, 401)
+
+    def test_resumes_after_last_event_id(self):
+        last_id = BookingEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        booking = self.data['bookings'][0]
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.notes = 'Late arrival'
+            booking.save()
+        _, body = self.open_stream(self.client, last_event_id=last_id)
+        self.assertIn('event: booking.updated', body)
+        self.assertIn(f'"booking_id": {booking.pk}', body)
+
+    def test_moved_booking_invalidates_old_range_without_rereading(self):
+        booking = Booking.objects.get(pk=self.data['bookings'][0].pk)
+        old_check_in = booking.check_in
+        booking.check_in += timedelta(days=500)
+        booking.check_out += timedelta(days=500)
+        with self.captureOnCommitCallbacks(execute=True), self.assertMaxQueries(20) as captured:
+            booking.save()
+        self.assertFalse([q for q in captured.captured_queries if q['sql'].startswith('SELECT "bookings_booking"')])
+
+        event = BookingEvent.objects.order_by('-id').first()
+        self.assertEqual(event.type, 'booking.updated')
+        self.assertEqual(event.payload['invalidate']['start'], old_check_in.isoformat())
+        self.assertEqual(event.payload['invalidate']['end'], booking.check_out.isoformat())
+
+    @override_settings(SSE_MAX_STREAMS=0)
+    def test_stream_limit(self):
+        response, _ = self.open_stream(self.client)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+
+# The async views under /async/ next to the sync ones, whichever ASYNC_VIEWS picks
+urlpatterns = [
+    path('async/public/availability/', async_views.public_availability),
+    path('async/bookings/dashboard-overview/', async_views.dashboard_overview),
+    path('async/bookings/calculate-price/', async_views.calculate_price),
+    path('async/bookings/events/', async_views.booking_events),
+    path('', include('config.urls')),
+]
+
+
+# Committed data: the async views' queries and the stream's
+# close_old_connections() run outside the test transaction
+@override_settings(ROOT_URLCONF='bookings.tests', SSE_MAX_STREAM_SECONDS=0)
+class AsyncViewParityTests(TransactionTestCase):
+    def setUp(self):
+        reset_process_caches()
+        self.data = seed_dataset(bookings_per_villa=4)
+        self.client = api_client(self.data['staff'])
+        token = RefreshToken.for_user(self.data['staff']).access_token
+        # Django 5.0.1's AsyncClient drops headers given to the constructor
+        self.auth = {'Authorization': f'Bearer {token}'}
+        self.async_client = AsyncClient()
+
+    def assertSameJSON(self, async_response, sync_response):
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.json(), sync_response.json())
+
+    async def test_public_availability(self):
+        today = self.data['today']
+        params = {'start': today.isoformat(), 'end': (today + timedelta(days=60)).isoformat()}
+        response = await self.async_client.get('/async/public/availability/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertSameJSON(response, await sync_to_async(Client().get)('/api/v1/public/availability/', params))
+
+        response = await self.async_client.get('/async/public/availability/', {'start': 'soon'})
+        self.assertEqual(response.status_code, 400)
+        self.assertSameJSON(response, await sync_to_async(Client().get)(
+            '/api/v1/public/availability/', {'start': 'soon'},
+        ))
+
+    async def test_dashboard_overview(self):
+        response = await self.async_client.get('/async/bookings/dashboard-overview/', headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        await sync_to_async(reset_process_caches)()
+        self.assertSameJSON(response, await sync_to_async(self.client.get)('/api/v1/bookings/dashboard-overview/'))
+
+        response = await self.async_client.get('/async/bookings/dashboard-overview/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+    async def test_calculate_price(self):
+        today = self.data['today']
+        request = {
+            'villa': self.data['villas'][0].pk,
+            'check_in': (today + timedelta(days=15)).isoformat(),
+            'check_out': (today + timedelta(days=60)).isoformat(),
+        }
+        for data in (request, {**request, 'villa': 0}, {'villa': request['villa']}):
+            with self.subTest(data=data):
+                response = await self.async_client.post(
+                    '/async/bookings/calculate-price/', data, content_type='application/json', headers=self.auth,
+                )
+                self.assertSameJSON(response, await sync_to_async(self.client.post)(
+                    '/api/v1/bookings/calculate-price/', data, format='json',
+                ))
+
+    async def test_booking_events(self):
+        last_id = await BookingEvent.objects.order_by('-id').values_list('id', flat=True).afirst()
+        booking = self.data['bookings'][0]
+        booking.notes = 'Late arrival'
+        await sync_to_async(booking.save)()
+
+        params = {'last_event_id': last_id or 0}
+        response = await self.async_client.get('/async/bookings/events/', params, headers=self.auth)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertIn('event: booking.updated', body)
+
+        sync_response = await sync_to_async(self.client.get)('/api/v1/bookings/events/', params)
+        self.assertEqual(body, await sync_to_async(lambda: b''.join(sync_response.streaming_content).decode())())
+
+
+class PublicAvailabilityQueryBudgetTests(QueryBudgetTestCase):
+    def test_public_availability(self):
+        today = self.data['today']
+        response = self.assertGetWithin(
+            3, '/api/v1/public/availability/', client=self.api_client(),
+            start=today.isoformat(), end=(today + timedelta(days=90)).isoformat(),
+        )
+        self.assertTrue(response.json())
+
+
+# The manifest storage needs collectstatic; the admin pages only need URLs
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class BookingAdminQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        reset_process_caches()
+        admin = get_user_model().objects.create_superuser(username='root', name='Root', password='pass')
+        self.admin_client = Client(SERVER_NAME='localhost')
+        self.admin_client.force_login(admin)
+
+    def test_booking_changelist(self):
+        self.assertGetWithin(7, '/admin/bookings/booking/', client=self.admin_client)
+
+    def test_outbound_email_changelist(self):
+        self.assertGetWithin(5, '/admin/bookings/outboundemail/', client=self.admin_client)
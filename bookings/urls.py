@@ -1,6 +1,7 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 # Router configuration
 
@@ -11,15 +12,29 @@ router.register(r'', views.BookingViewSet, basename='booking')
 
 urlpatterns = [
     # Dashboard endpoints - MUST come before router.urls
-    path('dashboard-overview/', views.dashboard_overview, name='dashboard_overview'),
+    path(
+        'dashboard-overview/',
+        async_views.dashboard_overview if settings.ASYNC_VIEWS else views.dashboard_overview,
+        name='dashboard_overview',
+    ),
     path('recent-bookings/', views.recent_bookings, name='recent_bookings'),
     path('revenue-chart/', views.revenue_chart, name='revenue_chart'),
     path('villa-performance/', views.villa_performance, name='villa_performance'),
+    path('booking-sources/', views.booking_sources, name='booking_sources'),
     path('revenue-candles/', views.revenue_candles, name='revenue_candles'),
+    path('receivables/', views.receivables, name='receivables'),
+    path('dashboard-bundle/', views.dashboard_bundle, name='dashboard_bundle'),
     # Explicitly register calculate-price to avoid router issues - MOVED TO CONFIG/URLS.PY
     # path('calculate-price/', views.calculate_price_view, name='calculate-price'),
     
     path('send-email-confirmation/<int:pk>/', views.send_email_confirmation, name='send-email-confirmation'),
+    path('emails/<int:pk>/', views.email_status, name='email-status'),
+    path('events/ticket/', views.booking_events_ticket, name='booking_events_ticket'),
+    path(
+        'events/',
+        async_views.booking_events if settings.ASYNC_VIEWS else views.booking_events,
+        name='booking_events',
+    ),
     
     # Router URLs (CRUD operations)
     path('', include(router.urls)),
@@ -1,87 +1,79 @@
+import time
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Sum, Count
+from django.db.models import Q
 from django.utils import timezone
-from datetime import date, timedelta
 from .models import Booking
 from .serializers import BookingSerializer, BookingListSerializer
 from villas.models import Villa
+from .pricing import VillaPricer
+from config.db_router import read_replica
+from .analytics_cache import cached_analytics
 
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def calculate_price_view(request):
+def parse_price_request(data):
     """
-    Stand-alone view for price calculation
+    Validate a calculate-price body.
+    Returns (villa_id, check_in, check_out, None) or (None, None, None, error).
     """
-    from decimal import Decimal
-    from datetime import datetime, timedelta
-    
-    villa_id = request.data.get('villa')
-    check_in_str = request.data.get('check_in')
-    check_out_str = request.data.get('check_out')
+    from datetime import datetime
+
+    villa_id = data.get('villa')
+    check_in_str = data.get('check_in')
+    check_out_str = data.get('check_out')
     
     # Validation
     if not all([villa_id, check_in_str, check_out_str]):
-        return Response(
-            {'error': 'villa, check_in, and check_out are required'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    
-    try:
-        villa = Villa.objects.get(id=villa_id)
-    except Villa.DoesNotExist:
-        return Response(
-            {'error': 'Villa not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
+        return None, None, None, 'villa, check_in, and check_out are required'
     
     try:
         check_in = datetime.strptime(check_in_str, '%Y-%m-%d').date()
         check_out = datetime.strptime(check_out_str, '%Y-%m-%d').date()
-    except ValueError:
-        return Response(
-            {'error': 'Invalid date format. Use YYYY-MM-DD'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+    except (TypeError, ValueError):
+        return None, None, None, 'Invalid date format. Use YYYY-MM-DD'
     
     if check_out <= check_in:
-        return Response(
-            {'error': 'Check-out must be after check-in'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    
-    # Calculate total using BookingViewSet logic (replicated for simplicity or imported)
-    # Reusing the private helper from BookingViewSet instance is hard.
-    # Let's just copy the logic or static method it. 
-    # For now, let's just use the logic directly.
-    
-    total = Decimal('0')
-    current_date = check_in
-    
-    # Instantiate viewset to use helper? No, ugly.
-    # Copy helper logic or refactor. 
-    # Let's copy the logic to ensure it works.
-    
-    while current_date < check_out:
-        price = _get_price_for_date_helper(villa, current_date)
-        total += price
-        current_date += timedelta(days=1)
-    
+        return None, None, None, 'Check-out must be after check-in'
+
+    return villa_id, check_in, check_out, None
+
+
+def price_quote(total, check_in, check_out) -> dict:
     nights = (check_out - check_in).days
-    
-    return Response({
+    return {
         'total_payment': str(total),
         'nights': nights,
         'price_per_night_avg': str(round(total / nights, 2)) if nights > 0 else '0'
-    })
+    }
 
-from django.core.mail import send_mail
-from django.conf import settings
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def calculate_price_view(request):
+    """
+    Stand-alone view for price calculation
+    """
+    villa_id, check_in, check_out, error = parse_price_request(request.data)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        villa = Villa.objects.get(id=villa_id)
+    except (Villa.DoesNotExist, ValueError):
+        return Response(
+            {'error': 'Villa not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    total = VillaPricer(villa).total(check_in, check_out)
+    return Response(price_quote(total, check_in, check_out))
+    
+from django.urls import reverse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -93,107 +85,85 @@ from .models import Booking
 @permission_classes([IsAuthenticated])
 def send_email_confirmation(request, pk):
     """
-    Send booking confirmation email to the client
+    Queue the booking confirmation email to the client
+    POST /api/v1/bookings/send-email-confirmation/{id}/
+
+    Returns 202 immediately; the send_queued_emails worker delivers it.
+    Poll status_url for queued / sending / sent / failed.
     """
-    booking = get_object_or_404(Booking, pk=pk)
+    from .emails import enqueue_booking_confirmation
     
-    subject = f"Booking Confirmation - {booking.villa.name}"
-    
-    # Construct Email Body
-    message = f"""
-Dear {booking.client_name},
-
-Thank you for booking with VacationBnA!
-
-Here are your booking details:
-Villa: {booking.villa.name}
-Check-in: {booking.check_in.strftime('%d %b %Y')}
-Check-out: {booking.check_out.strftime('%d %b %Y')}
-Guests: {booking.number_of_guests}
-
-Payment Details:
-Total Amount: ₹{booking.total_payment}
-Advance Paid: ₹{booking.advance_payment}
-Pending Amount: ₹{booking.pending_payment}
-
-Location: {booking.villa.location}
-
-If you have any questions, please reply to this email.
-
-Best regards,
-VacationBnA Team
-    """.strip()
+    booking = get_object_or_404(Booking.objects.select_related('villa'), pk=pk)
     
     if not booking.client_email:
         return Response({'message': 'No client email provided for this booking.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [booking.client_email],
-            fail_silently=False,
-        )
-        return Response({'message': f'Email sent successfully to {booking.client_email}'})
+    email = enqueue_booking_confirmation(booking)
+    return Response(
+        {
+            'message': f'Email queued for {booking.client_email}',
+            'id': email.id,
+            'status': email.status,
+            'status_url': reverse('bookings:email-status', args=[email.id]),
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
         
 
-    except Exception as e:
-        print(f"Email Error: {str(e)}")
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def email_status(request, pk):
+    """
+    Delivery status of a queued email
+    GET /api/v1/bookings/emails/{id}/
+    """
+    from .models import OutboundEmail
 
-def _get_price_for_date_helper(villa, date):
-    from decimal import Decimal
-    from datetime import datetime
+    email = get_object_or_404(OutboundEmail, pk=pk)
+    return Response({
+        'id': email.id,
+        'booking': email.booking_id,
+        'kind': email.kind,
+        'to_email': email.to_email,
+        'status': email.status,
+        'attempts': email.attempts,
+        'next_attempt_at': email.next_attempt_at if email.status == 'queued' else None,
+        'last_error': email.last_error,
+        'sent_at': email.sent_at,
+        'created_at': email.created_at,
+    })
     
-    # Priority 1: Check special date pricing
-    if villa.special_prices:
-        try:
-            special_prices = villa.special_prices
-            if isinstance(special_prices, list):
-                for special_price in special_prices:
-                    if not isinstance(special_price, dict):
-                        continue
-                    
-                    start_date_str = special_price.get('start_date')
-                    end_date_str = special_price.get('end_date')
-                    price = special_price.get('price')
+from datetime import datetime, timedelta, timezone as dt_timezone
+from rest_framework import filters
+from .pagination import StableOrderingFilter, StandardResultsSetPagination
                     
-                    if not all([start_date_str, end_date_str, price]):
-                        continue
-                    
-                    try:
-                        if isinstance(start_date_str, str):
-                            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                        else:
-                            start_date = start_date_str
-                            
-                        if isinstance(end_date_str, str):
-                            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                        else:
-                            end_date = end_date_str
-                        
-                        if start_date <= date <= end_date:
-                            return Decimal(str(price))
-                    except (ValueError, TypeError):
-                        continue
-        except (TypeError, AttributeError):
-            pass
-    
-    # Priority 2: Check weekend pricing
-    day_of_week = date.weekday()
-    is_configured_weekend = (
-        villa.weekend_days and 
-        day_of_week in villa.weekend_days
-    )
-    
-    if is_configured_weekend and villa.weekend_price:
-        return villa.weekend_price
-    
-    return villa.price_per_night
+CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
 
 
-from .pagination import StandardResultsSetPagination
+def format_change_cursor(position) -> str:
+    """(changed_at, id) -> '<microseconds since epoch>-<id>'"""
+    changed_at, object_id = position
+    return f'{(changed_at - CURSOR_EPOCH) // timedelta(microseconds=1)}-{object_id}'
+
+
+def parse_change_cursor(value):
+    """Inverse of format_change_cursor; also accepts the older ISO timestamp cursors"""
+    from django.utils.dateparse import parse_datetime
+
+    micros, _, object_id = value.partition('-')
+    if micros.isdigit() and object_id.isdigit():
+        return CURSOR_EPOCH + timedelta(microseconds=int(micros)), int(object_id)
+
+    try:
+        changed_at = parse_datetime(value)
+    except ValueError:
+        return None
+    if changed_at is None:
+        return None
+    if timezone.is_naive(changed_at):
+        changed_at = timezone.make_aware(changed_at, dt_timezone.utc)
+    return changed_at, 0
+
 
 class BookingViewSet(viewsets.ModelViewSet):
     """
@@ -202,6 +172,10 @@ class BookingViewSet(viewsets.ModelViewSet):
     queryset = Booking.objects.select_related('villa', 'created_by').all()
     serializer_class = BookingSerializer
     pagination_class = StandardResultsSetPagination
+    # ?ordering=-pending_payment; other fields are ignored and keep the default order
+    filter_backends = [filters.SearchFilter, StableOrderingFilter]
+    ordering_fields = ['check_in', 'check_out', 'created_at', 'total_payment', 'pending_payment']
+    ordering = ['-check_in', '-id']
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -247,9 +221,35 @@ class BookingViewSet(viewsets.ModelViewSet):
                 # Current/Upcoming: Check-out date is today or in the future
                 queryset = queryset.filter(check_out__gte=today)
         
+        # Outstanding balance (pending_payment is a generated column)
+        has_pending = self.request.query_params.get('has_pending', None)
+        pending_min = self.request.query_params.get('pending_min', None)
+        pending_max = self.request.query_params.get('pending_max', None)
+
+        if has_pending in ('true', '1'):
+            queryset = queryset.filter(pending_payment__gt=0)
+        elif has_pending in ('false', '0'):
+            queryset = queryset.filter(pending_payment__lte=0)
+
+        if pending_min:
+            queryset = queryset.filter(pending_payment__gte=self._amount_param('pending_min', pending_min))
+
+        if pending_max:
+            queryset = queryset.filter(pending_payment__lte=self._amount_param('pending_max', pending_max))
+
         return queryset
     
+    def _amount_param(self, name, value):
+        from decimal import Decimal, InvalidOperation
+        from rest_framework.exceptions import ValidationError
+
+        try:
+            return Decimal(value)
+        except InvalidOperation:
+            raise ValidationError({name: 'Must be a number.'})
+
     @action(detail=False, methods=['get'])
+    @read_replica
     def calendar(self, request):
         """
         Get bookings for calendar view
@@ -290,6 +290,129 @@ class BookingViewSet(viewsets.ModelViewSet):
             })
         
         return Response(calendar_data)
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Delta sync feed of bookings changed since a cursor
+        GET /api/v1/bookings/changes/?since=<cursor>&limit=500
+
+        Returns bookings created/updated after the cursor plus ids of deleted
+        bookings, oldest first. Pass the returned cursor on the next poll;
+        omit since for an initial full sync. Keep polling while has_more is true.
+
+        The cursor is a (changed_at, id) position, so a page boundary between
+        rows with the same timestamp loses nothing. Timestamps are taken
+        before commit, so once caught up the cursor stays
+        CHANGES_FEED_OVERLAP_SECONDS behind now and the next poll repeats that
+        window to pick up slow transactions; apply changes idempotently.
+        """
+        from django.conf import settings
+        from django.db.models import BooleanField, F, Value
+        from .models import BookingTombstone
+
+        since = None
+        since_str = request.query_params.get('since')
+        if since_str:
+            since = parse_change_cursor(since_str)
+            if since is None:
+                return Response(
+                    {'error': 'Invalid since cursor. Use the cursor returned by the previous poll'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        try:
+            limit = min(int(request.query_params.get('limit', 500)), 1000)
+        except ValueError:
+            limit = 500
+
+        updated = Booking.objects.order_by()
+        deleted = BookingTombstone.objects.order_by()
+        if since is not None:
+            since_at, since_id = since
+            updated = updated.filter(Q(updated_at__gt=since_at) | Q(updated_at=since_at, id__gt=since_id))
+            deleted = deleted.filter(Q(deleted_at__gt=since_at) | Q(deleted_at=since_at, booking_id__gt=since_id))
+
+        # One indexed range query over both tables; empty when nothing changed
+        change_rows = list(
+            updated.annotate(
+                object_id=F('id'),
+                changed_at=F('updated_at'),
+                is_deleted=Value(False, output_field=BooleanField()),
+            ).values_list('object_id', 'changed_at', 'is_deleted').union(
+                deleted.annotate(
+                    object_id=F('booking_id'),
+                    changed_at=F('deleted_at'),
+                    is_deleted=Value(True, output_field=BooleanField()),
+                ).values_list('object_id', 'changed_at', 'is_deleted'),
+                all=True,
+            ).order_by('changed_at', 'object_id')[:limit + 1]
+        )
+
+        has_more = len(change_rows) > limit
+        change_rows = change_rows[:limit]
+
+        updated_ids = [object_id for object_id, _, is_deleted in change_rows if not is_deleted]
+        deleted_ids = [object_id for object_id, _, is_deleted in change_rows if is_deleted]
+
+        updated_data = []
+        if updated_ids:
+            bookings = Booking.objects.select_related('villa').filter(id__in=updated_ids)
+            by_id = {booking.id: booking for booking in bookings}
+            updated_data = BookingListSerializer(
+                [by_id[i] for i in updated_ids if i in by_id], many=True
+            ).data
+
+        position = (change_rows[-1][1], change_rows[-1][0]) if change_rows else since
+        if not has_more:
+            # Caught up: stay behind rows that may still be committing
+            floor = (timezone.now() - timedelta(seconds=settings.CHANGES_FEED_OVERLAP_SECONDS), 0)
+            position = min(position, floor) if position is not None else floor
+            if since is not None:
+                position = max(position, since)
+
+        return Response({
+            'cursor': format_change_cursor(position),
+            'has_more': has_more,
+            'updated': updated_data,
+            'deleted': deleted_ids,
+        })
+
+    @action(detail=False, methods=['post'], url_path='bulk-import')
+    def bulk_import(self, request):
+        """
+        Import many bookings at once from JSON or CSV
+        POST /api/v1/bookings/bulk-import/?dry_run=1
+        Body: [{"villa": ID or name, "client_name": ..., "check_in": ..., ...}]
+              or multipart with a "file" (.csv / .json, override with ?file_format=csv)
+
+        Rows with errors are reported and skipped; valid rows are still created.
+        """
+        from .importers import ImportFormatError, coerce_rows, import_bookings, parse_payload
+
+        dry_run = request.query_params.get('dry_run') in ('1', 'true', 'True')
+        upload = request.FILES.get('file')
+
+        try:
+            if upload is not None:
+                fmt = request.query_params.get('file_format') or (
+                    'csv' if upload.name.lower().endswith('.csv') else 'json'
+                )
+                rows = parse_payload(upload.read().decode('utf-8-sig'), fmt)
+            else:
+                rows = coerce_rows(request.data)
+        except (ImportFormatError, UnicodeDecodeError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_bookings(rows, created_by=request.user, dry_run=dry_run)
+
+        if report['created']:
+            response_status = status.HTTP_201_CREATED
+        elif report['errors']:
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_200_OK
+        return Response(report, status=response_status)
     
     @action(detail=False, methods=['post'], url_path='calculate-price')
     def calculate_price(self, request):
@@ -335,88 +458,12 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Calculate total and breakdown using same logic as Booking model
-        total = Decimal('0')
-        current_date = check_in
-        breakdown = {
-            'total': Decimal('0'),
-            'nights': [],
-            'base_nights': 0,
-            'weekend_nights': 0,
-            'special_nights': 0,
-        }
-        
-        while current_date < check_out:
-            # Get price for this specific date using priority hierarchy
-            price = self._get_price_for_date(villa, current_date)
-            total += price
-            
-            # Determine price type for this night
-            price_type = 'base'
-            
-            # Check if it's a special day
-            if villa.special_prices:
-                try:
-                    special_prices = villa.special_prices
-                    if isinstance(special_prices, list):
-                        for special_price in special_prices:
-                            if not isinstance(special_price, dict):
-                                continue
-                            
-                            start_date_str = special_price.get('start_date')
-                            end_date_str = special_price.get('end_date')
-                            sp_price = special_price.get('price')
-                            
-                            if not all([start_date_str, end_date_str, sp_price]):
-                                continue
-                            
-                            try:
-                                if isinstance(start_date_str, str):
-                                    start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                                else:
-                                    start_date = start_date_str
-                                    
-                                if isinstance(end_date_str, str):
-                                    end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                                else:
-                                    end_date = end_date_str
-                                
-                                if start_date <= current_date <= end_date:
-                                    price_type = 'special'
-                                    break
-                            except (ValueError, TypeError):
-                                continue
-                except (TypeError, AttributeError):
-                    pass
-            
-            # Check if it's a weekend (only if not already special)
-            if price_type != 'special':
-                day_of_week = current_date.weekday()
-                is_configured_weekend = (
-                    villa.weekend_days and 
-                    day_of_week in villa.weekend_days
-                )
-                if is_configured_weekend and villa.weekend_price:
-                    price_type = 'weekend'
-            
-            # Add to breakdown
-            breakdown['nights'].append({
-                'date': current_date.isoformat(),
-                'price': float(price),
-                'type': price_type
-            })
-            
-            if price_type == 'base':
-                breakdown['base_nights'] += 1
-            elif price_type == 'weekend':
-                breakdown['weekend_nights'] += 1
-            elif price_type == 'special':
-                breakdown['special_nights'] += 1
-            
-            current_date += timedelta(days=1)
+        # Same pricing engine as Booking.save(); nights are memoised per pricer
+        pricer = VillaPricer(villa)
+        breakdown = pricer.breakdown(check_in, check_out)
+        total = pricer.total(check_in, check_out)
         
         nights = (check_out - check_in).days
-        breakdown['total'] = float(total)
         
         return Response({
             'total_payment': str(total),
@@ -425,510 +472,189 @@ class BookingViewSet(viewsets.ModelViewSet):
             'auto_calculated_price': breakdown
         })
     
-    def _get_price_for_date(self, villa, date):
-        """
-        Get the price for a specific date based on pricing priority.
-        Priority: Special Date Price > Weekend Price > Base Price
-        
-        Args:
-            villa: Villa instance
-            date: The date to get the price for
-            
-        Returns:
-            Decimal: The price for the given date
-        """
-        from decimal import Decimal
-        from datetime import datetime
-        
-        # Priority 1: Check special date pricing
-        if villa.special_prices:
-            try:
-                special_prices = villa.special_prices
-                if isinstance(special_prices, list):
-                    for special_price in special_prices:
-                        if not isinstance(special_price, dict):
-                            continue
-                            
-                        # Get start and end dates
-                        start_date_str = special_price.get('start_date')
-                        end_date_str = special_price.get('end_date')
-                        price = special_price.get('price')
-                        
-                        if not all([start_date_str, end_date_str, price]):
-                            continue
-                        
-                        # Parse dates
-                        try:
-                            if isinstance(start_date_str, str):
-                                start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                            else:
-                                start_date = start_date_str
-                                
-                            if isinstance(end_date_str, str):
-                                end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                            else:
-                                end_date = end_date_str
-                            
-                            # Check if current date falls within this special price range
-                            if start_date <= date <= end_date:
-                                return Decimal(str(price))
-                        except (ValueError, TypeError):
-                            # Skip invalid date formats
-                            continue
-            except (TypeError, AttributeError):
-                # If special_prices is not a valid list, skip
-                pass
-        
-        # Priority 2: Check weekend pricing
-        day_of_week = date.weekday()  # 0=Monday, 6=Sunday
-        is_configured_weekend = (
-            villa.weekend_days and 
-            day_of_week in villa.weekend_days
-        )
-        
-        if is_configured_weekend and villa.weekend_price:
-            return villa.weekend_price
-        
-        # Priority 3: Base price
-        return villa.price_per_night
-
 
 from rest_framework.decorators import api_view
 
 
 @api_view(['GET'])
+@read_replica
+@cached_analytics('dashboard_overview', params=('date',))
 def dashboard_overview(request):
     """
     Get comprehensive dashboard overview
     GET /api/v1/bookings/dashboard-overview/
     """
-    from decimal import Decimal
-    from django.db.models import Q, Count
-    
-    reference_date = request.query_params.get('date')
-    if reference_date:
-        today = date.fromisoformat(reference_date)
-    else:
-        today = date.today()
-    
-    # Villa statistics
-    total_villas = Villa.objects.count()
-    active_villas = Villa.objects.filter(status='active').count()
-    maintenance_villas = Villa.objects.filter(status='maintenance').count()
+    from .dashboard import overview_payload
     
-    # Today's activity
-    today_check_ins = Booking.objects.filter(
-        check_in=today,
-        status='booked'
-    ).count()
-    
-    today_check_outs = Booking.objects.filter(
-        check_out=today,
-        status='booked'
-    ).count()
-    
-    # Currently booked villas
-    currently_booked = Booking.objects.filter(
-        status='booked',
-        check_in__lte=today,
-        check_out__gt=today
-    ).values('villa').distinct().count()
-    
-    # Occupancy rate (currently booked / total active)
-    occupancy_rate = 0
-    if active_villas > 0:
-        occupancy_rate = round((currently_booked / active_villas) * 100, 1)
-    
-    # Upcoming bookings (next 7 days)
-    next_week = today + timedelta(days=7)
-    upcoming_bookings = Booking.objects.filter(
-        check_in__gte=today,
-        check_in__lte=next_week,
-        status='booked'
-    ).count()
-    
-    # This month's statistics
-    month_start = today.replace(day=1)
-    if today.month == 12:
-        month_end = today.replace(year=today.year + 1, month=1, day=1)
-    else:
-        month_end = today.replace(month=today.month + 1, day=1)
-    
-    month_bookings = Booking.objects.filter(
-        check_in__gte=month_start,
-        check_in__lt=month_end,
-        status='booked'
-    )
-    
-    total_bookings_this_month = month_bookings.count()
-    revenue_this_month = month_bookings.aggregate(
-        total=Sum('total_payment')
-    )['total'] or Decimal('0')
-    
-    # All-time statistics
-    total_bookings = Booking.objects.filter(status='booked').count()
-    total_revenue = Booking.objects.filter(status='booked').aggregate(
-        total=Sum('total_payment')
-    )['total'] or Decimal('0')
-    
-    # Average revenue per booking
-    avg_revenue = 0
-    if total_bookings > 0:
-        avg_revenue = float(total_revenue) / total_bookings
-    
-    # Active Clients (unique non-empty phone numbers)
-    total_customers = Booking.objects.filter(
-        status='booked'
-    ).exclude(
-        client_phone__isnull=True
-    ).exclude(
-        client_phone=''
-    ).values('client_phone').distinct().count()
-
-    previous_month_end = month_start
-    if month_start.month == 1:
-        previous_month_start = month_start.replace(year=month_start.year - 1, month=12, day=1)
-    else:
-        previous_month_start = month_start.replace(month=month_start.month - 1, day=1)
-
-    previous_month_bookings = Booking.objects.filter(
-        check_in__gte=previous_month_start,
-        check_in__lt=previous_month_end,
-        status='booked'
-    )
-    previous_month_revenue = previous_month_bookings.aggregate(
-        total=Sum('total_payment')
-    )['total'] or Decimal('0')
-
-    def calculate_change(current, previous):
-        current = float(current or 0)
-        previous = float(previous or 0)
-        if previous == 0:
-            return 100 if current > 0 else 0
-        return round(((current - previous) / previous) * 100, 1)
-
-    month_revenue_change = calculate_change(revenue_this_month, previous_month_revenue)
-
-    villa_month_totals = {
-        item['villa']: item
-        for item in month_bookings.values('villa').annotate(
-            bookings=Count('id'),
-            revenue=Sum('total_payment')
-        )
-    }
-
-    villa_revenue_this_month = []
-    for villa in Villa.objects.order_by('order', 'name'):
-        metrics = villa_month_totals.get(villa.id, {})
-        villa_revenue_this_month.append({
-            'villa_id': villa.id,
-            'villa_name': villa.name,
-            'status': villa.status,
-            'bookings_this_month': metrics.get('bookings', 0),
-            'revenue_this_month': str(metrics.get('revenue') or Decimal('0')),
-        })
-
-    return Response({
-        'villas': {
-            'total': total_villas,
-            'active': active_villas,
-            'maintenance': maintenance_villas,
-            'occupancy_rate': occupancy_rate,
-        },
-        'today': {
-            'check_ins': today_check_ins,
-            'check_outs': today_check_outs,
-            'currently_booked': currently_booked,
-        },
-        'bookings': {
-            'total': total_bookings,
-            'total_clients': total_customers,
-            'total_customers': total_customers,
-            'this_month': total_bookings_this_month,
-            'upcoming_7_days': upcoming_bookings,
-        },
-        'revenue': {
-            'total': str(total_revenue),
-            'this_month': str(revenue_this_month),
-            'average_per_booking': round(avg_revenue, 2),
-            'previous_month': str(previous_month_revenue),
-            'month_change_percentage': month_revenue_change,
-        },
-        'villa_revenue_this_month': villa_revenue_this_month,
-        'period': {
-            'month_start': month_start.isoformat(),
-            'month_end': (month_end - timedelta(days=1)).isoformat(),
-        },
-    })
+    return Response(overview_payload(request.query_params))
 
 
 @api_view(['GET'])
+@read_replica
+@cached_analytics('recent_bookings', params=('limit',))
 def recent_bookings(request):
     """
     Get recent bookings
     GET /api/v1/bookings/recent-bookings/?limit=10
     """
-    limit = int(request.query_params.get('limit', 10))
+    from .dashboard import recent_bookings_payload
     
-    # Optimize: Use values() to fetch only needed fields
-    bookings = Booking.objects.select_related('villa').order_by('-created_at')[:limit]
-    
-    bookings_data = []
-    for booking in bookings:
-        bookings_data.append({
-            'id': booking.id,
-            'villa': {
-                'id': booking.villa.id,
-                'name': booking.villa.name,
-            },
-            'client_name': booking.client_name,
-            'client_phone': booking.client_phone,
-            'check_in': booking.check_in,
-            'check_out': booking.check_out,
-            'status': booking.status,
-            'payment_status': booking.payment_status,
-            'total_payment': str(booking.total_payment) if booking.total_payment else None,
-            'advance_payment': str(booking.advance_payment) if booking.advance_payment else None,
-            'pending_payment': str(booking.pending_payment),
-            'created_at': booking.created_at,
-        })
-    
-    return Response(bookings_data)
+    return Response(recent_bookings_payload(request.query_params))
 
 
 @api_view(['GET'])
+@read_replica
+@cached_analytics('revenue_chart', params=('months',))
 def revenue_chart(request):
     """
     Get monthly revenue data for charts
     GET /api/v1/bookings/revenue-chart/?months=6
     """
-    from decimal import Decimal
-    from django.db.models.functions import TruncMonth
+    from .dashboard import revenue_chart_payload
     
-    months = int(request.query_params.get('months', 6))
-    today = date.today()
-    current_month = today.replace(day=1)
-
-    def add_months(source_date, offset):
-        month_index = source_date.month - 1 + offset
-        year = source_date.year + month_index // 12
-        month = month_index % 12 + 1
-        return source_date.replace(year=year, month=month, day=1)
-
-    start_date = add_months(current_month, -(months - 1))
-    
-    # Optimized: Single query with TruncMonth
-    # Note: SQLite has limited date function support compared to Postgres, 
-    # but TruncMonth works in recent Django versions for SQLite too.
-    
-    monthly_data = Booking.objects.filter(
-        check_in__gte=start_date,
-        check_in__lte=today,
-        status='booked'
-    ).annotate(
-        month=TruncMonth('check_in')
-    ).values('month').annotate(
-        bookings=Count('id'),
-        revenue=Sum('total_payment')
-    ).order_by('month')
-    
-    # Format for frontend (ensure all months are present filling gaps if needed)
-    # For simplicity/speed in this context, we map the results
-    
-    data_map = {item['month'].strftime('%Y-%m'): item for item in monthly_data}
-    chart_data = []
-    
-    for i in range(months):
-        month_date = add_months(start_date, i)
-        key = month_date.strftime('%Y-%m')
-        
-        item = data_map.get(key, {})
-        chart_data.append({
-            'month': month_date.strftime('%b %Y'),
-            'bookings': item.get('bookings', 0),
-            'revenue': float(item.get('revenue', 0) or 0),
-        })
-    
-    return Response(chart_data)
+    return Response(revenue_chart_payload(request.query_params))
 
 
 @api_view(['GET'])
+@read_replica
+@cached_analytics('villa_performance')
 def villa_performance(request):
     """
     Get performance metrics for each villa
     GET /api/v1/bookings/villa-performance/
     """
-    from decimal import Decimal
-    from django.db.models import Sum, Count, Q, F, ExpressionWrapper, DurationField
+    from .dashboard import villa_performance_payload
     
-    # Optimized: Annotate metrics directly on Villa queryset
-    # This reduces N queries to 1 query
-    
-    performance_data = Villa.objects.annotate(
-        total_bookings=Count('bookings', filter=Q(bookings__status='booked')),
-        total_revenue=Sum('bookings__total_payment', filter=Q(bookings__status='booked')),
-        # Note: Calculating nights in DB is complex across different DB backends (SQLite vs Postgres)
-        # We will fetch basics efficiently and calculate nights if strictly needed, 
-        # or rely on pre-calculated 'nights' if we store it (we don't stored it generally).
-        # For compatibility/reliability, we'll keep nights basic or 0 for now as it wasn't critical.
-        # Alternatively, assume avg duration if strict accuracy isn't vital or re-add complexity if requested.
-    ).values(
-        'id', 'name', 'status', 'total_bookings', 'total_revenue'
-    ).order_by('-total_revenue')
-    
-    # Convert to list and format
-    result = []
-    for item in performance_data:
-        result.append({
-            'villa_id': item['id'],
-            'villa_name': item['name'],
-            'total_bookings': item['total_bookings'],
-            'total_revenue': float(item['total_revenue'] or 0),
-            'total_nights_booked': 0, # Optimization trade-off: skipped complex DB date diff for safety
-            'status': item['status'],
-        })
-    
-    return Response(result)
+    return Response(villa_performance_payload(request.query_params))
 
 
 @api_view(['GET'])
+@read_replica
+@cached_analytics('booking_sources')
 def booking_sources(request):
     """
     Get booking sources breakdown
     GET /api/v1/bookings/booking-sources/
     """
-    from django.db.models import Count
+    from .dashboard import booking_sources_payload
     
-    # Get count by source
-    sources = Booking.objects.filter(
-        status='booked'
-    ).values('booking_source').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    total_bookings = Booking.objects.filter(status='booked').count()
-    
-    sources_data = []
-    for source in sources:
-        source_name = source['booking_source'] or 'unknown'
-        count = source['count']
-        percentage = round((count / total_bookings * 100), 1) if total_bookings > 0 else 0
-        
-        # Get human-readable name
-        source_display = dict(Booking.SOURCE_CHOICES).get(source_name, 'Unknown')
-        
-        sources_data.append({
-            'source': source_name,
-            'source_display': source_display,
-            'count': count,
-            'percentage': percentage,
-        })
-    
-    return Response(sources_data)
+    return Response(booking_sources_payload(request.query_params))
 
 
 @api_view(['GET'])
+@read_replica
+@cached_analytics('revenue_candles', params=('range',))
 def revenue_candles(request):
     """
     Get OHLC revenue data for trading-style charts
     GET /api/v1/bookings/revenue-candles/?range=1M
     """
-    from decimal import Decimal
-    from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
-    from django.db.models import Sum, Count
-    
-    time_range = request.query_params.get('range', '1M')
-    today = date.today()
+    from .dashboard import revenue_candles_payload
     
-    # Determine start date and truncation level
-    if time_range == '7D':
-        start_date = today - timedelta(days=7)
-        trunc_func = TruncDay('check_in')
-        freq = 'D' # Daily
-    elif time_range == '1M':
-        start_date = today - timedelta(days=30)
-        trunc_func = TruncDay('check_in')
-        freq = 'D'
-    elif time_range == '6M':
-        start_date = today - timedelta(days=180)
-        trunc_func = TruncWeek('check_in')
-        freq = 'W'
-    elif time_range == '1Y':
-        start_date = today - timedelta(days=365)
-        trunc_func = TruncMonth('check_in')
-        freq = 'M'
-    else: # Default 1M
-        start_date = today - timedelta(days=30)
-        trunc_func = TruncDay('check_in')
-        freq = 'D'
-
-    # Query Data
-    data = Booking.objects.filter(
-        check_in__gte=start_date,
-        check_in__lte=today,
-        status='booked'
-    ).annotate(
-        period=trunc_func
-    ).values('period').annotate(
-        revenue=Sum('total_payment'),
-        volume=Count('id')
-    ).order_by('period')
-
-    # Convert to Dictionary for fast lookup
-    data_map = {item['period'].strftime('%Y-%m-%d'): item for item in data}
-    
-    # Generate continuous timeline
-    ohlc_data = []
-    
-    # Generate Date List
-    date_list = []
-    temp_curr = start_date
-    while temp_curr <= today:
-        date_list.append(temp_curr)
-        if freq == 'D':
-            temp_curr += timedelta(days=1)
-        elif freq == 'W':
-             temp_curr += timedelta(weeks=1)
-        elif freq == 'M':
-            if temp_curr.month == 12:
-                temp_curr = temp_curr.replace(year=temp_curr.year+1, month=1, day=1)
-            else:
-                temp_curr = temp_curr.replace(month=temp_curr.month+1, day=1)
+    return Response(revenue_candles_payload(request.query_params))
                 
     
-    prev_close = float(0) # Start from 0
     
-    for d in date_list:
-        d_str = d.strftime('%Y-%m-%d')
-        item = data_map.get(d_str)
+@api_view(['GET'])
+@read_replica
+@cached_analytics('receivables', params=('as_of', 'villa'))
+def receivables(request):
+    """
+    Outstanding balances by villa and by ageing bucket (days since check-out)
+    GET /api/v1/bookings/receivables/?as_of=YYYY-MM-DD&villa=ID
+    """
+    from .dashboard import receivables_payload
         
-        if item:
-            revenue = float(item['revenue'] or 0)
-            volume = item['volume']
-        else:
-            revenue = float(0)
-            volume = 0
+    try:
+        return Response(receivables_payload(request.query_params))
+    except ValueError:
+        return Response(
+            {'error': 'as_of must be YYYY-MM-DD and villa an id'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
             
-        # OHLC Calculation: Trend-based
-        # Open = Previous Close
-        # Close = Current Revenue
         
-        open_val = prev_close
-        close_val = revenue
+@api_view(['GET', 'POST'])
+@read_replica
+def dashboard_bundle(request):
+    """
+    Several dashboard sections in one request, evaluated concurrently
+    GET /api/v1/bookings/dashboard-bundle/?sections=dashboard-overview,revenue-chart&revenue-chart.months=12
+    POST /api/v1/bookings/dashboard-bundle/
+        {"sections": [{"name": "revenue-chart", "params": {"months": 12}}, "booking-sources"]}
         
-        # High/Low are just boundaries of the candle body for this simple representation
-        high_val = max(open_val, close_val)
-        low_val = min(open_val, close_val)
+    Without sections, returns all of them. Each section has 'data' (the
+    endpoint's response) or 'error' and 'status', plus 'ms' and 'queries'.
+    """
+    from .dashboard_bundle import parse_sections, run_sections
         
-        ohlc_data.append({
-            'time': d_str,
-            'open': open_val,
-            'high': high_val,
-            'low': low_val,
-            'close': close_val,
-            'volume': volume
-        })
+    data = request.query_params if request.method == 'GET' else request.data
+    requested, error = parse_sections(data)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
         
-        prev_close = close_val
+    # A profiled request (config.profiling) should show the real work in this thread
+    profiling = '_profile' in request.query_params
+    started = time.perf_counter()
+    sections = run_sections(requested, use_cache=not profiling, concurrent=not profiling)
+    return Response({
+        'sections': sections,
+        'total_ms': round((time.perf_counter() - started) * 1000, 1),
+    })
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import authentication_classes, renderer_classes
+from rest_framework.renderers import JSONRenderer
+from accounts.authentication import CachedJWTAuthentication, StreamTicketAuthentication
+from .events import EventStream, parse_last_event_id, stream_slots
+from .renderers import EventStreamRenderer
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def booking_events_ticket(request):
+    """
+    Single-use ticket for opening the event stream
+    POST /api/v1/bookings/events/ticket/
 
-    return Response(ohlc_data)
+    EventSource can't send the Authorization header; open
+    /api/v1/bookings/events/?ticket=<ticket> within expires_in seconds.
+    """
+    return Response({
+        'ticket': StreamTicketAuthentication.issue(request.user),
+        'expires_in': settings.SSE_TICKET_SECONDS,
+    })
+
+
+@api_view(['GET'])
+@authentication_classes([StreamTicketAuthentication, CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+@renderer_classes([EventStreamRenderer, JSONRenderer])
+def booking_events(request):
+    """
+    Server-sent events stream of booking changes
+    GET /api/v1/bookings/events/?ticket=<ticket>&last_event_id=<id>
+
+    Pushes booking.created / booking.updated / booking.deleted (and
+    bookings.imported) with invalidation hints: affected villa ids, date
+    range and the dashboard endpoints to refetch. Replaces polling
+    dashboard-overview, recent-bookings and calendar.
+
+    The stream ends with a reconnect event after SSE_MAX_STREAM_SECONDS;
+    reopen it with a new ticket and the last event id. 503 when this worker
+    already serves SSE_MAX_STREAMS streams: poll the change feed instead.
+    """
+    if not stream_slots.acquire():
+        return Response(
+            {'error': 'Too many open event streams; poll /api/v1/bookings/changes/ instead'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': str(settings.SSE_MAX_STREAM_SECONDS)},
+        )
+    response = StreamingHttpResponse(
+        EventStream(parse_last_event_id(request)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -3,6 +3,8 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve with: gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -12,5 +14,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Route I/O-bound endpoints to their async views (bookings/async_views.py)
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+# Persistent connections are per thread and leak under ASGI, so every request
+# connects anew; put an external pooler (e.g. PgBouncer) in front of PostgreSQL
+# if connection setup shows up in latency
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
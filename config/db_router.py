@@ -0,0 +1,161 @@
+"""
+Read-replica routing.
+
+When DATABASE_REPLICA_URL is set, settings add a 'replica' database and
+install ReplicaRouter. Reads only go to the replica inside views wrapped
+with @read_replica (the dashboard/analytics endpoints and other read-only
+views); everything else, and every write, uses 'default'.
+
+Read-your-writes: ReplicaWriteTrackingMiddleware records when a user last
+made a successful write request. For REPLICA_READ_YOUR_WRITES_SECONDS after
+that, that user's @read_replica views stay on the primary, so they never
+see a dashboard that is missing their own booking because of replica lag.
+Timestamps live in the Django cache; use a shared cache backend to carry
+the window across workers.
+
+Test runs define a 'replica' alias mirroring the test database without
+the router; config/tests.py installs the router to check where queries go.
+
+Local testing with two SQLite files:
+
+    DATABASE_URL=sqlite:////tmp/primary.sqlite3 \
+    DATABASE_REPLICA_URL=sqlite:////tmp/replica.sqlite3 python manage.py runserver
+"""
+import asyncio
+import contextvars
+import functools
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+REPLICA_ALIAS = 'replica'
+ROUTER = 'config.db_router.ReplicaRouter'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+def replica_configured() -> bool:
+    return REPLICA_ALIAS in settings.DATABASES and ROUTER in settings.DATABASE_ROUTERS
+
+
+def read_alias() -> str:
+    """Database the current context's reads are routed to"""
+    return REPLICA_ALIAS if _use_replica.get() else 'default'
+
+
+def _last_write_key(user_id):
+    return f'replica:last_write:{user_id}'
+
+
+def record_write(user):
+    if user is not None and getattr(user, 'is_authenticated', False):
+        window = getattr(settings, 'REPLICA_READ_YOUR_WRITES_SECONDS', 10)
+        cache.set(_last_write_key(user.pk), time.time(), window)
+
+
+def wrote_recently(user) -> bool:
+    if user is None or not getattr(user, 'is_authenticated', False):
+        return False
+    last_write = cache.get(_last_write_key(user.pk))
+    window = getattr(settings, 'REPLICA_READ_YOUR_WRITES_SECONDS', 10)
+    return last_write is not None and time.time() - last_write < window
+
+
+def read_replica(view):
+    """
+    Run a read-only view against the replica (if configured).
+
+    Apply below @api_view (or to a ViewSet method) so request.user is the
+    authenticated API user when the read-your-writes window is checked.
+    Async views are supported; they must set request.user before the call.
+    """
+    def use_replica(args):
+        # Function views get (request, ...), methods get (self, request, ...)
+        request = args[0] if hasattr(args[0], 'method') else args[1]
+        return (
+            replica_configured()
+            and request.method in SAFE_METHODS
+            and not wrote_recently(getattr(request, 'user', None))
+        )
+
+    if asyncio.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            if not use_replica(args):
+                return await view(*args, **kwargs)
+            # The context is copied into sync_to_async threads running the ORM
+            token = _use_replica.set(True)
+            try:
+                return await view(*args, **kwargs)
+            finally:
+                _use_replica.reset(token)
+
+        async_wrapper.read_replica = True
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not use_replica(args):
+            return view(*args, **kwargs)
+
+        token = _use_replica.set(True)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+
+    wrapper.read_replica = True
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Migrations normally only run on the primary; allowed on the
+        # replica alias too so a local SQLite replica can be created with
+        # `migrate --database replica`.
+        return None
+
+
+class ReplicaWriteTrackingMiddleware:
+    """Starts a user's read-your-writes window after a successful write request"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.process_response(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.process_response(request, response)
+        return response
+
+    def process_response(self, request, response):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and replica_configured()
+        ):
+            # DRF copies the authenticated user onto the Django request
+            record_write(getattr(request, 'user', None))
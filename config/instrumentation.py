@@ -0,0 +1,159 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware measures wall time, number of DB queries and time
+spent in the database for every request, keyed by the resolved URL name
+(e.g. 'dashboard_overview', 'booking-list'). Results go out as:
+
+- a Server-Timing header: total;dur=84.2, db;dur=31.0;desc="12 queries"
+- one JSON log line per request on the 'config.performance' logger (INFO)
+- a WARNING with the request's SQL when PERF_QUERY_COUNT_THRESHOLD or
+  PERF_SLOW_REQUEST_MS is crossed
+- Prometheus counters/histograms (config/metrics.py) when METRICS_ENABLED
+
+Queries are counted with connection.execute_wrapper, so DEBUG is not
+needed. Per query the cost is two clock reads and an append; the SQL is
+only formatted when a threshold is crossed.
+"""
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('config.performance')
+
+# Statements included in a threshold warning, and characters kept of each
+MAX_LOGGED_QUERIES = 50
+MAX_SQL_LENGTH = 1000
+
+
+class QueryRecorder:
+    """execute_wrapper that records (alias, sql, seconds) for each query"""
+
+    def __init__(self):
+        self.queries = []
+
+    def for_alias(self, alias):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append((alias, sql, time.perf_counter() - started))
+        return wrapper
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def seconds(self):
+        return sum(duration for _, _, duration in self.queries)
+
+
+def route_name(request) -> str:
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.url_name or 'unresolved'
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PERF_INSTRUMENTATION', True)
+        self.server_timing = getattr(settings, 'PERF_SERVER_TIMING', True)
+        self.query_threshold = getattr(settings, 'PERF_QUERY_COUNT_THRESHOLD', 50)
+        self.slow_ms = getattr(settings, 'PERF_SLOW_REQUEST_MS', 1000)
+        self.metrics = getattr(settings, 'METRICS_ENABLED', True)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with self._recording(recorder):
+            response = self.get_response(request)
+        self.process_response(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        # Connections are context-local, so the ORM's sync_to_async threads
+        # run queries on the same wrapped connection objects
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with self._recording(recorder):
+            response = await self.get_response(request)
+        self.process_response(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    def _recording(self, recorder):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder.for_alias(alias)))
+        return stack
+
+    def process_response(self, request, response, recorder, seconds):
+        total_ms = seconds * 1000
+        db_ms = recorder.seconds * 1000
+        name = route_name(request)
+
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'total;dur={total_ms:.1f}, '
+                f'db;dur={db_ms:.1f};desc="{recorder.count} queries"'
+            )
+
+        entry = {
+            'route': name,
+            'method': request.method,
+            'status': response.status_code,
+            'duration_ms': round(total_ms, 1),
+            'db_queries': recorder.count,
+            'db_ms': round(db_ms, 1),
+        }
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(entry))
+        if self.metrics:
+            from .metrics import observe_request
+            observe_request(name, request.method, response.status_code, seconds, recorder.count, recorder.seconds)
+
+        too_many = self.query_threshold and recorder.count >= self.query_threshold
+        too_slow = self.slow_ms and total_ms >= self.slow_ms
+        if too_many or too_slow:
+            logger.warning(json.dumps({
+                **entry,
+                'path': request.path,
+                'threshold': 'queries' if too_many else 'latency',
+                'repeated': _repeated_statements(recorder.queries),
+                'queries': [
+                    {'db': alias, 'ms': round(duration * 1000, 2), 'sql': sql[:MAX_SQL_LENGTH]}
+                    for alias, sql, duration in recorder.queries[:MAX_LOGGED_QUERIES]
+                ],
+            }))
+
+
+def _repeated_statements(queries, limit=5):
+    """SQL run more than once in a request (likely N+1), most frequent first"""
+    counts = Counter(sql for _, sql, _ in queries)
+    return [
+        {'count': count, 'sql': sql[:MAX_SQL_LENGTH]}
+        for sql, count in counts.most_common(limit)
+        if count > 1
+    ]
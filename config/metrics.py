@@ -0,0 +1,112 @@
+"""
+Prometheus metrics, exposed at GET /metrics/ (config.views.metrics_view).
+
+Request metrics are recorded by config.instrumentation.PerformanceMiddleware:
+
+- http_requests_total{view, method, status}
+- http_request_duration_seconds{view, method} (histogram)
+- http_request_db_queries{view} (histogram of queries per request)
+- http_request_db_duration_seconds{view} (histogram)
+
+plus cache_requests_total{cache, result} for the in-process caches (hit
+ratio = hit / (hit + miss)), and, computed on each scrape,
+email_outbox_messages{status} and email_outbox_oldest_queued_seconds.
+
+Under gunicorn every worker has its own registry. When
+PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py sets it by default),
+prometheus_client writes values to mmap'd files in that directory and a
+scrape of any worker aggregates all of them. The variable has to be in the
+environment before prometheus_client is imported.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+http_requests = Counter(
+    'http_requests_total', 'HTTP requests by view, method and status',
+    ['view', 'method', 'status'],
+)
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'Request wall time',
+    ['view', 'method'], buckets=LATENCY_BUCKETS,
+)
+http_request_db_queries = Histogram(
+    'http_request_db_queries', 'Database queries per request',
+    ['view'], buckets=QUERY_COUNT_BUCKETS,
+)
+http_request_db_duration = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in database queries per request',
+    ['view'], buckets=LATENCY_BUCKETS,
+)
+cache_requests = Counter(
+    'cache_requests_total', 'In-process cache lookups',
+    ['cache', 'result'],
+)
+
+
+def observe_request(view, method, status, seconds, db_queries, db_seconds):
+    http_requests.labels(view, method, str(status)).inc()
+    http_request_duration.labels(view, method).observe(seconds)
+    http_request_db_queries.labels(view).observe(db_queries)
+    http_request_db_duration.labels(view).observe(db_seconds)
+
+
+def record_cache_lookup(cache, hit):
+    cache_requests.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+class OutboxCollector:
+    """Email outbox depth, read from the database at scrape time"""
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from django.db.models import Count, Min
+        from django.utils import timezone
+
+        from bookings.models import OutboundEmail
+
+        depth = GaugeMetricFamily('email_outbox_messages', 'Outbound emails by status', labels=['status'])
+        counts = dict(OutboundEmail.objects.order_by().values_list('status').annotate(n=Count('id')))
+        for status, _ in OutboundEmail.STATUS_CHOICES:
+            depth.add_metric([status], counts.get(status, 0))
+        yield depth
+
+        oldest = OutboundEmail.objects.filter(status='queued').aggregate(oldest=Min('created_at'))['oldest']
+        yield GaugeMetricFamily(
+            'email_outbox_oldest_queued_seconds', 'Age of the oldest queued email',
+            value=(timezone.now() - oldest).total_seconds() if oldest else 0,
+        )
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+# Scrape-time gauges; kept out of the default registry so importing this
+# module never touches the database
+_scrape_registry = CollectorRegistry(auto_describe=False)
+_scrape_registry.register(OutboxCollector())
+
+
+def render() -> tuple[bytes, str]:
+    """Exposition text for this process, or for all workers in multiprocess mode"""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(_scrape_registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,207 @@
+"""
+On-demand profiling of a single request, for staff users.
+
+With PROFILING_ENABLED on, a staff user (session or JWT) can add a query
+flag to any request:
+
+- ?_profile=cpu runs the view under cProfile and returns the pstats table
+  as text/plain instead of the normal body. ?_profile_sort= (default
+  'cumulative') and ?_profile_limit= (default 60) control the table.
+- ?_profile=sql returns every SQL statement of the request as JSON, with
+  its parameters, duration and EXPLAIN output.
+
+For anyone else the flag is ignored and the request runs normally. When
+PROFILING_ENABLED is off the middleware removes itself at startup
+(MiddlewareNotUsed), so it costs nothing.
+
+Under ASGI, cpu mode profiles the event-loop thread only: ORM calls run in
+sync_to_async threads and show up as time spent awaiting.
+"""
+import cProfile
+import io
+import pstats
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+
+from .instrumentation import route_name
+
+PROFILE_PARAM = '_profile'
+MODES = ('cpu', 'sql')
+SORT_KEYS = {'cumulative', 'tottime', 'calls', 'ncalls', 'time', 'name', 'filename'}
+DEFAULT_STATS_LIMIT = 60
+
+
+class SQLCapture:
+    """execute_wrapper that keeps each statement with its params and duration"""
+
+    def __init__(self):
+        self.queries = []
+
+    def for_alias(self, alias):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append({
+                    'db': alias,
+                    'ms': round((time.perf_counter() - started) * 1000, 2),
+                    'sql': sql,
+                    'params': params,
+                    'many': many,
+                })
+        return wrapper
+
+    def explain(self):
+        """EXPLAIN each captured SELECT, after the request so it isn't counted"""
+        for query in self.queries:
+            if query['many'] or not query['sql'].lstrip().upper().startswith(('SELECT', 'WITH')):
+                query['explain'] = None
+                continue
+            connection = connections[query['db']]
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'{connection.ops.explain_query_prefix()} {query["sql"]}', query['params'])
+                    rows = cursor.fetchall()
+            except DatabaseError as exc:
+                query['explain'] = [f'EXPLAIN failed: {exc}']
+                continue
+            # Same formatting as QuerySet.explain()
+            query['explain'] = [row if isinstance(row, str) else ' '.join(str(c) for c in row) for row in rows]
+
+
+def is_staff(request) -> bool:
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_active and user.is_staff
+    from accounts.authentication import CachedJWTAuthentication
+    try:
+        authenticated = CachedJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return bool(authenticated) and authenticated[0].is_active and authenticated[0].is_staff
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = request.GET.get(PROFILE_PARAM)
+        if mode is None or not is_staff(request):
+            return self.get_response(request)
+        if mode not in MODES:
+            return self._bad_mode(mode)
+
+        if mode == 'cpu':
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            return self._cpu_report(request, response, profiler, time.perf_counter() - started)
+
+        capture = SQLCapture()
+        started = time.perf_counter()
+        with self._capturing(capture):
+            response = self.get_response(request)
+        seconds = time.perf_counter() - started
+        capture.explain()
+        return self._sql_report(request, response, capture, seconds)
+
+    async def __acall__(self, request):
+        mode = request.GET.get(PROFILE_PARAM)
+        if mode is None or not await sync_to_async(is_staff)(request):
+            return await self.get_response(request)
+        if mode not in MODES:
+            return self._bad_mode(mode)
+
+        if mode == 'cpu':
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+            return self._cpu_report(request, response, profiler, time.perf_counter() - started)
+
+        capture = SQLCapture()
+        started = time.perf_counter()
+        with self._capturing(capture):
+            response = await self.get_response(request)
+        seconds = time.perf_counter() - started
+        await sync_to_async(capture.explain)()
+        return self._sql_report(request, response, capture, seconds)
+
+    def _capturing(self, capture):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(capture.for_alias(alias)))
+        return stack
+
+    def _bad_mode(self, mode):
+        return JsonResponse(
+            {'error': f'Unknown {PROFILE_PARAM} mode {mode!r}; use one of: {", ".join(MODES)}'},
+            status=400,
+        )
+
+    def _cpu_report(self, request, response, profiler, seconds):
+        sort = request.GET.get('_profile_sort', 'cumulative')
+        if sort not in SORT_KEYS:
+            sort = 'cumulative'
+        try:
+            limit = max(1, int(request.GET.get('_profile_limit', DEFAULT_STATS_LIMIT)))
+        except ValueError:
+            limit = DEFAULT_STATS_LIMIT
+
+        out = io.StringIO()
+        out.write(
+            f'{request.method} {request.get_full_path()} -> {response.status_code} '
+            f'({route_name(request)}) in {seconds * 1000:.1f} ms\n\n'
+        )
+        pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+        return HttpResponse(out.getvalue(), content_type='text/plain; charset=utf-8')
+
+    def _sql_report(self, request, response, capture, seconds):
+        return JsonResponse({
+            'path': request.get_full_path(),
+            'route': route_name(request),
+            'status': response.status_code,
+            'duration_ms': round(seconds * 1000, 1),
+            'query_count': len(capture.queries),
+            'db_ms': round(sum(query['ms'] for query in capture.queries), 1),
+            'queries': [
+                {key: value for key, value in query.items() if key != 'many'}
+                for query in capture.queries
+            ],
+        }, encoder=_ParamsEncoder, json_dumps_params={'indent': 2})
+
+
+class _ParamsEncoder(DjangoJSONEncoder):
+    """Query params can be anything the DB adapter accepts (bytes, Decimal, ...)"""
+
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return repr(o)
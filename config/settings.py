@@ -66,6 +66,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings include the rest of the middleware
+    'config.instrumentation.PerformanceMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -73,6 +75,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.db_router.ReplicaWriteTrackingMiddleware',
+    # Staff-only ?_profile=cpu|sql; removes itself unless PROFILING_ENABLED
+    'config.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -112,9 +117,26 @@ DATABASE_URL = config('DATABASE_URL', default=None)
 # Check if we should use local PostgreSQL (only in DEBUG mode)
 USE_LOCAL_DB = config('USE_LOCAL_DB', default=False, cast=bool)
 
+# Persistent connections: keep each worker's connection open for this many
+# seconds instead of reconnecting (and redoing TLS) on every request.
+# 0 = close after each request. Health checks ping a reused connection
+# before handing it out so a dropped one is replaced instead of erroring.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+
+
+def _configure_postgres_connections(db):
+    """Apply the persistent-connection settings to a PostgreSQL DATABASES entry"""
+    db['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+    db['CONN_HEALTH_CHECKS'] = DB_CONN_HEALTH_CHECKS
+    return db
+
+
 if DATABASE_URL and not USE_LOCAL_DB:
     # Production / Railway usage (DATABASE_URL set and not forcing local DB)
     DATABASES['default'] = dj_database_url.parse(DATABASE_URL)
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+        _configure_postgres_connections(DATABASES['default'])
     print("🚀 Using configured DATABASE_URL (PostgreSQL - Railway/Production)", file=sys.stderr)
 elif USE_LOCAL_DB or (DEBUG and not DATABASE_URL):
     # Local development PostgreSQL
@@ -133,6 +155,7 @@ elif USE_LOCAL_DB or (DEBUG and not DATABASE_URL):
         'HOST': local_db_host,
         'PORT': local_db_port,
     }
+    _configure_postgres_connections(DATABASES['default'])
     print(f"🔧 Using local PostgreSQL database: {local_db_name} on {local_db_host}:{local_db_port}", file=sys.stderr)
 else:
     # No DATABASE_URL found and not in DEBUG mode
@@ -149,6 +172,24 @@ else:
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 
+# Optional read replica for dashboard/analytics views (config/db_router.py)
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default=None)
+# After a user's own write, their read-only views stay on the primary this long
+REPLICA_READ_YOUR_WRITES_SECONDS = config('REPLICA_READ_YOUR_WRITES_SECONDS', default=10, cast=int)
+
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL)
+    if DATABASES['replica']['ENGINE'] == 'django.db.backends.postgresql':
+        _configure_postgres_connections(DATABASES['replica'])
+    # Tests read the replica through the test primary
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['config.db_router.ReplicaRouter']
+    print("📖 Using read replica for read-only views (DATABASE_REPLICA_URL)", file=sys.stderr)
+elif sys.argv[1:2] == ['test']:
+    # A replica alias mirroring the test database for the routing tests
+    # (config/tests.py), which install ReplicaRouter themselves
+    DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -187,7 +228,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
 
 # Media files
 MEDIA_URL = 'media/'
@@ -202,7 +246,8 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt's JWTAuthentication with a short-TTL per-process user cache
+        'accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -214,6 +259,11 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Proxies in front of the app (Railway's edge: 1). Throttles key on the
+    # X-Forwarded-For entry that many hops from the right, which the last
+    # proxy appended; without it DRF uses the client-controlled header as is.
+    # 0 = no proxy, use REMOTE_ADDR.
+    'NUM_PROXIES': config('NUM_PROXIES', default=1, cast=int),
 }
 
 # JWT settings
@@ -238,6 +288,40 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Per-process user/blacklist caches for JWT auth and token introspection (accounts/caches.py)
+USER_CACHE_TTL_SECONDS = config('USER_CACHE_TTL_SECONDS', default=30, cast=int)
+TOKEN_BLACKLIST_REFRESH_SECONDS = config('TOKEN_BLACKLIST_REFRESH_SECONDS', default=30, cast=int)
+
+# Special days (GlobalSpecialDay + public holidays) used in pricing, cached per process
+SPECIAL_DAY_CACHE_SECONDS = config('SPECIAL_DAY_CACHE_SECONDS', default=300, cast=int)
+
+# Cache framework: per-process local memory unless CACHE_BACKEND/CACHE_LOCATION
+# point at a shared cache (e.g. django.core.cache.backends.redis.RedisCache)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='villa-manager'),
+    }
+}
+
+# Dashboard analytics cache (bookings/analytics_cache.py): entry TTL (0 disables),
+# and how long other callers wait for the one recomputing an entry. With the
+# default per-process cache a write only invalidates the worker that made it,
+# so the TTL is capped at 60s; use a shared CACHE_BACKEND with several workers.
+ANALYTICS_CACHE_SECONDS = config('ANALYTICS_CACHE_SECONDS', default=60, cast=int)
+ANALYTICS_CACHE_LOCK_SECONDS = config('ANALYTICS_CACHE_LOCK_SECONDS', default=10, cast=int)
+
+# Threads per process evaluating dashboard bundle sections (bookings/dashboard_bundle.py);
+# each holds its own DB connection. 0 evaluates sections one by one in the request thread.
+DASHBOARD_BUNDLE_WORKERS = config('DASHBOARD_BUNDLE_WORKERS', default=4, cast=int)
+
+# Login token buckets (accounts/throttles.py): burst capacity and refill per minute
+LOGIN_THROTTLE_ENABLED = config('LOGIN_THROTTLE_ENABLED', default=True, cast=bool)
+LOGIN_THROTTLE_IP_CAPACITY = config('LOGIN_THROTTLE_IP_CAPACITY', default=20, cast=int)
+LOGIN_THROTTLE_IP_PER_MINUTE = config('LOGIN_THROTTLE_IP_PER_MINUTE', default=10, cast=float)
+LOGIN_THROTTLE_USERNAME_CAPACITY = config('LOGIN_THROTTLE_USERNAME_CAPACITY', default=10, cast=int)
+LOGIN_THROTTLE_USERNAME_PER_MINUTE = config('LOGIN_THROTTLE_USERNAME_PER_MINUTE', default=5, cast=float)
+
 # ===== CORS (STRICT PRODUCTION) =====
 # ===== CORS (STRICT PRODUCTION) =====
 CORS_ALLOWED_ORIGINS = [
@@ -271,6 +355,65 @@ SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 CSRF_COOKIE_SECURE = not DEBUG
 SESSION_COOKIE_SECURE = not DEBUG
 
+# Serve public availability, dashboard overview and calculate-price from async
+# views (bookings/async_views.py). config/asgi.py turns this on.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
+# The change feed (/bookings/changes/) repeats this many seconds of changes once a
+# client is caught up, so rows from transactions still committing aren't skipped
+CHANGES_FEED_OVERLAP_SECONDS = config('CHANGES_FEED_OVERLAP_SECONDS', default=10, cast=int)
+
+# Server-sent events (booking change stream, bookings/events.py)
+SSE_HEARTBEAT_SECONDS = config('SSE_HEARTBEAT_SECONDS', default=15, cast=int)
+# How often an open stream checks the BookingEvent table, and how many rows per check
+SSE_POLL_SECONDS = config('SSE_POLL_SECONDS', default=2, cast=float)
+SSE_BATCH_SIZE = config('SSE_BATCH_SIZE', default=100, cast=int)
+# Streams end after this long so clients re-authenticate; keep it below gunicorn's --timeout (120)
+SSE_MAX_STREAM_SECONDS = config('SSE_MAX_STREAM_SECONDS', default=90, cast=int)
+# Streams per WSGI process; each holds a gunicorn thread, so keep it below --threads
+SSE_MAX_STREAMS = config('SSE_MAX_STREAMS', default=4, cast=int)
+SSE_RETRY_MILLISECONDS = config('SSE_RETRY_MILLISECONDS', default=3000, cast=int)
+# Lifetime of the single-use ?ticket= a stream is opened with
+SSE_TICKET_SECONDS = config('SSE_TICKET_SECONDS', default=30, cast=int)
+# Older events are deleted; clients away longer resync from the change feed
+SSE_EVENT_RETENTION_SECONDS = config('SSE_EVENT_RETENTION_SECONDS', default=3600, cast=int)
+
+# Per-request timing (config/instrumentation.py): Server-Timing header and JSON log lines
+PERF_INSTRUMENTATION = config('PERF_INSTRUMENTATION', default=True, cast=bool)
+PERF_SERVER_TIMING = config('PERF_SERVER_TIMING', default=True, cast=bool)
+# Log the request's SQL when either threshold is reached (0 disables it)
+PERF_QUERY_COUNT_THRESHOLD = config('PERF_QUERY_COUNT_THRESHOLD', default=50, cast=int)
+PERF_SLOW_REQUEST_MS = config('PERF_SLOW_REQUEST_MS', default=1000, cast=int)
+
+# Staff-only ?_profile=cpu|sql on any request (config/profiling.py)
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+
+# Prometheus metrics at /metrics/ (config/metrics.py). Scrapers send this bearer token;
+# without one the endpoint only answers when DEBUG is on
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# Shared directory for multi-worker metrics; gunicorn.conf.py defaults it.
+# Exported here so a value from .env is seen before prometheus_client is imported.
+PROMETHEUS_MULTIPROC_DIR = config('PROMETHEUS_MULTIPROC_DIR', default='')
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', PROMETHEUS_MULTIPROC_DIR)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'config.performance': {
+            'handlers': ['console'],
+            'level': config('PERF_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # drf-spectacular settings
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Villa Manager Hub API',
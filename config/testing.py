@@ -0,0 +1,136 @@
+"""
+Shared helpers for the query-budget tests in accounts/, villas/ and bookings/.
+
+seed_dataset() builds a small but realistic dataset (several villas with
+special prices, a few months of bookings around today, global special days,
+outbox emails). QueryBudgetTestCase.assertMaxQueries fails with the captured
+SQL when a block runs more queries than its budget, so an N+1 shows up as a
+failing test with the repeated statement in the output.
+"""
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def seed_dataset(bookings_per_villa=16, today=None):
+    """Villas, bookings, special days and emails; returns a dict of the objects"""
+    from accounts.models import User
+    from bookings.models import Booking, OutboundEmail
+    from villas.models import GlobalSpecialDay, Villa
+
+    today = today or date.today()
+    staff = User.objects.create_user(username='staff', name='Staff', password='pass', is_staff=True)
+    agent = User.objects.create_user(username='agent', name='Agent', password='pass')
+
+    villas = []
+    for i, status in enumerate(['active', 'active', 'active', 'maintenance']):
+        villas.append(Villa.objects.create(
+            name=f'Villa {i + 1}',
+            location='Goa',
+            max_guests=8,
+            price_per_night=Decimal('10000') + i * 1000,
+            weekend_price=Decimal('14000') + i * 1000,
+            special_day_price=Decimal('18000') if i == 0 else None,
+            status=status,
+            order=i,
+            special_prices=[{
+                'name': 'Season',
+                'start_date': (today + timedelta(days=20)).isoformat(),
+                'end_date': (today + timedelta(days=40)).isoformat(),
+                'price': 20000 + i * 1000,
+            }],
+        ))
+
+    for day, month, name in [(1, 1, 'New Year'), (25, 12, 'Christmas'), (15, 8, 'Independence Day')]:
+        GlobalSpecialDay.objects.create(name=name, day=day, month=month)
+
+    sources = [choice for choice, _ in Booking.SOURCE_CHOICES]
+    payment_statuses = [choice for choice, _ in Booking.PAYMENT_STATUS_CHOICES]
+    bookings = []
+    for v, villa in enumerate(villas):
+        # Stays a few days apart, from two months ago to about six weeks ahead
+        check_in = today - timedelta(days=60 - v)
+        for n in range(bookings_per_villa):
+            nights = 2 + (n + v) % 4
+            bookings.append(Booking.objects.create(
+                villa=villa,
+                client_name=f'Guest {v}-{n}',
+                client_phone=f'98{v:02d}{n:06d}',
+                client_email=f'guest{v}{n}@example.com',
+                check_in=check_in,
+                check_out=check_in + timedelta(days=nights),
+                status='blocked' if n % 7 == 6 else 'booked',
+                number_of_guests=2 + n % 5,
+                payment_status=payment_statuses[n % len(payment_statuses)],
+                booking_source=sources[(n + v) % len(sources)],
+                advance_payment=Decimal('1000') * (n % 3),
+                created_by=staff if n % 2 else agent,
+            ))
+            check_in += timedelta(days=nights + 3)
+
+    for booking in bookings[:5]:
+        OutboundEmail.objects.create(
+            booking=booking, kind='confirmation', to_email=booking.client_email,
+            subject='Booking confirmed', body='...', status='sent' if booking.pk % 2 else 'queued',
+        )
+
+    return {'staff': staff, 'agent': agent, 'villas': villas, 'bookings': bookings, 'today': today}
+
+
+def reset_process_caches():
+    """Per-process caches would otherwise make query counts order-dependent"""
+    from accounts.caches import authenticated_user_cache, blacklisted_jtis, user_info_cache
+    from villas.public_holidays import clear_special_day_cache
+
+    authenticated_user_cache.clear()
+    user_info_cache.clear()
+    blacklisted_jtis.reset()
+    clear_special_day_cache()
+    cache.clear()
+
+
+def api_client(user=None):
+    """APIClient sending a Bearer JWT for user (anonymous without one)"""
+    client = APIClient(SERVER_NAME='localhost')
+    if user is not None:
+        token = RefreshToken.for_user(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+class QueryBudgetTestCase(TestCase):
+    """TestCase with the seeded dataset and a JWT-authenticated API client"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_dataset()
+
+    def setUp(self):
+        reset_process_caches()
+        self.client = self.api_client(self.data['staff'])
+
+    def api_client(self, user=None):
+        return api_client(user)
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=None):
+        with CaptureQueriesContext(connections[using or DEFAULT_DB_ALIAS]) as captured:
+            yield captured
+        if len(captured) > budget:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}' for i, query in enumerate(captured.captured_queries, 1)
+            )
+            self.fail(f'{len(captured)} queries, budget is {budget}:\n{queries}')
+
+    def assertGetWithin(self, budget, url, client=None, expected_status=200, **params):
+        with self.assertMaxQueries(budget):
+            response = (client or self.client).get(url, params)
+        self.assertEqual(response.status_code, expected_status, getattr(response, 'data', response.content))
+        return response
@@ -0,0 +1,176 @@
+"""
+Staff-only request profiling (config/profiling.py), the slow request log
+(config/instrumentation.py), access to the metrics endpoint, the deep health check (config/views.py) and read-replica routing
+(config/db_router.py).
+"""
+import itertools
+import json
+from unittest.mock import patch
+
+from django.db import OperationalError, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from bookings.models import Booking
+from config.testing import QueryBudgetTestCase, api_client, reset_process_caches, seed_dataset
+
+URL = '/api/v1/bookings/dashboard-overview/'
+
+
+@override_settings(PROFILING_ENABLED=True)
+class ProfilingMiddlewareTests(QueryBudgetTestCase):
+    def test_cpu_profile(self):
+        response = self.client.get(URL, {'_profile': 'cpu', '_profile_sort': 'tottime', '_profile_limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('-> 200', body)
+        self.assertIn('function calls', body)
+
+    def test_sql_profile(self):
+        response = self.client.get(URL, {'_profile': 'sql'})
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual(report['status'], 200)
+        self.assertEqual(report['query_count'], len(report['queries']))
+        selects = [q for q in report['queries'] if q['sql'].startswith('SELECT')]
+        self.assertTrue(selects)
+        self.assertTrue(all(q['explain'] for q in selects))
+
+    def test_unknown_mode(self):
+        self.assertEqual(self.client.get(URL, {'_profile': 'memory'}).status_code, 400)
+
+    def test_ignored_for_non_staff(self):
+        response = self.api_client(self.data['agent']).get(URL, {'_profile': 'sql'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('queries', response.json())
+
+    def test_ignored_for_anonymous(self):
+        response = self.api_client().get(URL, {'_profile': 'cpu'})
+        self.assertEqual(response.status_code, 401)
+
+
+class ProfilingDisabledTests(QueryBudgetTestCase):
+    def test_flag_ignored_when_disabled(self):
+        response = self.client.get(URL, {'_profile': 'sql'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('queries', response.json())
+
+
+# The middleware reads its thresholds when the client first builds the chain
+class PerformanceMiddlewareTests(QueryBudgetTestCase):
+    def get_logged(self, **params):
+        client = self.api_client(self.data['staff'])
+        with self.assertLogs('config.performance', 'INFO') as logs:
+            response = client.get(URL, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        return {
+            level: [json.loads(r.getMessage()) for r in logs.records if r.levelname == level]
+            for level in ('INFO', 'WARNING')
+        }
+
+    @override_settings(PERF_QUERY_COUNT_THRESHOLD=100, PERF_SLOW_REQUEST_MS=60000)
+    def test_requests_under_the_thresholds_are_not_flagged(self):
+        logged = self.get_logged()
+        self.assertEqual(logged['WARNING'], [])
+        self.assertEqual(logged['INFO'][0]['route'], 'bookings:dashboard_overview')
+
+    @override_settings(PERF_QUERY_COUNT_THRESHOLD=5, PERF_SLOW_REQUEST_MS=60000)
+    def test_query_budget_exceeded(self):
+        [warning] = self.get_logged()['WARNING']
+        self.assertEqual(warning['threshold'], 'queries')
+        self.assertEqual(warning['path'], URL)
+        self.assertGreaterEqual(warning['db_queries'], 5)
+        self.assertEqual(len(warning['queries']), warning['db_queries'])
+
+    @override_settings(PERF_QUERY_COUNT_THRESHOLD=0, PERF_SLOW_REQUEST_MS=1000)
+    def test_slow_request(self):
+        # Every clock read advances half a second
+        with patch('config.instrumentation.time.perf_counter', side_effect=itertools.count(0, 0.5).__next__):
+            [warning] = self.get_logged()['WARNING']
+        self.assertEqual(warning['threshold'], 'latency')
+        self.assertGreaterEqual(warning['duration_ms'], 1000)
+
+
+class MetricsViewTests(TestCase):
+    @override_settings(DEBUG=False, METRICS_TOKEN='')
+    def test_requires_token_outside_debug(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_bearer_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 401)
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False, METRICS_TOKEN='scrape-me')
+    def test_disabled(self):
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 404)
+
+
+class HealthCheckTests(TestCase):
+    def test_deep_check(self):
+        response = self.client.get('/health/', {'deep': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['database']['status'], 'ok')
+
+    def test_database_error_is_not_exposed(self):
+        error = OperationalError('could not connect to server at "db.internal" as user "villa_admin"')
+        with patch('django.db.backends.base.base.BaseDatabaseWrapper.ensure_connection', side_effect=error), \
+                self.assertLogs('config.views', 'ERROR'):
+            response = self.client.get('/health/', {'deep': 1})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['database'], {'status': 'unavailable', 'error': 'OperationalError'})
+
+
+# The 'replica' alias mirrors the test database (config/settings.py); a
+# TransactionTestCase commits, so the replica connection sees the data
+@override_settings(DATABASE_ROUTERS=['config.db_router.ReplicaRouter'])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.data = seed_dataset(bookings_per_villa=3)
+        reset_process_caches()
+        self.client = api_client(self.data['staff'])
+
+    def request(self, method, url, data=None):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+        return [q['sql'] for q in primary.captured_queries], [q['sql'] for q in replica.captured_queries]
+
+    def booking_queries(self, queries):
+        return [sql for sql in queries if '"bookings_booking"' in sql]
+
+    def test_dashboard_reads_use_the_replica(self):
+        primary, replica = self.request('get', '/api/v1/bookings/booking-sources/')
+        self.assertTrue(self.booking_queries(replica))
+        self.assertEqual(self.booking_queries(primary), [])
+
+    def test_writes_and_reads_after_them_use_the_primary(self):
+        booking = self.data['bookings'][0]
+        primary, replica = self.request('patch', f'/api/v1/bookings/{booking.pk}/', {'notes': 'Late arrival'})
+        self.assertTrue(any(sql.startswith('UPDATE "bookings_booking"') for sql in primary))
+        self.assertEqual(replica, [])
+
+        # Read-your-writes: the writer's dashboard stays on the primary for a while
+        primary, replica = self.request('get', '/api/v1/bookings/booking-sources/')
+        self.assertTrue(self.booking_queries(primary))
+        self.assertEqual(replica, [])
+
+        other = api_client(self.data['agent'])
+        with CaptureQueriesContext(connections['replica']) as replica:
+            other.get('/api/v1/bookings/dashboard-overview/')
+        self.assertTrue(self.booking_queries([q['sql'] for q in replica.captured_queries]))
+
+    def test_writer_returns_to_the_replica_after_the_window(self):
+        booking = self.data['bookings'][0]
+        with override_settings(REPLICA_READ_YOUR_WRITES_SECONDS=0):
+            self.request('patch', f'/api/v1/bookings/{booking.pk}/', {'notes': 'Late arrival'})
+            primary, replica = self.request('get', '/api/v1/bookings/booking-sources/')
+        self.assertTrue(self.booking_queries(replica))
+        self.assertEqual(Booking.objects.get(pk=booking.pk).notes, 'Late arrival')
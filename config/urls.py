@@ -19,8 +19,10 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
-from .views import home_view, health_check
+from .views import home_view, health_check, metrics_view
 from bookings import views as bookings_views
+from bookings import async_views as bookings_async_views
+from villas.images import THUMBNAIL_DIR, serve_thumbnail
 
 urlpatterns = [
     # Home page
@@ -28,6 +30,7 @@ urlpatterns = [
     
     # Health check endpoint for Railway and monitoring
     path('health/', health_check, name='health-check'),
+    path('metrics/', metrics_view, name='metrics'),
     
     # Admin panel
     path('admin/', admin.site.urls),
@@ -38,7 +41,11 @@ urlpatterns = [
     path('api/v1/', include('villas.urls')),
     
     # Explicitly register calculate-price here to guarantee precedence
-    path('api/v1/bookings/calculate-price/', bookings_views.calculate_price_view, name='calculate-price-override'),
+    path(
+        'api/v1/bookings/calculate-price/',
+        bookings_async_views.calculate_price if settings.ASYNC_VIEWS else bookings_views.calculate_price_view,
+        name='calculate-price-override',
+    ),
     
     path('api/v1/bookings/', include('bookings.urls')),
     
@@ -48,7 +55,10 @@ urlpatterns = [
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 ]
 
-# Serve media files in development
+# Serve media files in development; thumbnails with their production cache header
 if settings.DEBUG:
+    urlpatterns += [
+        path(f"{settings.MEDIA_URL.lstrip('/')}{THUMBNAIL_DIR}/<path:path>", serve_thumbnail, name='villa-thumbnail'),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
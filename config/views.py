@@ -1,6 +1,12 @@
-from django.http import HttpResponse, JsonResponse
+import hmac
+import logging
+
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 @csrf_exempt
@@ -9,12 +15,79 @@ def health_check(request):
     Health check endpoint for Railway and monitoring services.
     Returns a simple JSON response indicating the API is running.
     No authentication required.
+
+    GET /health/?deep=1 also checks the database: round-trip latency of a
+    trivial query plus connection reuse settings. Returns 503 if the
+    database is unreachable.
     """
-    return JsonResponse({
+    payload = {
         'status': 'healthy',
         'service': 'Villa Management API',
         'version': '1.0.0'
-    })
+    }
+    if request.GET.get('deep') not in ('1', 'true', 'yes'):
+        return JsonResponse(payload)
+
+    payload['database'] = _database_health()
+    from .db_router import REPLICA_ALIAS, replica_configured
+    if replica_configured():
+        payload['replica'] = _database_health(REPLICA_ALIAS)
+    if payload['database']['status'] != 'ok':
+        payload['status'] = 'unhealthy'
+        return JsonResponse(payload, status=503)
+    return JsonResponse(payload)
+
+
+def metrics_view(request):
+    """
+    Prometheus metrics (request latency/counts, DB queries, cache hits,
+    email outbox depth); see config/metrics.py.
+
+    GET /metrics/
+
+    The scraper must send `Authorization: Bearer <METRICS_TOKEN>`. Without
+    a token the endpoint only answers when DEBUG is on.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return JsonResponse({'error': 'Set METRICS_TOKEN to enable metrics'}, status=403)
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return JsonResponse({'error': 'Invalid metrics token'}, status=401)
+
+    from .metrics import render
+    body, content_type = render()
+    return HttpResponse(body, content_type=content_type)
+
+
+def _database_health(alias='default'):
+    import time
+    from django.db import connections
+
+    connection = connections[alias]
+
+    try:
+        connection.ensure_connection()
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        latency_ms = (time.perf_counter() - started) * 1000
+    except Exception as e:
+        # The message can name hosts and users; keep it in the server log
+        logger.exception('Health check: database %r unavailable', alias)
+        return {'status': 'unavailable', 'error': type(e).__name__}
+
+    info = {
+        'status': 'ok',
+        'vendor': connection.vendor,
+        'latency_ms': round(latency_ms, 2),
+        'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+        'conn_health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS'),
+    }
+    return info
 
 
 def home_view(request):
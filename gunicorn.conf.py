@@ -0,0 +1,40 @@
+"""
+gunicorn settings, loaded automatically from the working directory.
+
+Logs how long boot took so cold-start and scale-out times can be tracked:
+the time to import the Django app (in the master, with --preload) and the
+time until the server is accepting connections. When started through
+`manage.py release && gunicorn ...` the release step prints its own timing
+before this.
+
+Also sets up Prometheus multiprocess mode (config/metrics.py): workers
+write metrics to PROMETHEUS_MULTIPROC_DIR, which is emptied when the
+master starts, and files of exited workers are marked dead.
+"""
+import glob
+import os
+import tempfile
+import time
+
+_started = time.perf_counter()
+
+# Must be in the environment before the app (and prometheus_client) loads
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'villa-prometheus'))
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+for stale in glob.glob(os.path.join(os.environ['PROMETHEUS_MULTIPROC_DIR'], '*.db')):
+    os.remove(stale)
+
+
+def on_starting(server):
+    # With preload_app the application has been imported at this point
+    if server.cfg.preload_app:
+        server.log.info('Application preloaded in %.2fs', time.perf_counter() - _started)
+
+
+def when_ready(server):
+    server.log.info('gunicorn ready in %.2fs (%s workers)', time.perf_counter() - _started, server.cfg.workers)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
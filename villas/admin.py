@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Villa
+from .models import Villa, SpecialPrice
 
 
 @admin.register(Villa)
@@ -21,3 +21,17 @@ class VillaAdmin(admin.ModelAdmin):
             'fields': ('description', 'amenities', 'image')
         }),
     )
+
+
+@admin.register(SpecialPrice)
+class SpecialPriceAdmin(admin.ModelAdmin):
+    """Read-only: rows are mirrored from Villa.special_prices"""
+    list_display = ['villa', 'name', 'start_date', 'end_date', 'price']
+    list_filter = ['villa']
+    date_hierarchy = 'start_date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
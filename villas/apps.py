@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class VillasConfig(AppConfig):
     name = 'villas'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,135 @@
+"""
+Thumbnail variants for villa images.
+
+On upload each villa image is resized to a few fixed widths and encoded
+as WebP and JPEG. Variant files are named after a hash of their bytes
+(villas/thumbs/<name>-<size>-<hash>.<ext>), so their URLs change whenever
+the content does and can be cached forever. The generated names are
+stored on Villa.image_variants:
+
+    {
+        'source': 'villas/photo.jpg',
+        'sizes': {
+            'small': {'width': 320, 'height': 213,
+                      'webp': 'villas/thumbs/photo-small-3f2a9c1b0d4e.webp',
+                      'jpeg': 'villas/thumbs/photo-small-8e71d0c2a9f3.jpg'},
+            ...
+        }
+    }
+
+Variants are generated after the villa's transaction commits, so Pillow
+never runs while the save holds row locks, and a rolled-back save leaves
+no files behind. In production the media storage or the proxy in front of
+MEDIA_URL serves them with THUMBNAIL_CACHE_CONTROL; serve_thumbnail does
+the same under DEBUG only, since Django's static serve would tie up
+gunicorn threads with file I/O.
+"""
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.views.static import serve
+from PIL import Image, ImageOps
+
+# Maximum width per size; images are never upscaled
+THUMBNAIL_SIZES = {
+    'small': 320,
+    'medium': 768,
+    'large': 1280,
+}
+
+# format key -> (Pillow format, extension, save options)
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+THUMBNAIL_DIR = 'villas/thumbs'
+HASH_LENGTH = 12
+
+# A variant's name changes with its bytes, so browsers and CDNs can keep it for a year
+THUMBNAIL_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _encode(image, fmt) -> bytes:
+    pil_format, _, options = FORMATS[fmt]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def _store(content: bytes, stem: str, size: str, fmt: str, storage) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    name = f'{THUMBNAIL_DIR}/{stem}-{size}-{digest}.{FORMATS[fmt][1]}'
+    # Same name means same bytes, so an existing file can be reused
+    if not storage.exists(name):
+        storage.save(name, ContentFile(content))
+    return name
+
+
+def generate_variants(image_field, storage=None) -> dict:
+    """Resize and encode an ImageField file; returns the image_variants dict"""
+    storage = storage or default_storage
+    stem = os.path.splitext(os.path.basename(image_field.name))[0]
+
+    image_field.open('rb')
+    try:
+        with Image.open(image_field) as source:
+            # Apply camera rotation before dropping EXIF
+            source = ImageOps.exif_transpose(source)
+            if source.mode not in ('RGB', 'RGBA'):
+                source = source.convert('RGBA' if 'transparency' in source.info else 'RGB')
+
+            sizes = {}
+            for size, max_width in THUMBNAIL_SIZES.items():
+                image = source.copy()
+                image.thumbnail((max_width, max_width * 4), Image.LANCZOS)
+                sizes[size] = {'width': image.width, 'height': image.height}
+                for fmt in FORMATS:
+                    sizes[size][fmt] = _store(_encode(image, fmt), stem, size, fmt, storage)
+    finally:
+        image_field.close()
+
+    return {'source': image_field.name, 'sizes': sizes}
+
+
+def variants_are_stale(villa) -> bool:
+    if not villa.image:
+        return bool(villa.image_variants)
+    return (villa.image_variants or {}).get('source') != villa.image.name
+
+
+def refresh_variants(villa) -> dict:
+    """Regenerate villa.image_variants if the image changed, and store them"""
+    if not variants_are_stale(villa):
+        return villa.image_variants
+    variants = generate_variants(villa.image) if villa.image else {}
+    villa.image_variants = variants
+    type(villa).objects.filter(pk=villa.pk).update(image_variants=variants)
+    return variants
+
+
+def variant_urls(villa, request=None) -> dict:
+    """image_variants with storage names turned into (absolute) URLs"""
+    sizes = (villa.image_variants or {}).get('sizes') or {}
+    result = {}
+    for size, variant in sizes.items():
+        entry = {'width': variant['width'], 'height': variant['height']}
+        for fmt in FORMATS:
+            if fmt in variant:
+                url = default_storage.url(variant[fmt])
+                entry[fmt] = request.build_absolute_uri(url) if request else url
+        result[size] = entry
+    return result
+
+
+def serve_thumbnail(request, path):
+    """Development (DEBUG) view: a generated variant from MEDIA_ROOT with a cache-forever header"""
+    response = serve(request, path, document_root=os.path.join(settings.MEDIA_ROOT, THUMBNAIL_DIR))
+    response['Cache-Control'] = THUMBNAIL_CACHE_CONTROL
+    return response
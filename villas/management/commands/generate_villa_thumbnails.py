@@ -0,0 +1,32 @@
+"""
+Generate (or regenerate) thumbnail variants for existing villa images
+Usage: python manage.py generate_villa_thumbnails [--force]
+"""
+from django.core.management.base import BaseCommand
+
+from villas.images import generate_variants, variants_are_stale
+from villas.models import Villa
+
+
+class Command(BaseCommand):
+    help = 'Create WebP/JPEG thumbnail variants for villa images uploaded before variants existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate even if variants are up to date')
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        for villa in Villa.objects.exclude(image='').exclude(image__isnull=True):
+            if not options['force'] and not variants_are_stale(villa):
+                continue
+            try:
+                variants = generate_variants(villa.image)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'{villa.name}: {e}')
+                continue
+            Villa.objects.filter(pk=villa.pk).update(image_variants=variants)
+            done += 1
+            self.stdout.write(f'✓ {villa.name}')
+
+        self.stdout.write(self.style.SUCCESS(f'Generated thumbnails for {done} villas ({failed} failed)'))
@@ -0,0 +1,287 @@
+"""
+Generate a large synthetic dataset for load testing and benchmarks
+Usage: python manage.py seed_scale --villas 1000 --bookings-per-villa 1000 --years 3 [--seed 42] [--clear]
+
+Creates N villas with seasonal special_prices, varied weekend days and
+special-day prices, their SpecialPrice rows, and M non-overlapping bookings
+per villa spread over the given years. Villas and SpecialPrice rows are
+written with bulk_create, bookings with multi-row INSERTs in chunks (one
+transaction per chunk), so Villa.save()/Booking.save() and their signals
+do not run: totals are priced with VillaPricer, SpecialPrice rows are
+written directly, and villas get no images.
+
+About 1M bookings (--villas 1000 --bookings-per-villa 1000) in half a minute
+on SQLite.
+
+With the same --seed, --start and sizes the villas and bookings are the
+same, except for timestamps and created_by, which is picked from the
+staff users that exist (a 'seed_scale' user is created if there are
+none). Pass --start for repeatable dates: the default is 1 January of
+last year. Generated villas are named '<prefix> NNNNN' and --clear
+removes them (and their bookings) first.
+"""
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from bookings.models import Booking
+from bookings.pricing import VillaPricer, parse_special_price_entries
+from villas.models import SpecialPrice, Villa
+
+FIRST_NAMES = [
+    'Aarav', 'Vivaan', 'Aditya', 'Arjun', 'Rohan', 'Kabir', 'Ishaan', 'Ananya', 'Diya', 'Saanvi',
+    'Meera', 'Priya', 'Neha', 'Kavya', 'Riya', 'Rahul', 'Vikram', 'Sneha', 'Pooja', 'Karan',
+]
+LAST_NAMES = [
+    'Sharma', 'Verma', 'Patel', 'Shah', 'Mehta', 'Iyer', 'Nair', 'Reddy', 'Gupta', 'Singh',
+    'Kapoor', 'Joshi', 'Desai', 'Kulkarni', 'Fernandes', 'Pereira', "D'Souza", 'Rao', 'Bose', 'Das',
+]
+LOCATIONS = ['Beachfront', 'Garden View', 'Poolside', 'Hilltop', 'Riverside', 'Forest Edge', 'Cliffside']
+
+BOOKING_COLUMNS = [
+    'villa', 'client_name', 'client_phone', 'client_email', 'check_in', 'check_out', 'status',
+    'number_of_guests', 'notes', 'payment_status', 'booking_source', 'payment_method',
+    'total_payment', 'advance_payment', 'created_by', 'created_at', 'updated_at',
+]
+
+# (weekend_days, weight); 0=Mon ... 6=Sun
+WEEKEND_CONFIGS = [([4, 5], 5), ([5, 6], 3), ([4, 5, 6], 2), ([5], 1), ([], 1)]
+
+
+def round_price(value) -> Decimal:
+    return Decimal(int(round(value / 500)) * 500)
+
+
+def special_prices_for(rng, base, years):
+    """Christmas/New Year peak and a summer season every year, plus an occasional festival week"""
+    entries = []
+    for year in years:
+        entries.append({
+            'name': 'Christmas & New Year',
+            'start_date': date(year, 12, 20).isoformat(),
+            'end_date': date(year + 1, 1, 5).isoformat(),
+            'price': float(round_price(base * rng.uniform(1.6, 2.2))),
+        })
+        entries.append({
+            'name': 'Summer season',
+            'start_date': date(year, 4, 15).isoformat(),
+            'end_date': date(year, 6, 15).isoformat(),
+            'price': float(round_price(base * rng.uniform(1.15, 1.4))),
+        })
+        if rng.random() < 0.6:
+            start = date(year, 10, 15) + timedelta(days=rng.randrange(25))
+            entries.append({
+                'name': 'Festival week',
+                'start_date': start.isoformat(),
+                'end_date': (start + timedelta(days=6)).isoformat(),
+                'price': float(round_price(base * rng.uniform(1.3, 1.7))),
+            })
+    return entries
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate villas and non-overlapping bookings for load testing (repeatable per --seed and --start)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--villas', type=int, default=50)
+        parser.add_argument('--bookings-per-villa', type=int, default=300)
+        parser.add_argument('--years', type=int, default=3, help='Booking span in years')
+        parser.add_argument('--start', type=date.fromisoformat, default=None,
+                            help='First check-in date (default: 1 January of last year)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='Scale Villa', help='Name prefix of generated villas')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated villas first')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+        start = options['start'] or date(date.today().year - 1, 1, 1)
+        span_days = (start.replace(year=start.year + options['years']) - start).days
+        per_villa = options['bookings_per_villa']
+        if per_villa > span_days:
+            raise CommandError(
+                f'{per_villa} bookings of at least one night do not fit in {span_days} days; '
+                'use more --years or more --villas'
+            )
+
+        if options['clear']:
+            self._clear(prefix)
+        elif Villa.objects.filter(name__startswith=f'{prefix} ').exists():
+            raise CommandError(f'Villas named "{prefix} ..." already exist; use --clear or another --prefix')
+
+        villas = self._create_villas(rng, options['villas'], prefix, start, options['years'])
+        self.stdout.write(f'✓ {len(villas)} villas ({time.perf_counter() - started:.1f}s)')
+
+        users = self._booking_creators()
+        total = 0
+        bookings = self._generate_bookings(rng, villas, per_villa, start, span_days, users)
+        for chunk in chunked(bookings, options['chunk_size']):
+            with transaction.atomic():
+                self._insert_bookings(chunk)
+            total += len(chunk)
+            if total % (options['chunk_size'] * 20) == 0:
+                self.stdout.write(f'  {total:,} bookings ({time.perf_counter() - started:.1f}s)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(villas):,} villas and {total:,} bookings in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def _booking_creators(self):
+        User = get_user_model()
+        users = list(User.objects.filter(is_staff=True).values_list('pk', flat=True))
+        if not users:
+            # created_by is required by Booking.full_clean()
+            user, _ = User.objects.get_or_create(username='seed_scale', defaults={'name': 'Load Test', 'is_staff': True})
+            users = [user.pk]
+        return users
+
+    def _clear(self, prefix):
+        villa_ids = list(Villa.objects.filter(name__startswith=f'{prefix} ').values_list('pk', flat=True))
+        if not villa_ids:
+            return
+        # Raw delete: the ORM would load every booking to run the tombstone signal
+        with transaction.atomic(), connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            for ids in chunked(villa_ids, 500):
+                cursor.execute(
+                    f'DELETE FROM {Booking._meta.db_table} WHERE villa_id IN ({", ".join(["%s"] * len(ids))})',
+                    ids,
+                )
+            Villa.objects.filter(pk__in=villa_ids).delete()
+        self.stdout.write(f'✓ Removed {len(villa_ids)} generated villas and their bookings')
+
+    def _create_villas(self, rng, count, prefix, start, years):
+        configs, weights = zip(*WEEKEND_CONFIGS)
+        # Seasons for every year a stay can touch
+        seasons = range(start.year - 1, start.year + years + 1)
+        villas = []
+        for i in range(count):
+            base = float(round_price(rng.uniform(6000, 30000)))
+            villas.append(Villa(
+                name=f'{prefix} {i + 1:05d}',
+                location=f'{rng.choice(LOCATIONS)}, Goa',
+                max_guests=rng.choice([4, 6, 8, 10, 12, 16]),
+                price_per_night=Decimal(int(base)),
+                weekend_price=round_price(base * rng.uniform(1.2, 1.5)),
+                special_day_price=round_price(base * rng.uniform(1.4, 1.8)) if rng.random() < 0.7 else None,
+                weekend_days=list(rng.choices(configs, weights)[0]),
+                status='maintenance' if rng.random() < 0.05 else 'active',
+                amenities=rng.sample(['pool', 'wifi', 'ac', 'kitchen', 'parking', 'bbq', 'gym'], 4),
+                special_prices=special_prices_for(rng, base, seasons),
+                order=i,
+            ))
+
+        with transaction.atomic():
+            villas = Villa.objects.bulk_create(villas, batch_size=500)
+            # bulk_create skips Villa.save(), which mirrors special_prices into SpecialPrice
+            SpecialPrice.objects.bulk_create([
+                SpecialPrice(
+                    villa=villa,
+                    start_date=entry['start_date'],
+                    end_date=entry['end_date'],
+                    price=entry['price'].quantize(Decimal('0.01')),
+                    name=entry['name'][:100],
+                )
+                for villa in villas
+                for entry in parse_special_price_entries(villa.special_prices)
+            ], batch_size=5000)
+        return villas
+
+    def _generate_bookings(self, rng, villas, per_villa, start, span_days, users):
+        """Booking rows as tuples in BOOKING_COLUMNS order"""
+        ops = connections[DEFAULT_DB_ALIAS].ops
+        now = ops.adapt_datetimefield_value(timezone.now())
+        sources = [choice for choice, _ in Booking.SOURCE_CHOICES]
+        methods = [choice for choice, _ in Booking.PAYMENT_METHOD_CHOICES]
+        shares = [Decimal('0.2'), Decimal('0.3'), Decimal('0.5')]
+        adapt_date = ops.adapt_datefield_value
+        random_value = rng.random
+
+        # rng.choice is several times slower and this runs for every row
+        def pick(options):
+            return options[int(random_value() * len(options))]
+
+        for villa in villas:
+            pricer = VillaPricer(villa)
+            # One night per stay is fixed; the remaining days are split randomly
+            # into longer stays and gaps, so stays never overlap and all fit
+            spare = span_days - per_villa
+            weights = [(rng.random(), rng.random()) for _ in range(per_villa)]
+            scale = spare / (sum(n + g for n, g in weights) or 1)
+
+            check_in = start
+            for n, (night_weight, gap_weight) in enumerate(weights):
+                check_in += timedelta(days=int(gap_weight * scale))
+                check_out = check_in + timedelta(days=1 + int(night_weight * scale))
+                total = pricer.total(check_in, check_out)
+                roll = random_value()
+                if roll < 0.6:
+                    payment_status, advance = 'full', total
+                elif roll < 0.9:
+                    payment_status, advance = 'advance', (total * pick(shares)).quantize(Decimal('1'))
+                else:
+                    payment_status, advance = 'pending', Decimal('0')
+                blocked = random_value() < 0.05
+                first, last = pick(FIRST_NAMES), pick(LAST_NAMES)
+                email = '' if random_value() < 0.3 else f'{first}.{last}{n}@example.com'.lower().replace("'", '')
+                yield (
+                    villa.pk,
+                    'Owner block' if blocked else f'{first} {last}',
+                    f'9{int(random_value() * 10 ** 9):09d}',
+                    email,
+                    adapt_date(check_in),
+                    adapt_date(check_out),
+                    'blocked' if blocked else 'booked',
+                    1 + int(random_value() * villa.max_guests),
+                    '',
+                    payment_status,
+                    pick(sources),
+                    pick(methods),
+                    total,
+                    advance,
+                    pick(users),
+                    now,
+                    now,
+                )
+                check_in = check_out
+
+    def _insert_bookings(self, rows):
+        """
+        Multi-row INSERTs of prepared tuples. Equivalent to
+        Booking.objects.bulk_create, which on Django 5.0 spends most of its
+        time preparing each field of each model instance.
+        """
+        connection = connections[DEFAULT_DB_ALIAS]
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(Booking._meta.get_field(name).column) for name in BOOKING_COLUMNS)
+        per_statement = connection.ops.bulk_batch_size(BOOKING_COLUMNS, rows)
+        placeholder = f'({", ".join(["%s"] * len(BOOKING_COLUMNS))})'
+        with connection.cursor() as cursor:
+            # The backend cursor: with DEBUG on, the wrapper would format and
+            # log every statement and its thousands of parameters
+            cursor = getattr(cursor, 'cursor', cursor)
+            for offset in range(0, len(rows), per_statement):
+                batch = rows[offset:offset + per_statement]
+                cursor.execute(
+                    f'INSERT INTO {quote(Booking._meta.db_table)} ({columns}) '
+                    f'VALUES {", ".join([placeholder] * len(batch))}',
+                    [value for row in batch for value in row],
+                )
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('villas', '0006_alter_villa_options_villa_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='villa',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Generated thumbnail files per size and format (see villas/images.py)', verbose_name='Image Variants'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-19 11:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('villas', '0007_villa_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpecialPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('villa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='special_price_rules', to='villas.villa')),
+            ],
+            options={
+                'ordering': ['start_date', 'villa'],
+                'indexes': [models.Index(fields=['villa', 'start_date', 'end_date'], name='villas_spec_villa_i_5ebe93_idx'), models.Index(fields=['start_date', 'end_date'], name='villas_spec_start_d_e75bd5_idx')],
+            },
+        ),
+    ]
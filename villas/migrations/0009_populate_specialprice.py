@@ -0,0 +1,63 @@
+import logging
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_date(value):
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    raise ValueError(value)
+
+
+def copy_special_prices(apps, schema_editor):
+    """Create SpecialPrice rows from each villa's special_prices JSON"""
+    Villa = apps.get_model('villas', 'Villa')
+    SpecialPrice = apps.get_model('villas', 'SpecialPrice')
+
+    price_field = SpecialPrice._meta.get_field('price')
+    rows = []
+    for villa in Villa.objects.exclude(special_prices=[]).only('id', 'special_prices'):
+        if not isinstance(villa.special_prices, list):
+            continue
+        for entry in villa.special_prices:
+            if not isinstance(entry, dict):
+                continue
+            if not all([entry.get('start_date'), entry.get('end_date'), entry.get('price')]):
+                continue
+            try:
+                price = Decimal(str(entry['price'])).quantize(Decimal('0.01'))
+                # NaN, infinite or more digits than the column holds (as in validate_special_prices)
+                price_field.run_validators(price)
+                rows.append(SpecialPrice(
+                    villa_id=villa.id,
+                    start_date=_parse_date(entry['start_date']),
+                    end_date=_parse_date(entry['end_date']),
+                    price=price,
+                    name=str(entry.get('name') or '')[:100],
+                ))
+            except (ValueError, TypeError, InvalidOperation, ValidationError):
+                # Same entries the pricing code ignores, plus prices the table can't store
+                logger.warning('Villa %s: skipped special price %r', villa.id, entry)
+                continue
+
+    SpecialPrice.objects.bulk_create(rows, batch_size=500)
+
+
+def clear_special_prices(apps, schema_editor):
+    apps.get_model('villas', 'SpecialPrice').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('villas', '0008_specialprice'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_special_prices, clear_special_prices),
+    ]
@@ -1,6 +1,12 @@
-from django.db import models
+import logging
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+logger = logging.getLogger(__name__)
+
 
 class Villa(models.Model):
     """
@@ -56,6 +62,13 @@ class Villa(models.Model):
         null=True,
         verbose_name='Villa Image'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Image Variants',
+        help_text='Generated thumbnail files per size and format (see villas/images.py)'
+    )
     description = models.TextField(blank=True, verbose_name='Description')
     amenities = models.JSONField(default=list, blank=True, verbose_name='Amenities')
     special_prices = models.JSONField(
@@ -75,12 +88,116 @@ class Villa(models.Model):
     
     def __str__(self):
         return self.name
-    
+
+    def clean(self):
+        validate_special_prices(self.special_prices)
+
+    def save(self, *args, **kwargs):
+        # One transaction, so a mirror that can't be written rolls back the villa row too
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None or 'special_prices' in update_fields:
+                self.sync_special_price_rules()
+        # After super().save() so a new upload already has its final storage
+        # name, and after commit so Pillow doesn't run inside the transaction
+        from .images import variants_are_stale
+        if variants_are_stale(self):
+            transaction.on_commit(self._refresh_image_variants)
+
+    def _refresh_image_variants(self):
+        from .images import refresh_variants
+        try:
+            refresh_variants(self)
+        except Exception:
+            logger.exception('Could not generate thumbnails for villa %s', self.pk)
+
+    def sync_special_price_rules(self):
+        """
+        Write special_prices through to SpecialPrice rows.
+
+        The JSON stays what the API reads and writes; the table mirrors it
+        for range queries. Rows are only rewritten when they differ.
+        """
+        from bookings.pricing import parse_special_price_entries
+
+        wanted = [
+            SpecialPrice(
+                villa=self,
+                start_date=entry['start_date'],
+                end_date=entry['end_date'],
+                price=_rule_price(entry['price']),
+                name=entry['name'][:100],
+            )
+            for entry in parse_special_price_entries(self.special_prices)
+        ]
+        existing = list(self.special_price_rules.all())
+
+        def key(rule):
+            return (rule.start_date, rule.end_date, Decimal(rule.price), rule.name)
+
+        if sorted(map(key, existing)) == sorted(map(key, wanted)):
+            return
+        # Runs inside save()'s transaction
+        self.special_price_rules.all().delete()
+        SpecialPrice.objects.bulk_create(wanted)
+
     @property
     def is_active(self):
         return self.status == 'active'
 
 
+def _rule_price(price):
+    return price.quantize(Decimal('0.01'))
+
+
+def validate_special_prices(special_prices):
+    """Raise ValidationError for a special price the SpecialPrice mirror can't store"""
+    from bookings.pricing import parse_special_price_entries
+
+    price_field = SpecialPrice._meta.get_field('price')
+    for entry in parse_special_price_entries(special_prices):
+        try:
+            price_field.run_validators(_rule_price(entry['price']))
+        except (ArithmeticError, ValidationError):
+            raise ValidationError({
+                'special_prices': (
+                    f"Price {entry['price']} for {entry['start_date']} to {entry['end_date']} must be "
+                    f"a number below {10 ** (price_field.max_digits - price_field.decimal_places)}."
+                )
+            })
+
+
+class SpecialPriceQuerySet(models.QuerySet):
+    def overlapping(self, start_date, end_date):
+        """Rules covering any night in [start_date, end_date]"""
+        return self.filter(start_date__lte=end_date, end_date__gte=start_date)
+
+
+class SpecialPrice(models.Model):
+    """
+    One special pricing rule, mirrored from Villa.special_prices on save
+    """
+    villa = models.ForeignKey(Villa, on_delete=models.CASCADE, related_name='special_price_rules')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    name = models.CharField(max_length=100, blank=True)
+
+    objects = SpecialPriceQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['start_date', 'villa']
+        indexes = [
+            models.Index(fields=['villa', 'start_date', 'end_date']),
+            # "Which villas have special pricing between X and Y" across villas
+            models.Index(fields=['start_date', 'end_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.villa.name}: {self.start_date} - {self.end_date} ({self.price})"
+
+
 class GlobalSpecialDay(models.Model):
     """
     Represents a global special day configuration (e.g. Christmas, New Year)
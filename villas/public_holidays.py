@@ -2,8 +2,15 @@
 Public holiday helpers for the customer availability calendar.
 Merges admin-configured GlobalSpecialDay entries with standard Indian public holidays.
 """
+import threading
+import time
 from datetime import date, timedelta
 
+from django.conf import settings
+from django.db.models import Q
+
+from config.metrics import record_cache_lookup
+
 # Fixed-date holidays (repeat every year)
 RECURRING_PUBLIC_HOLIDAYS = [
     {'name': 'New Year', 'day': 1, 'month': 1},
@@ -71,6 +78,59 @@ def collect_holidays_in_range(start: date, end: date, global_special_days) -> di
     return holidays
 
 
+_special_day_dates: dict[int, frozenset[date]] = {}
+_special_day_lock = threading.Lock()
+_special_day_loaded_at = None
+
+
+def special_day_dates(year: int) -> frozenset[date]:
+    """
+    All special days in a year: GlobalSpecialDay entries plus the built-in
+    holidays, the same set the public calendar marks.
+
+    Computed once per year per process and reused for every night priced.
+    GlobalSpecialDay signals clear the cache in the writing process; other
+    processes rebuild after SPECIAL_DAY_CACHE_SECONDS.
+    """
+    global _special_day_loaded_at
+    max_age = getattr(settings, 'SPECIAL_DAY_CACHE_SECONDS', 300)
+    if _special_day_loaded_at is not None and time.monotonic() - _special_day_loaded_at > max_age:
+        clear_special_day_cache()
+
+    dates = _special_day_dates.get(year)
+    record_cache_lookup('special_days', dates is not None)
+    if dates is not None:
+        return dates
+
+    from .models import GlobalSpecialDay
+
+    days = set()
+    for day, month in GlobalSpecialDay.objects.filter(
+        Q(year__isnull=True) | Q(year=year)
+    ).values_list('day', 'month'):
+        try:
+            days.add(date(year, month, day))
+        except ValueError:
+            # e.g. 29 Feb outside leap years
+            continue
+    for h in RECURRING_PUBLIC_HOLIDAYS + YEAR_SPECIFIC_HOLIDAYS.get(year, []):
+        days.add(date(year, h['month'], h['day']))
+
+    dates = frozenset(days)
+    with _special_day_lock:
+        _special_day_dates[year] = dates
+        if _special_day_loaded_at is None:
+            _special_day_loaded_at = time.monotonic()
+    return dates
+
+
+def clear_special_day_cache():
+    global _special_day_loaded_at
+    with _special_day_lock:
+        _special_day_dates.clear()
+        _special_day_loaded_at = None
+
+
 def compute_long_weekend_dates(holiday_dates: set[date]) -> set[date]:
     """
     Expand public holidays into long-weekend date ranges customers often book.
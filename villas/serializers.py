@@ -1,5 +1,18 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Villa, GlobalSpecialDay
+from .images import variant_urls
+from .models import Villa, GlobalSpecialDay, SpecialPrice, validate_special_prices
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Thumbnail URLs per size: {size: {width, height, webp, jpeg}}"""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, villa):
+        return variant_urls(villa, self.context.get('request'))
 
 
 class GlobalSpecialDaySerializer(serializers.ModelSerializer):
@@ -9,16 +22,27 @@ class GlobalSpecialDaySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+class SpecialPriceSerializer(serializers.ModelSerializer):
+    """Read-only view of the rules mirrored from Villa.special_prices"""
+    villa_name = serializers.CharField(source='villa.name', read_only=True)
+
+    class Meta:
+        model = SpecialPrice
+        fields = ['id', 'villa', 'villa_name', 'start_date', 'end_date', 'price', 'name']
+        read_only_fields = fields
+
+
 class VillaSerializer(serializers.ModelSerializer):
     """Serializer for Villa model"""
     is_active = serializers.ReadOnlyField()
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Villa
         fields = [
             'id', 'name', 'location', 'max_guests', 'price_per_night',
             'weekend_price', 'special_day_price', 'weekend_days', 'special_prices',
-            'status', 'image', 'description', 'amenities', 'order',
+            'status', 'image', 'image_variants', 'description', 'amenities', 'order',
             'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -31,14 +55,22 @@ class VillaSerializer(serializers.ModelSerializer):
                raise serializers.ValidationError("Days must be integers between 0 (Mon) and 6 (Sun).")
         return value
 
+    def validate_special_prices(self, value):
+        try:
+            validate_special_prices(value)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict['special_prices'])
+        return value
+
 
 class VillaListSerializer(serializers.ModelSerializer):
     """Simplified serializer for villa list"""
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Villa
         fields = [
             'id', 'name', 'location', 'max_guests',
             'price_per_night', 'weekend_price', 'special_day_price', 
-            'weekend_days', 'status', 'image', 'special_prices', 'order'
+            'weekend_days', 'status', 'image', 'image_variants', 'special_prices', 'order'
         ]
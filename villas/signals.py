@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import GlobalSpecialDay
+from .public_holidays import clear_special_day_cache
+
+
+@receiver(post_save, sender=GlobalSpecialDay)
+@receiver(post_delete, sender=GlobalSpecialDay)
+def invalidate_special_days(sender, **kwargs):
+    """Priced nights must see added/removed special days immediately"""
+    clear_special_day_cache()
@@ -1,3 +1,230 @@
-from django.test import TestCase
+"""
+Query budgets for the villa endpoints; see bookings/tests.py for how the
+budgets are set.
+"""
+import importlib
+import io
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from PIL import Image
+
+from bookings.analytics_cache import data_version
+from bookings.models import Booking
+from bookings.pricing import VillaPricer
+from config.testing import QueryBudgetTestCase
+from villas.images import THUMBNAIL_CACHE_CONTROL, THUMBNAIL_DIR, THUMBNAIL_SIZES, serve_thumbnail
+from villas.models import SpecialPrice, Villa
+
+
+class VillaEndpointQueryBudgetTests(QueryBudgetTestCase):
+    def test_villa_list(self):
+        response = self.assertGetWithin(3, '/api/v1/villas/')
+        self.assertTrue(response.data)
+
+    def test_villa_detail(self):
+        self.assertGetWithin(2, f'/api/v1/villas/{self.data["villas"][0].pk}/')
+
+    def test_villa_availability(self):
+        today = self.data['today']
+        self.assertGetWithin(
+            3, f'/api/v1/villas/{self.data["villas"][0].pk}/availability/',
+            check_in=(today + timedelta(days=70)).isoformat(),
+            check_out=(today + timedelta(days=74)).isoformat(),
+        )
+
+    def test_special_prices(self):
+        today = self.data['today']
+        response = self.assertGetWithin(
+            2, '/api/v1/villas/special-prices/',
+            start=today.isoformat(), end=(today + timedelta(days=60)).isoformat(),
+        )
+        self.assertTrue(response.data)
+
+    def test_special_days(self):
+        self.assertGetWithin(3, '/api/v1/special-days/')
+
+    def test_reorder_invalidates_analytics(self):
+        version = data_version()
+        ids = [villa.pk for villa in reversed(self.data['villas'])]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/villas/reorder/', {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(data_version(), version)
+
+
+class SpecialPriceMirrorTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.villa = self.data['villas'][0]
+        self.rules = list(self.villa.special_price_rules.values_list('start_date', 'end_date', 'price'))
+
+    def special_prices(self, price):
+        return [{'start_date': '2030-01-01', 'end_date': '2030-01-05', 'price': price, 'name': 'New Year'}]
+
+    def assertVillaUnchanged(self, special_prices):
+        self.villa.refresh_from_db()
+        self.assertEqual(self.villa.special_prices, special_prices)
+        self.assertEqual(
+            list(self.villa.special_price_rules.values_list('start_date', 'end_date', 'price')), self.rules
+        )
+
+    def test_price_the_mirror_cannot_store_is_rejected(self):
+        before = self.villa.special_prices
+        for price in ('123456789', 'NaN', '1e30'):
+            response = self.client.patch(
+                f'/api/v1/villas/{self.villa.pk}/', {'special_prices': self.special_prices(price)}, format='json'
+            )
+            self.assertEqual(response.status_code, 400, price)
+            self.assertIn('special_prices', response.data)
+        self.assertVillaUnchanged(before)
+
+        self.villa.special_prices = self.special_prices('123456789')
+        with self.assertRaises(ValidationError):
+            self.villa.full_clean()
+
+    def test_failed_mirror_rolls_back_the_villa(self):
+        before = self.villa.special_prices
+        self.villa.special_prices = self.special_prices('5000')
+        with patch.object(SpecialPrice.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.villa.save()
+        self.assertVillaUnchanged(before)
+
+        self.villa.special_prices = self.special_prices('5000')
+        self.villa.save()
+        self.assertEqual(
+            list(self.villa.special_price_rules.values_list('price', flat=True)), [Decimal('5000.00')]
+        )
+
+    def test_populate_migration_skips_prices_the_table_cannot_store(self):
+        migration = importlib.import_module('villas.migrations.0009_populate_specialprice')
+        legacy = self.special_prices('5000') + [
+            {**entry, 'price': price}
+            for price in ('1e10', 'NaN', 'Infinity', 'lots') for entry in self.special_prices(price)
+        ]
+        # Written before validate_special_prices existed
+        Villa.objects.filter(pk=self.villa.pk).update(special_prices=legacy)
+        SpecialPrice.objects.all().delete()
+
+        with self.assertLogs('villas.migrations.0009_populate_specialprice', 'WARNING') as logs:
+            migration.copy_special_prices(apps, None)
+
+        self.assertEqual(
+            list(self.villa.special_price_rules.values_list('price', flat=True)), [Decimal('5000.00')]
+        )
+        self.assertEqual(len(logs.records), 4)
+
+
+class VillaThumbnailTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def upload(self, width=1600, height=1200):
+        buffer = io.BytesIO()
+        Image.new('RGB', (width, height), 'teal').save(buffer, 'JPEG')
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_generates_variants_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            villa = Villa.objects.create(
+                name='Thumbs', location='Goa', max_guests=4, price_per_night=1000, image=self.upload()
+            )
+        self.assertEqual(villa.image_variants, {})
+        for callback in callbacks:
+            callback()
+
+        villa.refresh_from_db()
+        sizes = villa.image_variants['sizes']
+        self.assertEqual(villa.image_variants['source'], villa.image.name)
+        self.assertEqual(set(sizes), set(THUMBNAIL_SIZES))
+        self.assertEqual((sizes['small']['width'], sizes['small']['height']), (320, 240))
+        self.assertRegex(sizes['small']['webp'], r'^villas/thumbs/photo-small-[0-9a-f]{12}\.webp$')
+
+        # The DEBUG-only view; production sends the same header from the proxy
+        path = sizes['small']['jpeg'].removeprefix(f'{THUMBNAIL_DIR}/')
+        response = serve_thumbnail(RequestFactory().get(f'/media/{THUMBNAIL_DIR}/{path}'), path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], THUMBNAIL_CACHE_CONTROL)
+        self.assertEqual(Image.open(io.BytesIO(b''.join(response.streaming_content))).size, (320, 240))
+
+    def test_small_images_are_not_upscaled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            villa = Villa.objects.create(
+                name='Tiny', location='Goa', max_guests=2, price_per_night=1000, image=self.upload(200, 100)
+            )
+        villa.refresh_from_db()
+        large = villa.image_variants['sizes']['large']
+        self.assertEqual((large['width'], large['height']), (200, 100))
+
+    def test_rolled_back_save_leaves_no_thumbnails(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                Villa.objects.create(
+                    name='Rolled back', location='Goa', max_guests=2, price_per_night=1000, image=self.upload()
+                )
+                raise DatabaseError
+        self.assertEqual(callbacks, [])
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, THUMBNAIL_DIR)))
+
+
+class SeedScaleTests(TestCase):
+    def seed(self, **options):
+        call_command(
+            'seed_scale', villas=2, bookings_per_villa=20, years=1, start=date(2031, 1, 1),
+            prefix='Test Scale', stdout=io.StringIO(), **options,
+        )
+        return Booking.objects.filter(villa__name__startswith='Test Scale ').order_by('villa__name', 'check_in')
+
+    def rows(self, bookings):
+        return list(bookings.values_list(
+            'villa__name', 'client_name', 'check_in', 'check_out', 'status', 'total_payment', 'advance_payment',
+        ))
+
+    def test_bookings_fit_and_are_priced(self):
+        bookings = self.seed()
+        self.assertEqual(bookings.count(), 40)
+        villas = Villa.objects.filter(name__startswith='Test Scale ')
+        self.assertEqual(villas.count(), 2)
+
+        for villa in villas:
+            pricer = VillaPricer(villa)
+            stays = list(bookings.filter(villa=villa))
+            self.assertEqual(len(stays), 20)
+            self.assertEqual(SpecialPrice.objects.filter(villa=villa).count(), len(villa.special_prices))
+            for booking, following in zip(stays, stays[1:] + [None]):
+                self.assertLess(booking.check_in, booking.check_out)
+                self.assertLess(booking.check_out, date(2032, 1, 2))
+                if following is not None:
+                    self.assertLessEqual(booking.check_out, following.check_in)
+                self.assertEqual(booking.total_payment, pricer.total(booking.check_in, booking.check_out))
+                self.assertLessEqual(booking.advance_payment, booking.total_payment)
+                self.assertTrue(booking.created_by.is_staff)
+
+    def test_clear_regenerates_the_same_rows(self):
+        first = self.rows(self.seed())
+        with self.assertRaises(CommandError):
+            self.seed()
+
+        old_ids = set(Villa.objects.filter(name__startswith='Test Scale ').values_list('pk', flat=True))
+        bookings = self.seed(clear=True)
+        self.assertFalse(Villa.objects.filter(pk__in=old_ids).exists())
+        self.assertFalse(Booking.objects.filter(villa_id__in=old_ids).exists())
+        self.assertEqual(self.rows(bookings), first)
+
+        self.assertNotEqual(self.rows(self.seed(clear=True, seed=7)), first)
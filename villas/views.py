@@ -1,13 +1,16 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django.db.models import Count, Sum
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from datetime import timedelta
-from .models import Villa, GlobalSpecialDay
-from .serializers import VillaSerializer, VillaListSerializer, GlobalSpecialDaySerializer
+from datetime import datetime, timedelta
+from .models import Villa, GlobalSpecialDay, SpecialPrice
+from .serializers import VillaSerializer, VillaListSerializer, GlobalSpecialDaySerializer, SpecialPriceSerializer
+from bookings.analytics_cache import bump_data_version
 from bookings.models import Booking
+from config.db_router import read_replica
 
 
 class GlobalSpecialDayViewSet(viewsets.ModelViewSet):
@@ -38,6 +41,7 @@ class VillaViewSet(viewsets.ModelViewSet):
 
 
 
+    @transaction.atomic
     def perform_create(self, serializer):
         new_order = serializer.validated_data.get('order', 0)
         if new_order and new_order > 0:
@@ -45,6 +49,7 @@ class VillaViewSet(viewsets.ModelViewSet):
             Villa.objects.filter(order__gte=new_order).update(order=F('order') + 1)
         serializer.save()
 
+    @transaction.atomic
     def perform_update(self, serializer):
         new_order = serializer.validated_data.get('order')
         instance = serializer.instance
@@ -80,7 +85,99 @@ class VillaViewSet(viewsets.ModelViewSet):
                 ).update(order=F('order') - 1)
             
         serializer.save()
-    
+
+    @action(detail=False, methods=['post'])
+    def reorder(self, request):
+        """
+        Apply a full display order in one go (drag-and-drop)
+        POST /api/v1/villas/reorder/
+        Body: {"ids": [3, 1, 2, ...]} - every villa id, in display order
+
+        Villas get order 1..N in a single transaction with one bulk_update,
+        so concurrent reorders cannot interleave into duplicate orders.
+        """
+        ids = request.data.get('ids') if isinstance(request.data, dict) else request.data
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return Response(
+                {'error': 'ids must be a list of villa ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(set(ids)) != len(ids):
+            return Response(
+                {'error': 'ids must not contain duplicates'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            # Lock every villa so a concurrent reorder or move waits for this one
+            villas = {v.id: v for v in Villa.objects.select_for_update().only('id', 'order')}
+            missing = sorted(set(villas) - set(ids))
+            unknown = sorted(set(ids) - set(villas))
+            if missing or unknown:
+                return Response(
+                    {
+                        'error': 'ids must list every villa exactly once',
+                        'missing': missing,
+                        'unknown': unknown,
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            now = timezone.now()
+            changed = []
+            for position, villa_id in enumerate(ids, start=1):
+                villa = villas[villa_id]
+                if villa.order != position:
+                    villa.order = position
+                    # bulk_update skips auto_now fields
+                    villa.updated_at = now
+                    changed.append(villa)
+            Villa.objects.bulk_update(changed, ['order', 'updated_at'])
+            if changed:
+                # bulk_update sends no signals; the dashboards list villas by order
+                transaction.on_commit(bump_data_version)
+
+        return Response({
+            'updated': len(changed),
+            'order': [{'id': villa_id, 'order': position} for position, villa_id in enumerate(ids, start=1)],
+        })
+
+    @action(detail=False, methods=['get'], url_path='special-prices')
+    @read_replica
+    def special_prices(self, request):
+        """
+        Special pricing rules active in a date range, across villas
+        GET /api/v1/villas/special-prices/?start=YYYY-MM-DD&end=YYYY-MM-DD[&villa=<id>]
+        Defaults to the next 7 days.
+        """
+        today = timezone.now().date()
+        try:
+            start = request.query_params.get('start')
+            end = request.query_params.get('end')
+            start = datetime.strptime(start, '%Y-%m-%d').date() if start else today
+            end = datetime.strptime(end, '%Y-%m-%d').date() if end else start + timedelta(days=7)
+        except ValueError:
+            return Response(
+                {'error': 'Invalid date format. Use YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end < start:
+            return Response(
+                {'error': 'end must not be before start'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rules = SpecialPrice.objects.overlapping(start, end).select_related('villa')
+        villa_id = request.query_params.get('villa')
+        if villa_id:
+            rules = rules.filter(villa_id=villa_id)
+
+        return Response({
+            'start': start,
+            'end': end,
+            'results': SpecialPriceSerializer(rules, many=True).data,
+        })
+
     @action(detail=True, methods=['get'])
     def availability(self, request, pk=None):
         """